@@ -0,0 +1,75 @@
+from random import Random
+from typing import Dict, List, Tuple
+
+from pycct import (
+    _FST,
+    DoublePushoutRule,
+    FinGraphMorphism,
+    FinGraphObject,
+    FinSetMorphism,
+    FinSetObject,
+    FinSetTableMorphism,
+    validation_mode,
+)
+
+
+def finset(size: int) -> FinSetObject:
+    return FinSetObject(range(size))
+
+
+def random_finset_morphism(dom: FinSetObject, cod: FinSetObject, rng: Random) -> FinSetMorphism:
+    cod_elements = list(cod)
+    with validation_mode("off"):
+        return FinSetTableMorphism(dom, cod, {x: rng.choice(cod_elements) for x in dom})
+
+
+def injective_finset_morphism(dom: FinSetObject, cod: FinSetObject, rng: Random) -> FinSetMorphism:
+    with validation_mode("off"):
+        return FinSetTableMorphism(dom, cod, dict(zip(dom, rng.sample(list(cod), len(dom)))))
+
+
+def fingraph(nodes: List[_FST], edges: Dict[_FST, Tuple[_FST, _FST]]) -> FinGraphObject:
+    nodes_obj = FinSetObject(nodes)
+    edges_obj = FinSetObject(edges)
+    with validation_mode("off"):
+        return FinGraphObject(
+            nodes_obj,
+            edges_obj,
+            FinSetTableMorphism(edges_obj, nodes_obj, {e: s for e, (s, _) in edges.items()}),
+            FinSetTableMorphism(edges_obj, nodes_obj, {e: t for e, (_, t) in edges.items()}),
+        )
+
+
+def random_fingraph(num_nodes: int, num_edges: int, rng: Random) -> FinGraphObject:
+    """Erdős–Rényi style multigraph, loops allowed."""
+    return fingraph(
+        list(range(num_nodes)),
+        {e: (rng.randrange(num_nodes), rng.randrange(num_nodes)) for e in range(num_edges)},
+    )
+
+
+def path_fingraph(num_nodes: int) -> FinGraphObject:
+    """0 -> 1 -> ... -> num_nodes - 1."""
+    return fingraph(list(range(num_nodes)), {e: (e, e + 1) for e in range(num_nodes - 1)})
+
+
+def matching_fingraph(num_edges: int) -> FinGraphObject:
+    """num_edges disjoint edges (2i, 2i + 1)."""
+    return fingraph(list(range(2 * num_edges)), {e: (2 * e, 2 * e + 1) for e in range(num_edges)})
+
+
+def inclusion(dom: FinGraphObject, cod: FinGraphObject) -> FinGraphMorphism:
+    with validation_mode("off"):
+        return FinGraphMorphism(
+            dom,
+            cod,
+            FinSetTableMorphism(dom.nodes, cod.nodes, {n: n for n in dom.nodes}),
+            FinSetTableMorphism(dom.edges, cod.edges, {e: e for e in dom.edges}),
+        )
+
+
+def delete_leaf_rule() -> DoublePushoutRule:
+    """Delete an edge X -> Y together with Y."""
+    condition = fingraph(["X"], {})
+    precondition = fingraph(["X", "Y"], {"XY": ("X", "Y")})
+    return DoublePushoutRule(inclusion(condition, precondition), inclusion(condition, condition))
@@ -0,0 +1,327 @@
+"""Time and measure the peak memory of pycct constructions over generated inputs of increasing size.
+
+    python -m benchmarks.run --sizes 100 1000 10000 --output results.json
+    python -m benchmarks.run --filter pushout --compare results.json
+"""
+import argparse
+import json
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass
+from random import Random
+from typing import Any, Callable, Dict, List, Optional
+
+from pycct import (
+    DoublePushoutRule,
+    FinGraphMorphism,
+    FinGraphObject,
+    FinSetTableMorphism,
+    double_pushout,
+    double_pushout_many,
+    find_matches,
+    find_matches_parallel,
+    fingraph_coequalizer,
+    fingraph_coproduct,
+    fingraph_from_arrays,
+    fingraph_parse_edge_list,
+    fingraph_pullback,
+    fingraph_pushout,
+    fingraph_pushout_complement,
+    finset_coequalizer,
+    finset_coproduct,
+    finset_equalizer,
+    finset_product,
+    finset_pullback,
+    finset_pushout,
+    get_validation_mode,
+    match_plan,
+    set_validation_mode,
+    validation_mode,
+)
+
+from .generators import (
+    delete_leaf_rule,
+    fingraph,
+    finset,
+    injective_finset_morphism,
+    matching_fingraph,
+    path_fingraph,
+    random_fingraph,
+    random_finset_morphism,
+)
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    # Builds the inputs for a size, returning the construction to time.
+    setup: Callable[[int, Random], Callable[[], Any]]
+    max_size: int = 10**6
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, max_size: int = 10**6) -> Callable[[Callable[[int, Random], Callable[[], Any]]], Any]:
+    def register(setup: Callable[[int, Random], Callable[[], Any]]) -> Callable[[int, Random], Callable[[], Any]]:
+        BENCHMARKS[name] = Benchmark(name, setup, max_size)
+        return setup
+
+    return register
+
+
+def discrete_fingraph(size: int) -> FinGraphObject:
+    return fingraph(list(range(size)), {})
+
+
+def node_morphism(dom: FinGraphObject, cod: FinGraphObject, node_map: Dict[Any, Any]) -> FinGraphMorphism:
+    """Graph morphism from a graph without edges."""
+    with validation_mode("off"):
+        return FinGraphMorphism(
+            dom,
+            cod,
+            FinSetTableMorphism(dom.nodes, cod.nodes, node_map),
+            FinSetTableMorphism(dom.edges, cod.edges, {}),
+        )
+
+
+@benchmark("finset_coproduct")
+def finset_coproduct_setup(size: int, rng: Random) -> Callable[[], Any]:
+    a, b = finset(size), finset(size)
+    return lambda: finset_coproduct(a, b)
+
+
+@benchmark("finset_product")
+def finset_product_setup(size: int, rng: Random) -> Callable[[], Any]:
+    # Both factors of size sqrt(size), so the product has about size elements.
+    a = b = finset(math.isqrt(size))
+    return lambda: finset_product(a, b)
+
+
+@benchmark("finset_coequalizer")
+def finset_coequalizer_setup(size: int, rng: Random) -> Callable[[], Any]:
+    a, b = finset(size // 2), finset(size)
+    f, g = random_finset_morphism(a, b, rng), random_finset_morphism(a, b, rng)
+    return lambda: finset_coequalizer(f, g)
+
+
+@benchmark("finset_equalizer")
+def finset_equalizer_setup(size: int, rng: Random) -> Callable[[], Any]:
+    a, b = finset(size), finset(2)
+    f, g = random_finset_morphism(a, b, rng), random_finset_morphism(a, b, rng)
+    return lambda: finset_equalizer(f, g)
+
+
+@benchmark("finset_pushout")
+def finset_pushout_setup(size: int, rng: Random) -> Callable[[], Any]:
+    a, b = finset(size // 2), finset(size)
+    f, g = random_finset_morphism(a, b, rng), random_finset_morphism(a, b, rng)
+    return lambda: finset_pushout(f, g)
+
+
+@benchmark("finset_pushout_injective")
+def finset_pushout_injective_setup(size: int, rng: Random) -> Callable[[], Any]:
+    a, b = finset(size // 10), finset(size)
+    f, g = injective_finset_morphism(a, b, rng), random_finset_morphism(a, b, rng)
+    return lambda: finset_pushout(f, g)
+
+
+@benchmark("finset_pullback")
+def finset_pullback_setup(size: int, rng: Random) -> Callable[[], Any]:
+    a, c = finset(size), finset(max(size // 10, 1))
+    f, g = random_finset_morphism(a, c, rng), random_finset_morphism(a, c, rng)
+    return lambda: finset_pullback(f, g)
+
+
+@benchmark("fingraph_coproduct")
+def fingraph_coproduct_setup(size: int, rng: Random) -> Callable[[], Any]:
+    a, b = random_fingraph(size, 2 * size, rng), random_fingraph(size, 2 * size, rng)
+    return lambda: fingraph_coproduct(a, b)
+
+
+@benchmark("fingraph_from_arrays")
+def fingraph_from_arrays_setup(size: int, rng: Random) -> Callable[[], Any]:
+    source = [rng.randrange(size) for _ in range(2 * size)]
+    target = [rng.randrange(size) for _ in range(2 * size)]
+    return lambda: fingraph_from_arrays(source, target, num_nodes=size)
+
+
+@benchmark("fingraph_parse_edge_list")
+def fingraph_parse_edge_list_setup(size: int, rng: Random) -> Callable[[], Any]:
+    text = "\n".join(f"{rng.randrange(size)} {rng.randrange(size)}" for _ in range(2 * size))
+    return lambda: fingraph_parse_edge_list(text)
+
+
+@benchmark("fingraph_coequalizer")
+def fingraph_coequalizer_setup(size: int, rng: Random) -> Callable[[], Any]:
+    # Glue size / 10 random pairs of nodes of a random graph.
+    host = random_fingraph(size, 2 * size, rng)
+    glue = discrete_fingraph(size // 10)
+    f = node_morphism(glue, host, {n: rng.randrange(size) for n in glue.nodes})
+    g = node_morphism(glue, host, {n: rng.randrange(size) for n in glue.nodes})
+    return lambda: fingraph_coequalizer(f, g)
+
+
+@benchmark("fingraph_pushout")
+def fingraph_pushout_setup(size: int, rng: Random) -> Callable[[], Any]:
+    b, c = random_fingraph(size, 2 * size, rng), random_fingraph(size, 2 * size, rng)
+    glue = discrete_fingraph(size // 10)
+    f = node_morphism(glue, b, dict(zip(glue.nodes, rng.sample(range(size), len(glue.nodes)))))
+    g = node_morphism(glue, c, {n: rng.randrange(size) for n in glue.nodes})
+    return lambda: fingraph_pushout(f, g)
+
+
+@benchmark("fingraph_pullback")
+def fingraph_pullback_setup(size: int, rng: Random) -> Callable[[], Any]:
+    # Both graphs map onto the complete graph on k nodes by reducing their nodes mod k.
+    k = max(math.isqrt(size), 1)
+    base = fingraph(list(range(k)), {(i, j): (i, j) for i in range(k) for j in range(k)})
+
+    def reduction(a: FinGraphObject) -> FinGraphMorphism:
+        with validation_mode("off"):
+            return FinGraphMorphism(
+                a,
+                base,
+                FinSetTableMorphism(a.nodes, base.nodes, {n: n % k for n in a.nodes}),
+                FinSetTableMorphism(a.edges, base.edges, {e: (a.source(e) % k, a.target(e) % k) for e in a.edges}),
+            )
+
+    f, g = reduction(random_fingraph(size, size, rng)), reduction(random_fingraph(size, size, rng))
+    return lambda: fingraph_pullback(f, g)
+
+
+def _leaf_match(rule: DoublePushoutRule, host: FinGraphObject) -> FinGraphMorphism:
+    # The last edge of a path, whose target is the only leaf.
+    pattern = rule.precondition_map.cod
+    return next(find_matches(pattern, host, plan=match_plan(pattern, root="X"), roots=[len(host.nodes) - 2]))
+
+
+@benchmark("fingraph_pushout_complement")
+def fingraph_pushout_complement_setup(size: int, rng: Random) -> Callable[[], Any]:
+    rule, host = delete_leaf_rule(), path_fingraph(size)
+    match = _leaf_match(rule, host)
+    return lambda: fingraph_pushout_complement(rule.precondition_map, match, host)
+
+
+@benchmark("double_pushout")
+def double_pushout_setup(size: int, rng: Random) -> Callable[[], Any]:
+    rule, host = delete_leaf_rule(), path_fingraph(size)
+    match = _leaf_match(rule, host)
+    return lambda: double_pushout(rule, host, match)
+
+
+@benchmark("double_pushout_incremental")
+def double_pushout_incremental_setup(size: int, rng: Random) -> Callable[[], Any]:
+    rule, host = delete_leaf_rule(), path_fingraph(size)
+    match = _leaf_match(rule, host)
+    return lambda: double_pushout(rule, host, match, incremental=True)
+
+
+@benchmark("double_pushout_many")
+def double_pushout_many_setup(size: int, rng: Random) -> Callable[[], Any]:
+    # Delete every edge of a matching, all at once.
+    rule, host = delete_leaf_rule(), matching_fingraph(size // 2)
+    matches = list(find_matches(rule.precondition_map.cod, host))
+    return lambda: double_pushout_many(rule, host, matches)
+
+
+@benchmark("find_matches", max_size=10**5)
+def find_matches_setup(size: int, rng: Random) -> Callable[[], Any]:
+    # All paths of length two in a sparse random graph.
+    host = random_fingraph(size, 2 * size, rng)
+    pattern = path_fingraph(3)
+    return lambda: sum(1 for _ in find_matches(pattern, host))
+
+
+@benchmark("find_matches_parallel", max_size=10**5)
+def find_matches_parallel_setup(size: int, rng: Random) -> Callable[[], Any]:
+    host = random_fingraph(size, 2 * size, rng)
+    pattern = path_fingraph(3)
+    return lambda: sum(1 for _ in find_matches_parallel(pattern, host))
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    seconds: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+
+    # Tracing allocations slows the construction down, so peak memory is measured on a separate run.
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": seconds, "min_seconds": min(seconds), "peak_bytes": peak_bytes}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names: List[str], sizes: List[int], repeat: int, seed: int) -> List[Dict[str, Any]]:
+    results = []
+    for name in names:
+        bench = BENCHMARKS[name]
+        for size in sizes:
+            if size > bench.max_size:
+                continue
+            fn = bench.setup(size, Random(seed))
+            result = {"benchmark": name, "size": size, **measure(fn, repeat)}
+            results.append(result)
+            print(f"{name:32} {size:>9} {result['min_seconds']:>12.6f}s {result['peak_bytes'] / 2**20:>10.2f}MiB")
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any]) -> None:
+    baseline_seconds = {(r["benchmark"], r["size"]): r["min_seconds"] for r in baseline["results"]}
+    print(f"\nCompared with {baseline.get('commit')} (ratio of minimum times, above 1 is slower):")
+    for result in results:
+        before = baseline_seconds.get((result["benchmark"], result["size"]))
+        if before:
+            print(f"{result['benchmark']:32} {result['size']:>9} {result['min_seconds'] / before:>8.2f}x")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**2, 10**3, 10**4])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--filter", default="", help="Only run the benchmarks whose name contains this.")
+    parser.add_argument("--validation", default=get_validation_mode().value, help="full, sampled or off.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="JSON file of earlier results to compare with.")
+    args = parser.parse_args(argv)
+
+    set_validation_mode(args.validation)
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run(names, sorted(args.sizes), args.repeat, args.seed)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "validation": args.validation,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
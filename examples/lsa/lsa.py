@@ -2,13 +2,11 @@ from collections import defaultdict
 from typing import Callable, Tuple
 
 from pycct import (
-    _FST,
     DoublePushoutRule,
     FinGraphMorphism,
     FinGraphObject,
-    FinSetMorphism,
-    FinSetObject,
     double_pushout,
+    fingraph_from_arrays,
     fingraph_pullback,
     fingraph_pushout_complement,
 )
@@ -20,63 +18,31 @@ SUCCESSOR_NODE_FMT = "S_{0}_{1}"
 SUCCESSOR_EDGE_FMT = "S_{0}_{1}_{2}"
 
 
-def edge_source(e: _FST) -> _FST:
-    edge_parts = e.split("_")
-    if edge_parts[0] == BEGIN_NODE_FMT[0]:
-        # B_x_y -> B_x
-        return BEGIN_NODE_FMT.format(edge_parts[1])
-    elif edge_parts[0] == SUCCESSOR_NODE_FMT[0]:
-        # S_x_y_z
-        if edge_parts[2] == "0":
-            # S_x_0_z -> B_x
-            return BEGIN_NODE_FMT.format(edge_parts[1])
-        else:
-            # S_x_y_z -> S_x_y
-            return SUCCESSOR_NODE_FMT.format(edge_parts[1], edge_parts[2])
-    else:
-        raise Exception
-
-
-def edge_target(e: _FST) -> _FST:
-    edge_parts = e.split("_")
-    if edge_parts[0] == BEGIN_NODE_FMT[0]:
-        # B_x_y -> B_y
-        return BEGIN_NODE_FMT.format(edge_parts[2])
-    elif edge_parts[0] == SUCCESSOR_NODE_FMT[0]:
-        # S_x_y_z -> S_x_z
-        return SUCCESSOR_NODE_FMT.format(edge_parts[1], edge_parts[3])
-    else:
-        raise Exception
-
-
 def str_to_peano_tree(x: str) -> FinGraphObject:
     nodes = []
     edges = []
+    sources = []
+    targets = []
 
     prev = None
     for i, char in enumerate(x):
-        begin_node = BEGIN_NODE_FMT.format(i)
-        nodes.append(begin_node)
+        begin = len(nodes)
+        nodes.append(BEGIN_NODE_FMT.format(i))
         if prev is not None:
-            edge = BEGIN_EDGE_FMT.format(i - 1, i)
-            edges.append(edge)
-        prev = begin_node
+            edges.append(BEGIN_EDGE_FMT.format(i - 1, i))
+            sources.append(prev)
+            targets.append(begin)
+        prev = begin
 
         num_successors = ord(str.lower(char)) - ord("a")
         for j in range(1, num_successors + 1):
-            node = SUCCESSOR_NODE_FMT.format(i, j)
-            edge = SUCCESSOR_EDGE_FMT.format(i, 0 if j == 1 else j - 1, j)
-            nodes.append(node)
-            edges.append(edge)
-
-    nodes_obj = FinSetObject(nodes)
-    edges_obj = FinSetObject(edges)
-    return FinGraphObject(
-        nodes_obj,
-        edges_obj,
-        FinSetMorphism(edges_obj, nodes_obj, edge_source),
-        FinSetMorphism(edges_obj, nodes_obj, edge_target),
-    )
+            # S_i_1 hangs off C_i, and S_i_j off S_i_(j-1).
+            edges.append(SUCCESSOR_EDGE_FMT.format(i, 0 if j == 1 else j - 1, j))
+            sources.append(begin if j == 1 else len(nodes) - 1)
+            targets.append(len(nodes))
+            nodes.append(SUCCESSOR_NODE_FMT.format(i, j))
+
+    return fingraph_from_arrays(sources, targets, node_labels=nodes, edge_labels=edges)
 
 
 def peano_tree_to_str(x: FinGraphObject) -> str:
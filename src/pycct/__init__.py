@@ -1,27 +1,84 @@
-from .dpo import DoublePushoutRule, double_pushout
+from .dpo import (
+    CompiledRule,
+    DoublePushoutRule,
+    FreshLabel,
+    RewriteDelta,
+    are_parallel_independent,
+    double_pushout,
+    double_pushout_edit,
+    double_pushout_incremental,
+    double_pushout_many,
+    double_pushout_matches,
+    match_footprint,
+    satisfies_gluing_condition,
+)
+from .encoding import (
+    FinGraphEncoding,
+    FinGraphMorphismEncoding,
+    fingraph_decode,
+    fingraph_encode,
+    fingraph_from_adjacency,
+    fingraph_from_arrays,
+    fingraph_morphism_decode,
+    fingraph_morphism_encode,
+    fingraph_parse_edge_list,
+    fingraph_read_edge_list,
+)
 from .fingraph import (
     FinGraphMorphism,
     FinGraphObject,
     fingraph_coequalizer,
     fingraph_coproduct,
+    fingraph_edit,
     fingraph_equalizer,
     fingraph_inclusion,
+    fingraph_memoize,
     fingraph_product,
     fingraph_pullback,
     fingraph_pushout,
     fingraph_pushout_complement,
+    fingraph_relabel,
 )
 from .finset import (
     _FST,
+    FinSetMemoMorphism,
     FinSetMorphism,
     FinSetObject,
+    FinSetTableMorphism,
     finset_coequalizer,
     finset_composition,
     finset_coproduct,
     finset_equalizer,
+    finset_fibers,
+    finset_memoize,
     finset_product,
     finset_pullback,
+    finset_pullback_pairs,
     finset_pushout,
     finset_pushout_complement,
+    finset_relabel,
+    finset_tabulate,
     is_injective,
 )
+from .indexed_finset import (
+    IndexedFinSetMorphism,
+    IndexedFinSetObject,
+    indexed_finset,
+    indexed_finset_coequalizer,
+    indexed_finset_composition,
+    indexed_finset_coproduct,
+    indexed_finset_equalizer,
+    indexed_finset_identity,
+    indexed_finset_morphism,
+    indexed_finset_morphism_to_finset,
+    indexed_finset_product,
+    indexed_finset_pullback,
+    indexed_finset_pushout,
+    indexed_finset_to_finset,
+)
+from .instrumentation import ConstructionRecord, Instrumentation, instrument
+from .mapped import MappedFinGraph, fingraph_save
+from .match import MatchPlan, find_match_maps, find_matches, find_matches_parallel, match_morphism, match_plan
+from .rewriting import MatchStore, RewriteStrategy, RewritingSystem
+from .serialization import deserialize, register_pickling, serialize
+from .validation import ValidationMode, get_validation_mode, set_validation_mode, validation_mode
@@ -0,0 +1,74 @@
+from array import array
+from typing import Iterable, Sequence, Tuple
+
+
+INDEX_TYPECODE = "q"
+
+
+def index_array(values: object = ()) -> "array[int]":
+    return array(INDEX_TYPECODE, values)  # type: ignore
+
+
+def as_index_array(values: object) -> "array[int]":
+    """values as an index array, copied in bulk from a one-dimensional buffer of integers such as a NumPy array."""
+    if isinstance(values, array) and values.typecode == INDEX_TYPECODE:
+        return values
+    try:
+        view = memoryview(values)  # type: ignore
+    except TypeError:
+        return index_array(values)
+    assert view.ndim == 1, "expected a one-dimensional array"
+    result = index_array()
+    if view.format.lstrip("@=") in ("q", "l") and view.itemsize == 8 and view.c_contiguous:
+        result.frombytes(view.cast("B"))
+    else:
+        result.fromlist(view.tolist())
+    return result
+
+
+def union_find(size: int, equivalences: Iterable[Tuple[int, int]]) -> Tuple["array[int]", int]:
+    """Dense class ids 0..num_classes-1 for 0..size-1 under the given (x, y) equivalences.
+
+    Roots are kept in a flat array of parents, with path halving on every find.
+    """
+    parents = index_array(range(size))
+    for x, y in equivalences:
+        while parents[x] != x:
+            parents[x] = parents[parents[x]]
+            x = parents[x]
+        while parents[y] != y:
+            parents[y] = parents[parents[y]]
+            y = parents[y]
+        if x != y:
+            parents[max(x, y)] = min(x, y)
+
+    # Roots are the smallest element of their class, so a single ascending pass flattens every path.
+    classes = index_array(bytes(8 * size))
+    num_classes = 0
+    for x in range(size):
+        parent = parents[x]
+        if parent == x:
+            classes[x] = num_classes
+            num_classes += 1
+        else:
+            classes[x] = classes[parent]
+    return classes, num_classes
+
+
+def csr_index(keys: Sequence[int], size: int) -> Tuple["array[int]", "array[int]"]:
+    """Positions 0..len(keys)-1 grouped by their key in 0..size-1, in compressed sparse row form.
+
+    The positions with key k are values[offsets[k] : offsets[k + 1]], in increasing order.
+    """
+    offsets = index_array(bytes(8 * (size + 1)))
+    for k in keys:
+        offsets[k + 1] += 1
+    for k in range(size):
+        offsets[k + 1] += offsets[k]
+
+    next_positions = offsets[:-1]
+    values = index_array(bytes(8 * len(keys)))
+    for i, k in enumerate(keys):
+        values[next_positions[k]] = i
+        next_positions[k] += 1
+    return offsets, values
@@ -1,18 +1,104 @@
-from dataclasses import dataclass
-from typing import Callable, Generic, TypeVar
+from dataclasses import FrozenInstanceError, dataclass, fields
+from typing import Any, Callable, Dict, Generic, Type, TypeVar, cast
 
 
 class Object:
-    pass
+    __slots__ = ()
 
 
 class Morphism:
+    __slots__ = ()
+
     dom: Object
     cod: Object
 
 
+_T = TypeVar("_T")
 _OT = TypeVar("_OT", bound=Object)
 _MT = TypeVar("_MT", bound=Morphism)
+_C = TypeVar("_C", bound=type)
+
+
+class Deferred(Generic[_T]):
+    """Value of a field computed on its first access, for fields that are costly to build and often unused."""
+
+    __slots__ = ("thunk",)
+
+    def __init__(self, thunk: Callable[[], _T]) -> None:
+        self.thunk = thunk
+
+
+def deferred(thunk: Callable[[], _T]) -> _T:
+    """Deferred value of a deferrable field. It is typed as the value itself, since every read of the field, through
+    its _DeferrableField, returns the value."""
+    return cast(_T, Deferred(thunk))
+
+
+class _DeferrableField:
+    """Slot of a field that, holding a Deferred, is replaced by its value on first access."""
+
+    __slots__ = ("slot",)
+
+    def __init__(self, slot: Any) -> None:
+        self.slot = slot
+
+    def __get__(self, instance: Any, owner: Any = None) -> Any:
+        if instance is None:
+            return self
+        value = self.slot.__get__(instance, owner)
+        if type(value) is Deferred:
+            value = value.thunk()
+            self.slot.__set__(instance, value)
+        return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        self.slot.__set__(instance, value)
+
+    def __delete__(self, instance: Any) -> None:
+        self.slot.__delete__(instance)
+
+
+def _slotted_getstate(self: Any) -> Dict[str, Any]:
+    return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def _slotted_setstate(self: Any, state: Dict[str, Any]) -> None:
+    for name, value in state.items():
+        object.__setattr__(self, name, value)
+
+
+def _frozen_setattr(self: Any, name: str, value: Any) -> None:
+    raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+
+def _frozen_delattr(self: Any, name: str) -> None:
+    raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+
+def slotted(cls: _C) -> _C:
+    """Copy of the dataclass cls storing its new fields in __slots__ rather than a per-instance __dict__, for generic
+    classes. dataclass(slots=True) does the same, but its frozen __setattr__ calls super() with the original class,
+    which fails when a subscripted alias such as PushoutCoCone[...] sets __orig_class__ on a new instance. Methods of
+    cls must not use the zero argument super(), and fields with init=False are set in __post_init__ rather than given
+    a default."""
+    inherited = {name for base in cls.__mro__[1:] for name in getattr(base, "__slots__", ())}
+    cls_dict = dict(vars(cls))
+    names = tuple(f.name for f in fields(cls) if f.name not in inherited)
+    for name in names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    cls_dict["__slots__"] = names
+    # The generated __setattr__ and __delattr__ refer to cls, so are replaced. Without a __dict__ there is nothing
+    # but the fields to assign, and frozen instances are unpickled through object.__setattr__.
+    if cls.__dataclass_params__.frozen:  # type: ignore
+        cls_dict["__setattr__"] = _frozen_setattr
+        cls_dict["__delattr__"] = _frozen_delattr
+    cls_dict["__getstate__"] = _slotted_getstate
+    cls_dict["__setstate__"] = _slotted_setstate
+    slotted_cls: Type[Any] = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls  # type: ignore
 
 
 @dataclass(frozen=True, repr=False)
@@ -23,17 +109,33 @@ class Category(Generic[_OT, _MT]):
     composition: Callable[[_MT, _MT], _MT]
 
 
+def deferrable(*names: str) -> Callable[[_C], _C]:
+    """Let the slotted dataclass be built with Deferred values of the named fields, by default all those it declares,
+    see Deferred."""
+
+    def deferrable_(cls: _C) -> _C:
+        for name in names or vars(cls)["__slots__"]:
+            setattr(cls, name, _DeferrableField(vars(cls)[name]))
+        return cls
+
+    return deferrable_
+
+
+@slotted
 @dataclass(frozen=True, repr=False)
 class InitialObject(Generic[_OT, _MT]):
     value: _OT
     univ: Callable[[_OT], _MT]
 
 
+@slotted
 @dataclass(frozen=True, repr=False)
 class TerminalObject(InitialObject[_OT, _MT]):
     pass
 
 
+@deferrable()
+@slotted
 @dataclass(frozen=True, repr=False)
 class CoProductCoCone(Generic[_OT, _MT]):
     apex: _OT
@@ -42,11 +144,15 @@ class CoProductCoCone(Generic[_OT, _MT]):
     univ: Callable[[_MT, _MT], _MT]
 
 
+@deferrable()
+@slotted
 @dataclass(frozen=True, repr=False)
 class ProductCone(CoProductCoCone[_OT, _MT]):
     pass
 
 
+@deferrable()
+@slotted
 @dataclass(frozen=True, repr=False)
 class CoEqualizerCoCone(Generic[_OT, _MT]):
     apex: _OT
@@ -54,11 +160,15 @@ class CoEqualizerCoCone(Generic[_OT, _MT]):
     univ: Callable[[_MT], _MT]
 
 
+@deferrable()
+@slotted
 @dataclass(frozen=True, repr=False)
 class EqualizerCone(CoEqualizerCoCone[_OT, _MT]):
     pass
 
 
+@deferrable()
+@slotted
 @dataclass(frozen=True, repr=False)
 class PushoutCoCone(Generic[_OT, _MT]):
     apex: _OT
@@ -67,6 +177,8 @@ class PushoutCoCone(Generic[_OT, _MT]):
     univ: Callable[[_MT, _MT], _MT]
 
 
+@deferrable()
+@slotted
 @dataclass(frozen=True, repr=False)
 class PullbackCone(PushoutCoCone[_OT, _MT]):
     pass
@@ -1,6 +1,20 @@
+from collections import Counter
 from dataclasses import dataclass
+from functools import cached_property
+from itertools import chain, count
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Literal, Optional, Sequence, Set, Tuple, Union, overload
 
-from .fingraph import FinGraphMorphism, FinGraphObject, fingraph_pushout, fingraph_pushout_complement
+from .fingraph import (
+    FinGraphMorphism,
+    FinGraphObject,
+    fingraph_edit,
+    fingraph_pushout,
+    fingraph_relabel,
+)
+from .finset import _FST, FinSetMorphism, FinSetTableMorphism, is_injective
+from .instrumentation import instrumented
+from .match import MatchPlan, find_matches, match_plan
+from .validation import trusted
 
 
 @dataclass(eq=False, frozen=True, repr=False)
@@ -11,8 +25,340 @@ class DoublePushoutRule:
     def __post_init__(self) -> None:
         assert self.precondition_map.dom == self.postcondition_map.dom
 
+    def compile(self) -> "CompiledRule":
+        """The parts of applying the rule that do not depend on the match, worked out on the first call only."""
+        return self._compiled
 
-def double_pushout(rule: DoublePushoutRule, before: FinGraphObject, match: FinGraphMorphism) -> FinGraphObject:
-    _, condition_to_context, _ = fingraph_pushout_complement(rule.precondition_map, match, before)
-    after_pushout = fingraph_pushout(rule.postcondition_map, condition_to_context)
-    return after_pushout.apex
+    @cached_property
+    def _compiled(self) -> "CompiledRule":
+        return _compile(self)
+
+
+@dataclass(frozen=True, repr=False)
+class CompiledRule:
+    """Deletion, creation and gluing tables and match plan of a rule, shared by all of its applications."""
+
+    rule: DoublePushoutRule
+    plan: MatchPlan
+    # Whether the precondition map is injective, as incremental rewrites require.
+    injective: bool
+    # Left hand side nodes and edges in the image of the precondition map, and the others, which are deleted.
+    preserved_nodes: Tuple[_FST, ...]
+    preserved_edges: Tuple[_FST, ...]
+    deleted_nodes: Tuple[_FST, ...]
+    deleted_edges: Tuple[_FST, ...]
+    # Per deleted node, its out- and in-degree.
+    deleted_degrees: Tuple[Tuple[_FST, int, int], ...]
+    # Per interface node and edge, its images in the right and left hand sides.
+    node_gluing: Tuple[Tuple[_FST, _FST], ...]
+    edge_gluing: Tuple[Tuple[_FST, _FST], ...]
+    # Right hand side nodes, and edges with their source and target, not in the image of the postcondition map.
+    created_nodes: Tuple[_FST, ...]
+    created_edges: Tuple[Tuple[_FST, _FST, _FST], ...]
+
+    def satisfies_gluing_condition(self, match: FinGraphMorphism) -> bool:
+        """Whether the rule can be applied at match, i.e. the pushout complement exists."""
+        node_map, host = match.node_map, match.cod
+        if not (
+            _identifies_only_preserved(self.preserved_nodes, self.deleted_nodes, node_map)
+            and _identifies_only_preserved(self.preserved_edges, self.deleted_edges, match.edge_map)
+        ):
+            return False
+
+        # Dangling condition: edges incident to deleted nodes are deleted too. The edges incident to a deleted node
+        # are deleted with it and kept apart by match, so this holds iff the host node has no other edges.
+        return all(
+            host.out_degree(node_map(n)) == out_degree and host.in_degree(node_map(n)) == in_degree
+            for n, out_degree, in_degree in self.deleted_degrees
+        )
+
+
+def _split(m: FinSetMorphism) -> Tuple[Tuple[_FST, ...], Tuple[_FST, ...]]:
+    """Elements of the codomain of m in its image, and the others."""
+    image = frozenset(map(m, m.dom))
+    return tuple(x for x in m.cod if x in image), tuple(x for x in m.cod if x not in image)
+
+
+def _compile(rule: DoublePushoutRule) -> CompiledRule:
+    l, r = rule.precondition_map, rule.postcondition_map
+    preserved_nodes, deleted_nodes = _split(l.node_map)
+    preserved_edges, deleted_edges = _split(l.edge_map)
+    _, created_nodes = _split(r.node_map)
+    _, created_edges = _split(r.edge_map)
+    return CompiledRule(
+        rule,
+        match_plan(l.cod),
+        is_injective(l.node_map) and is_injective(l.edge_map),
+        preserved_nodes,
+        preserved_edges,
+        deleted_nodes,
+        deleted_edges,
+        tuple((n, l.cod.out_degree(n), l.cod.in_degree(n)) for n in deleted_nodes),
+        tuple((r.node_map(k), l.node_map(k)) for k in l.dom.nodes),
+        tuple((r.edge_map(k), l.edge_map(k)) for k in l.dom.edges),
+        created_nodes,
+        tuple((e, r.cod._source_map[e], r.cod._target_map[e]) for e in created_edges),
+    )
+
+
+def _identifies_only_preserved(preserved: Sequence[_FST], deleted: Sequence[_FST], match: FinSetMorphism) -> bool:
+    """Identification condition: match only identifies preserved elements, so deleted ones have their own images."""
+    deleted_images = frozenset(map(match, deleted))
+    return len(deleted_images) == len(deleted) and deleted_images.isdisjoint(map(match, preserved))
+
+
+def satisfies_gluing_condition(rule: DoublePushoutRule, match: FinGraphMorphism) -> bool:
+    """Whether rule can be applied at match, i.e. the pushout complement exists."""
+    return rule.compile().satisfies_gluing_condition(match)
+
+
+def double_pushout_matches(
+    rule: DoublePushoutRule, host: FinGraphObject, injective: bool = True, plan: Optional[MatchPlan] = None
+) -> Iterator[FinGraphMorphism]:
+    """Lazily enumerate the matches of the rule's left hand side in host at which the rule can be applied."""
+    compiled = rule.compile()
+    for match in find_matches(rule.precondition_map.cod, host, injective, plan or compiled.plan):
+        if compiled.satisfies_gluing_condition(match):
+            yield match
+
+
+@dataclass(frozen=True)
+class FreshLabel:
+    """Label of an element created by an incremental rewrite, unique within the process."""
+
+    origin: _FST
+    uid: int
+
+
+_fresh_uids = count()
+
+
+def _reserve_fresh_uids(uid: int) -> None:
+    """Give later FreshLabels uids above uid, so they stay unique alongside labels loaded from elsewhere."""
+    global _fresh_uids
+    _fresh_uids = count(max(next(_fresh_uids), uid + 1))
+
+
+@dataclass(frozen=True, repr=False)
+class RewriteDelta:
+    """Host elements deleted and added by a rewrite. An edge moved to new endpoints is both deleted and added."""
+
+    deleted_nodes: FrozenSet[_FST]
+    deleted_edges: FrozenSet[_FST]
+    added_nodes: FrozenSet[_FST]
+    added_edges: FrozenSet[_FST]
+
+
+def _merged(
+    applications: Sequence[Tuple[Sequence[Tuple[_FST, _FST]], FinSetMorphism]]
+) -> Tuple[List[Dict[_FST, _FST]], Dict[_FST, _FST]]:
+    """Per (gluing table, match), host images of the right hand side elements glued to the context, and host elements
+    merged into others."""
+    parents: Dict[_FST, _FST] = {}
+
+    def find(x: _FST) -> _FST:
+        while x in parents:
+            x = parents[x]
+        return x
+
+    all_first_images: List[Dict[_FST, _FST]] = []
+    for gluing, match in applications:
+        first_images: Dict[_FST, _FST] = {}
+        for x, l_x in gluing:
+            host_x = match(l_x)
+            root, other_root = find(first_images.setdefault(x, host_x)), find(host_x)
+            if root != other_root:
+                parents[other_root] = root
+        all_first_images.append(first_images)
+
+    glued = [{x: find(host_x) for x, host_x in first_images.items()} for first_images in all_first_images]
+    return glued, {host_x: find(host_x) for host_x in parents}
+
+
+def match_footprint(
+    rule: DoublePushoutRule, match: FinGraphMorphism
+) -> Tuple[FrozenSet[Tuple[int, _FST]], FrozenSet[Tuple[int, _FST]]]:
+    """Host nodes and edges, tagged 0 and 1, in the image of match, and those of them deleted by the rule."""
+    compiled = rule.compile()
+    node_image = frozenset(map(match.node_map, chain(compiled.preserved_nodes, compiled.deleted_nodes)))
+    edge_image = frozenset(map(match.edge_map, chain(compiled.preserved_edges, compiled.deleted_edges)))
+    deleted_nodes = frozenset(map(match.node_map, compiled.deleted_nodes))
+    deleted_edges = frozenset(map(match.edge_map, compiled.deleted_edges))
+    image = frozenset((0, n) for n in node_image).union((1, e) for e in edge_image)
+    return image, frozenset((0, n) for n in deleted_nodes).union((1, e) for e in deleted_edges)
+
+
+def are_parallel_independent(rule: DoublePushoutRule, matches: Iterable[FinGraphMorphism]) -> bool:
+    """Whether the matches pairwise overlap only in elements the rule preserves, so they can be rewritten at once."""
+    images: Counter[Tuple[int, _FST]] = Counter()
+    deleted: List[Tuple[int, _FST]] = []
+    for match in matches:
+        image, match_deleted = match_footprint(rule, match)
+        images.update(image)
+        deleted.extend(match_deleted)
+    return all(images[x] == 1 for x in deleted)
+
+
+@instrumented
+@trusted
+def double_pushout_edit(
+    before: FinGraphObject, applications: Sequence[Tuple[DoublePushoutRule, FinGraphMorphism]]
+) -> Tuple[FinGraphObject, RewriteDelta]:
+    """Apply each rule at its match, the matches being parallel independent, with a single edit of before, as in
+    double_pushout_incremental. Returns the result and what changed."""
+    compiled = [(rule.compile(), match) for rule, match in applications]
+    deleted_nodes: Set[_FST] = set()
+    deleted_edges: Set[_FST] = set()
+    for rule, match in compiled:
+        assert match.dom == rule.rule.precondition_map.cod
+        assert rule.injective
+        assert rule.satisfies_gluing_condition(match)
+        deleted_nodes.update(map(match.node_map, rule.deleted_nodes))
+        deleted_edges.update(map(match.edge_map, rule.deleted_edges))
+
+    # Host elements identified by a non-injective postcondition map are merged into a representative.
+    all_node_images, merged_nodes = _merged([(rule.node_gluing, match.node_map) for rule, match in compiled])
+    _, merged_edges = _merged([(rule.edge_gluing, match.edge_map) for rule, match in compiled])
+    deleted_nodes.update(merged_nodes)
+    deleted_edges.update(merged_edges)
+
+    added_nodes: Set[_FST] = set()
+    added_edges: Dict[_FST, Tuple[_FST, _FST]] = {}
+    for (rule, _), node_images in zip(compiled, all_node_images):
+        for x in rule.created_nodes:
+            node_images[x] = FreshLabel(x, next(_fresh_uids))
+            added_nodes.add(node_images[x])
+        for e, s, t in rule.created_edges:
+            added_edges[FreshLabel(e, next(_fresh_uids))] = (node_images[s], node_images[t])
+    for n in merged_nodes:
+        for e in before.incident_edges(n):
+            if e in deleted_edges:
+                continue
+            s, t = before._source_map[e], before._target_map[e]
+            deleted_edges.add(e)
+            added_edges[e] = (merged_nodes.get(s, s), merged_nodes.get(t, t))
+
+    after = fingraph_edit(before, frozenset(deleted_nodes), frozenset(deleted_edges), added_nodes, added_edges)
+    return after, RewriteDelta(
+        frozenset(deleted_nodes), frozenset(deleted_edges), frozenset(added_nodes), frozenset(added_edges)
+    )
+
+
+@instrumented
+@trusted
+def double_pushout_incremental(
+    rule: DoublePushoutRule, before: FinGraphObject, match: FinGraphMorphism
+) -> Tuple[FinGraphObject, RewriteDelta]:
+    """Apply rule at match by editing only the matched part of before.
+
+    The result is isomorphic to the double pushout, but elements of before outside the match keep their labels and
+    elements created by the rule are labelled with a FreshLabel. The first rewrite of a graph copies its tables, but
+    the result is a version of before (see fingraph_edit), so later rewrites of it do work in proportion to the size
+    of the rule and the degree of the deleted or merged nodes.
+    """
+    return double_pushout_edit(before, ((rule, match),))
+
+
+@overload
+def double_pushout_many(
+    rule: DoublePushoutRule,
+    before: FinGraphObject,
+    matches: Iterable[FinGraphMorphism],
+    relabel: Literal[False] = False,
+) -> FinGraphObject:
+    ...
+
+
+@overload
+def double_pushout_many(
+    rule: DoublePushoutRule, before: FinGraphObject, matches: Iterable[FinGraphMorphism], relabel: Literal[True]
+) -> Tuple[FinGraphObject, FinGraphMorphism]:
+    ...
+
+
+@instrumented
+@trusted
+def double_pushout_many(
+    rule: DoublePushoutRule, before: FinGraphObject, matches: Iterable[FinGraphMorphism], relabel: bool = False
+) -> Union[FinGraphObject, Tuple[FinGraphObject, FinGraphMorphism]]:
+    """Apply rule at all of the parallel independent matches at once.
+
+    The result is the same as applying the rule at each match in turn, but the host is edited once, as in
+    double_pushout_incremental. With relabel, the result is returned with flat labels, as in double_pushout.
+    """
+    matches = tuple(matches)
+    assert are_parallel_independent(rule, matches)
+    after, _ = double_pushout_edit(before, [(rule, match) for match in matches])
+    if not relabel:
+        return after
+    renaming = fingraph_relabel(after)
+    return renaming.cod, renaming
+
+
+@overload
+def double_pushout(
+    rule: DoublePushoutRule,
+    before: FinGraphObject,
+    match: FinGraphMorphism,
+    incremental: bool = False,
+    relabel: Literal[False] = False,
+) -> FinGraphObject:
+    ...
+
+
+@overload
+def double_pushout(
+    rule: DoublePushoutRule,
+    before: FinGraphObject,
+    match: FinGraphMorphism,
+    incremental: bool = False,
+    *,
+    relabel: Literal[True],
+) -> Tuple[FinGraphObject, FinGraphMorphism]:
+    ...
+
+
+@instrumented
+@trusted
+def double_pushout(
+    rule: DoublePushoutRule,
+    before: FinGraphObject,
+    match: FinGraphMorphism,
+    incremental: bool = False,
+    relabel: bool = False,
+) -> Union[FinGraphObject, Tuple[FinGraphObject, FinGraphMorphism]]:
+    """Apply rule at match.
+
+    With relabel, the result has flat labels (see fingraph_relabel) instead of nested ones, and is returned with the
+    renaming from the labels it would otherwise have had to the flat ones.
+    """
+    if incremental:
+        after, _ = double_pushout_incremental(rule, before, match)
+        if not relabel:
+            return after
+        renaming = fingraph_relabel(after)
+        return renaming.cod, renaming
+
+    # The pushout complement of the match is before less the deleted elements, found from the compiled rule.
+    compiled = rule.compile()
+    assert match.cod == before
+    assert compiled.injective and compiled.satisfies_gluing_condition(match)
+    node_map, edge_map = match.node_map, match.edge_map
+    context = fingraph_edit(
+        before,
+        frozenset(map(node_map, compiled.deleted_nodes)),
+        frozenset(map(edge_map, compiled.deleted_edges)),
+        set(),
+        {},
+    )
+    l, condition = rule.precondition_map, rule.precondition_map.dom
+    condition_to_context = FinGraphMorphism(
+        condition,
+        context,
+        FinSetTableMorphism(condition.nodes, context.nodes, {k: node_map(l.node_map(k)) for k in condition.nodes}),
+        FinSetTableMorphism(condition.edges, context.edges, {k: edge_map(l.edge_map(k)) for k in condition.edges}),
+    )
+    if not relabel:
+        return fingraph_pushout(rule.postcondition_map, condition_to_context).apex
+    after_pushout, renaming = fingraph_pushout(rule.postcondition_map, condition_to_context, relabel=True)
+    return after_pushout.apex, renaming
@@ -0,0 +1,207 @@
+from dataclasses import dataclass, field
+from itertools import chain, repeat
+from operator import itemgetter
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .arrays import as_index_array, index_array
+from .fingraph import FinGraphMorphism, FinGraphObject
+from .finset import _FST, FinSetObject, FinSetTableMorphism
+from .validation import trusted, validation_enabled
+
+
+@dataclass(frozen=True, repr=False)
+class FinGraphEncoding:
+    """FinGraphObject on the dense integers, with nodes 0..len(node_labels)-1 and edges 0..len(edge_labels)-1.
+
+    Edge e runs from source[e] to target[e]. Unlike the graph, whose morphisms may be closures, it can be pickled and
+    is cheap to ship to another process. The integer sequences are arrays, or memoryviews when loaded without copying
+    (see deserialize).
+    """
+
+    node_labels: Sequence[_FST] = field(hash=False)
+    edge_labels: Sequence[_FST] = field(hash=False)
+    source: Sequence[int] = field(hash=False)
+    target: Sequence[int] = field(hash=False)
+
+    def __post_init__(self) -> None:
+        assert len(self.source) == len(self.target) == len(self.edge_labels)
+
+    @property
+    def node_index(self) -> Dict[_FST, int]:
+        return {n: i for i, n in enumerate(self.node_labels)}
+
+    @property
+    def edge_index(self) -> Dict[_FST, int]:
+        return {e: i for i, e in enumerate(self.edge_labels)}
+
+    @trusted
+    def graph(self) -> FinGraphObject:
+        """The encoded graph, labelled by the integers rather than node_labels and edge_labels."""
+        nodes = FinSetObject(range(len(self.node_labels)))
+        edges = FinSetObject(range(len(self.edge_labels)))
+        return FinGraphObject(
+            nodes,
+            edges,
+            FinSetTableMorphism(edges, nodes, dict(enumerate(self.source))),
+            FinSetTableMorphism(edges, nodes, dict(enumerate(self.target))),
+        )
+
+
+def _labels(a: FinSetObject) -> Sequence[_FST]:
+    labels = tuple(a)
+    # Labels that are already 0..n-1 in order are kept as a range, which pickles in constant size.
+    if all(type(x) is int and x == i for i, x in enumerate(labels)):
+        return range(len(labels))
+    return labels
+
+
+def fingraph_encode(a: FinGraphObject) -> FinGraphEncoding:
+    """Encoding of a, numbering its nodes and edges in iteration order."""
+    node_labels, edge_labels = _labels(a.nodes), _labels(a.edges)
+    node_index = {n: i for i, n in enumerate(node_labels)}
+    source_map, target_map = a._source_map, a._target_map
+    return FinGraphEncoding(
+        node_labels,
+        edge_labels,
+        index_array(node_index[source_map[e]] for e in edge_labels),
+        index_array(node_index[target_map[e]] for e in edge_labels),
+    )
+
+
+@trusted
+def fingraph_decode(a: FinGraphEncoding) -> FinGraphObject:
+    """The encoded graph, labelled by node_labels and edge_labels."""
+    node_labels, edge_labels = a.node_labels, a.edge_labels
+    nodes, edges = FinSetObject(node_labels), FinSetObject(edge_labels)
+    source: Iterable[_FST]
+    target: Iterable[_FST]
+    if node_labels == range(len(node_labels)):
+        source, target = a.source, a.target
+    else:
+        source, target = map(node_labels.__getitem__, a.source), map(node_labels.__getitem__, a.target)
+    return FinGraphObject(
+        nodes,
+        edges,
+        FinSetTableMorphism(edges, nodes, dict(zip(edge_labels, source))),
+        FinSetTableMorphism(edges, nodes, dict(zip(edge_labels, target))),
+    )
+
+
+def _distinct(labels: Sequence[_FST]) -> bool:
+    return isinstance(labels, range) or not validation_enabled() or len(set(labels)) == len(labels)
+
+
+def fingraph_from_arrays(
+    source: Sequence[int],
+    target: Sequence[int],
+    node_labels: Optional[Sequence[_FST]] = None,
+    edge_labels: Optional[Sequence[_FST]] = None,
+    num_nodes: Optional[int] = None,
+) -> FinGraphObject:
+    """Graph with edge i from node source[i] to node target[i], given as integer sequences or buffers such as NumPy
+    arrays. Nodes are the integers 0..num_nodes-1 (by default up to the largest endpoint), or node_labels at those
+    positions, and edges the integers 0..len(source)-1 or edge_labels.
+
+    The tables of the graph are built in bulk, with no call per edge.
+    """
+    source, target = as_index_array(source), as_index_array(target)
+    assert len(source) == len(target)
+    if node_labels is None:
+        if num_nodes is None:
+            num_nodes = max(max(source, default=-1), max(target, default=-1)) + 1
+        node_labels = range(num_nodes)
+    else:
+        assert num_nodes is None or num_nodes == len(node_labels)
+    edge_labels = range(len(source)) if edge_labels is None else edge_labels
+    assert _distinct(node_labels) and _distinct(edge_labels), "labels must be distinct"
+    if source:
+        # Negative indices would silently wrap around node_labels.
+        assert min(min(source), min(target)) >= 0 and max(max(source), max(target)) < len(node_labels)
+    return fingraph_decode(FinGraphEncoding(node_labels, edge_labels, source, target))
+
+
+def _from_labelled_edges(sources: List[_FST], targets: List[_FST], nodes: Iterable[_FST] = ()) -> FinGraphObject:
+    # Nodes in order of first appearance, numbered by a dict built and read without a Python call per edge.
+    node_labels = tuple(dict.fromkeys(chain(nodes, chain.from_iterable(zip(sources, targets)))))
+    node_index = dict(zip(node_labels, range(len(node_labels))))
+    return fingraph_from_arrays(
+        index_array(map(node_index.__getitem__, sources)),
+        index_array(map(node_index.__getitem__, targets)),
+        node_labels=node_labels,
+    )
+
+
+def fingraph_parse_edge_list(text: str, int_labels: bool = False) -> FinGraphObject:
+    """Graph of an edge list, one edge per line as whitespace separated source and target node labels (any further
+    columns are ignored). Blank lines and lines starting with # are skipped.
+
+    Edges are numbered 0, 1, ... in order, and nodes are the labels that occur, as strings or with int_labels ints.
+    """
+    lines: Iterable[str] = text.splitlines()
+    if "#" in text:
+        lines = [line for line in lines if not line.lstrip().startswith("#")]
+    rows = list(filter(None, map(str.split, lines)))
+    assert min(map(len, rows), default=2) >= 2, "every edge needs a source and a target"
+    sources, targets = list(map(itemgetter(0), rows)), list(map(itemgetter(1), rows))
+    if int_labels:
+        sources, targets = list(map(int, sources)), list(map(int, targets))
+    return _from_labelled_edges(sources, targets)
+
+
+def fingraph_read_edge_list(path: str, int_labels: bool = False) -> FinGraphObject:
+    """Graph of the edge list in the file at path, see fingraph_parse_edge_list."""
+    with open(path) as f:
+        return fingraph_parse_edge_list(f.read(), int_labels)
+
+
+def fingraph_from_adjacency(adjacency: Mapping[_FST, Iterable[_FST]]) -> FinGraphObject:
+    """Graph with an edge from each node of adjacency to each of its listed successors, repeated ones giving parallel
+    edges. Edges are numbered 0, 1, ... in order, and nodes are the keys followed by any other successors."""
+    successors: List[Tuple[_FST, ...]] = [tuple(s) for s in adjacency.values()]
+    sources: List[_FST] = list(chain.from_iterable(repeat(n, len(s)) for n, s in zip(adjacency, successors)))
+    return _from_labelled_edges(sources, list(chain.from_iterable(successors)), adjacency)
+
+
+@dataclass(frozen=True, repr=False)
+class FinGraphMorphismEncoding:
+    """FinGraphMorphism tabulated over its domain, mapping node i of dom to node_map[i] of cod and likewise edges."""
+
+    dom: FinGraphEncoding
+    cod: FinGraphEncoding
+    node_map: Sequence[int] = field(hash=False)
+    edge_map: Sequence[int] = field(hash=False)
+
+    def __post_init__(self) -> None:
+        assert len(self.node_map) == len(self.dom.node_labels) and len(self.edge_map) == len(self.dom.edge_labels)
+
+
+def fingraph_morphism_encode(
+    m: FinGraphMorphism, dom: Optional[FinGraphEncoding] = None, cod: Optional[FinGraphEncoding] = None
+) -> FinGraphMorphismEncoding:
+    """Encoding of m, evaluating it once over its domain. Encodings of m.dom and m.cod can be given to share them."""
+    dom = fingraph_encode(m.dom) if dom is None else dom
+    cod = fingraph_encode(m.cod) if cod is None else cod
+    node_index, edge_index = cod.node_index, cod.edge_index
+    node_map, edge_map = m.node_map, m.edge_map
+    return FinGraphMorphismEncoding(
+        dom,
+        cod,
+        index_array(node_index[node_map(n)] for n in dom.node_labels),
+        index_array(edge_index[edge_map(e)] for e in dom.edge_labels),
+    )
+
+
+@trusted
+def fingraph_morphism_decode(
+    m: FinGraphMorphismEncoding, dom: Optional[FinGraphObject] = None, cod: Optional[FinGraphObject] = None
+) -> FinGraphMorphism:
+    """The encoded morphism. Decodings of m.dom and m.cod can be given to share them."""
+    dom = fingraph_decode(m.dom) if dom is None else dom
+    cod = fingraph_decode(m.cod) if cod is None else cod
+    cod_node, cod_edge = m.cod.node_labels.__getitem__, m.cod.edge_labels.__getitem__
+    return FinGraphMorphism(
+        dom,
+        cod,
+        FinSetTableMorphism(dom.nodes, cod.nodes, dict(zip(m.dom.node_labels, map(cod_node, m.node_map)))),
+        FinSetTableMorphism(dom.edges, cod.edges, dict(zip(m.dom.edge_labels, map(cod_edge, m.edge_map)))),
+    )
@@ -1,5 +1,20 @@
+from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Dict, Tuple
+from functools import cached_property
+from typing import (
+    AbstractSet,
+    Any,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    overload,
+)
 
 from .base import (
     Category,
@@ -17,49 +32,229 @@ from .base import (
     Pushout,
     PushoutCoCone,
     TerminalObject,
+    deferred,
 )
 from .finset import (
     _FST,
+    FinSetMemoMorphism,
     FinSetMorphism,
     FinSetObject,
+    FinSetTableMorphism,
     finset_coequalizer,
     finset_composition,
     finset_coproduct,
     finset_equalizer,
     finset_identity,
     finset_inclusion,
+    finset_inverse,
+    finset_memoize,
     finset_product,
+    finset_pullback,
+    finset_pushout,
     finset_pushout_complement,
+    finset_relabel,
     nil_fn,
 )
+from .instrumentation import instrumented, times_validation
+from .validation import trusted, validation_enabled, validation_sample
+
+
+def _edge_map(edges: FinSetObject, m: FinSetMorphism) -> Dict[_FST, _FST]:
+    if isinstance(m, (FinSetTableMorphism, FinSetMemoMorphism)):
+        table = m.table
+        if isinstance(table, dict) and len(table) == len(edges):
+            return table
+    return {e: m(e) for e in edges}
+
+
+def _group_edges(nodes: Iterable[_FST], endpoint_map: Dict[_FST, _FST]) -> Dict[_FST, Tuple[_FST, ...]]:
+    grouped: Dict[_FST, List[_FST]] = {n: [] for n in nodes}
+    for e, n in endpoint_map.items():
+        grouped[n].append(e)
+    return {n: tuple(edges) for n, edges in grouped.items()}
+
+
+# The node table, source and target maps, and adjacency indexes of a graph, see fingraph_edit.
+_TABLES = ("_node_table", "_source_map", "_target_map", "_out_edges_index", "_in_edges_index", "_edges_between_index")
+_ABSENT = object()
+_HASH_MASK = (1 << 64) - 1
+
+
+def _node_hash(node: _FST) -> int:
+    return hash((0, node))
+
+
+def _edge_hash(edge: _FST, source: _FST, target: _FST) -> int:
+    return hash((1, edge, source, target))
 
 
 @dataclass(frozen=True, repr=False)
 class FinGraphObject(Object):
+    """Finite graph.
+
+    Graphs made by fingraph_edit are versions of the graph edited, sharing its tables: one version holds them, and
+    each of the others holds the changes that turn the tables of a neighbouring version into its own. A version
+    takes the tables over on use, applying the changes on the way from the version holding them. Its nodes, edges,
+    source and target are built on first use. Versions are not safe to use from several threads at once.
+    """
+
     nodes: FinSetObject
     edges: FinSetObject
     source: FinSetMorphism
     target: FinSetMorphism
+    _node_table: Collection[_FST] = field(init=False)
     _source_map: Dict[_FST, _FST] = field(init=False)
     _target_map: Dict[_FST, _FST] = field(init=False)
 
     def __post_init__(self) -> None:
-        object.__setattr__(self, "_source_map", {e: self.source(e) for e in self.edges})
-        object.__setattr__(self, "_target_map", {e: self.target(e) for e in self.edges})
+        object.__setattr__(self, "_node_table", self.nodes)
+        object.__setattr__(self, "_source_map", _edge_map(self.edges, self.source))
+        object.__setattr__(self, "_target_map", _edge_map(self.edges, self.target))
+
+    def __getattr__(self, name: str) -> Any:
+        # Only versions made by fingraph_edit lack fields, see the class docstring.
+        cached = vars(self)
+        if "_link" not in cached:
+            raise AttributeError(name)
+        if name in _TABLES[:3]:
+            _reroot(self)
+            return cached[name]
+        value: Any
+        if name == "nodes":
+            value = FinSetObject(self._node_table)
+        elif name == "edges":
+            value = FinSetObject(self._source_map)
+        elif name in ("source", "target"):
+            # Copied, as the maps are shared with the other versions.
+            value = trusted(FinSetTableMorphism)(self.edges, self.nodes, dict(getattr(self, f"_{name}_map")))
+        else:
+            raise AttributeError(name)
+        cached[name] = value
+        return value
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return FinGraphObject, (self.nodes, self.edges, self.source, self.target)
+
+    @cached_property
+    def _out_edges_index(self) -> Dict[_FST, Tuple[_FST, ...]]:
+        held = _held_index(self, "_out_edges_index")
+        return _group_edges(self._node_table, self._source_map) if held is None else held
+
+    @cached_property
+    def _in_edges_index(self) -> Dict[_FST, Tuple[_FST, ...]]:
+        held = _held_index(self, "_in_edges_index")
+        return _group_edges(self._node_table, self._target_map) if held is None else held
+
+    @cached_property
+    def _edges_between_index(self) -> Dict[Tuple[_FST, _FST], Tuple[_FST, ...]]:
+        held = _held_index(self, "_edges_between_index")
+        if held is not None:
+            return held
+        target_map = self._target_map
+        edges_between: Dict[Tuple[_FST, _FST], List[_FST]] = defaultdict(list)
+        for e, s in self._source_map.items():
+            edges_between[(s, target_map[e])].append(e)
+        return {endpoints: tuple(edges) for endpoints, edges in edges_between.items()}
+
+    def out_edges(self, node: _FST) -> Tuple[_FST, ...]:
+        return self._out_edges_index[node]
+
+    def in_edges(self, node: _FST) -> Tuple[_FST, ...]:
+        return self._in_edges_index[node]
+
+    def incident_edges(self, node: _FST) -> Tuple[_FST, ...]:
+        # Self-loops are both out- and in-edges, list them once.
+        source_map = self._source_map
+        return self._out_edges_index[node] + tuple(e for e in self._in_edges_index[node] if source_map[e] != node)
+
+    def edges_between(self, source: _FST, target: _FST) -> Tuple[_FST, ...]:
+        return self._edges_between_index.get((source, target), ())
+
+    def out_degree(self, node: _FST) -> int:
+        return len(self._out_edges_index[node])
+
+    def in_degree(self, node: _FST) -> int:
+        return len(self._in_edges_index[node])
+
+    def degree(self, node: _FST) -> int:
+        return len(self._out_edges_index[node]) + len(self._in_edges_index[node])
+
+    def _maps(self) -> Tuple[Mapping[_FST, _FST], Mapping[_FST, _FST]]:
+        # The maps of versions are shared, so the copies in their source and target are used instead.
+        if "_link" in vars(self):
+            source, target = self.source, self.target
+            assert isinstance(source, FinSetTableMorphism) and isinstance(target, FinSetTableMorphism)
+            return source.table, target.table
+        return self._source_map, self._target_map
+
+    @cached_property
+    def _fingerprint(self) -> int:
+        # A sum over the nodes and edges, so that fingraph_edit can update it in proportion to the edit.
+        node_table, source_map, target_map = self._node_table, self._source_map, self._target_map
+        node_hashes = sum(map(_node_hash, node_table))
+        return (node_hashes + sum(_edge_hash(e, s, target_map[e]) for e, s in source_map.items())) & _HASH_MASK
+
+    def __hash__(self) -> int:
+        return self._fingerprint
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, FinGraphObject):
             raise NotImplementedError()
 
-        return (self.nodes, self.edges, self._source_map, self._target_map) == (
-            other.nodes,
-            other.edges,
-            other._source_map,
-            other._target_map,
-        )
-
-
-@dataclass(frozen=True, repr=False)
+        # Graphs are immutable, so the identity and cached fingerprint checks settle most comparisons in O(1).
+        if self is other:
+            return True
+        if self._fingerprint != other._fingerprint:
+            return False
+        return (self.nodes, self.edges, *self._maps()) == (other.nodes, other.edges, *other._maps())
+
+
+def _reroot(graph: FinGraphObject) -> None:
+    """Move the tables of the versions of graph to graph, see FinGraphObject."""
+    path: List[FinGraphObject] = []
+    holder = graph
+    while vars(holder)["_link"] is not None:
+        path.append(holder)
+        holder = vars(holder)["_link"][0]
+
+    for version in reversed(path):
+        _, changes = vars(version)["_link"]
+        tables = vars(holder)
+        undo: Dict[str, Dict[Any, Any]] = {}
+        for name in _TABLES:
+            table = tables.pop(name, None)
+            # Indexes built after the edit that made version have no changes recorded, and are dropped.
+            if table is None or name not in changes:
+                continue
+            undo[name] = {}
+            for key, value in changes[name].items():
+                _patch(table, undo[name], key, value)
+            vars(version)[name] = table
+        tables["_link"] = (version, undo)
+        vars(version)["_link"] = None
+        holder = version
+
+
+def _held_index(graph: FinGraphObject, name: str) -> Optional[Dict[Any, Tuple[_FST, ...]]]:
+    """The index of the version graph, if its tables include it."""
+    if "_link" not in vars(graph):
+        return None
+    _reroot(graph)
+    return vars(graph).get(name)
+
+
+def _patch(table: Dict[Any, Any], undo: Dict[Any, Any], key: Any, value: Any) -> None:
+    """Set key of table to value, or delete it if value is _ABSENT, recording in undo how to change it back."""
+    if key not in undo:
+        undo[key] = table.get(key, _ABSENT)
+    if value is _ABSENT:
+        del table[key]
+    else:
+        table[key] = value
+
+
+@times_validation
+@dataclass(frozen=True, repr=False, slots=True)
 class FinGraphMorphism(Morphism):
     dom: FinGraphObject
     cod: FinGraphObject
@@ -67,11 +262,14 @@ class FinGraphMorphism(Morphism):
     edge_map: FinSetMorphism
 
     def __post_init__(self) -> None:
+        if not validation_enabled():
+            return
+
         assert self.node_map.dom == self.dom.nodes
         assert self.node_map.cod == self.cod.nodes
         assert self.edge_map.dom == self.dom.edges
         assert self.edge_map.cod == self.cod.edges
-        for edge in self.dom.edges:
+        for edge in validation_sample(self.dom.edges):
             mapped_edge = self.edge_map(edge)
             assert self.node_map(self.dom.source(edge)) == self.cod.source(mapped_edge)
             assert self.node_map(self.dom.target(edge)) == self.cod.target(mapped_edge)
@@ -85,10 +283,12 @@ def fingraph_target(m: FinGraphMorphism) -> FinGraphObject:
     return m.cod
 
 
+@trusted
 def fingraph_identity(a: FinGraphObject) -> FinGraphMorphism:
     return FinGraphMorphism(a, a, finset_identity(a.nodes), finset_identity(a.edges))
 
 
+@trusted
 def fingraph_composition(f: FinGraphMorphism, g: FinGraphMorphism) -> FinGraphMorphism:
     return FinGraphMorphism(
         g.dom,
@@ -98,6 +298,11 @@ def fingraph_composition(f: FinGraphMorphism, g: FinGraphMorphism) -> FinGraphMo
     )
 
 
+@trusted
+def fingraph_memoize(m: FinGraphMorphism) -> FinGraphMorphism:
+    return FinGraphMorphism(m.dom, m.cod, finset_memoize(m.node_map), finset_memoize(m.edge_map))
+
+
 FinGraphCategory = Category[FinGraphObject, FinGraphMorphism]
 FinGraphInitialObject = InitialObject[FinGraphObject, FinGraphMorphism]
 FinGraphTerminalObject = TerminalObject[FinGraphObject, FinGraphMorphism]
@@ -134,6 +339,7 @@ def fingraph_initial_obj_univ_edge_proj(a: _FST) -> _FST:
     raise NotImplementedError()
 
 
+@trusted
 def fingraph_initial_obj_univ(a: FinGraphObject) -> FinGraphMorphism:
     return FinGraphMorphism(
         fingraph_initial_obj_,
@@ -174,6 +380,7 @@ def fingraph_terminal_obj_univ_edge_proj(a: _FST) -> _FST:
     return fingraph_terminal_obj_edge_value
 
 
+@trusted
 def fingraph_terminal_obj_univ(a: FinGraphObject) -> FinGraphMorphism:
     return FinGraphMorphism(
         a,
@@ -186,6 +393,8 @@ def fingraph_terminal_obj_univ(a: FinGraphObject) -> FinGraphMorphism:
 fingraph_terminal_obj = FinGraphTerminalObject(fingraph_terminal_obj_, fingraph_terminal_obj_univ)
 
 
+@instrumented
+@trusted
 def fingraph_coproduct(a: FinGraphObject, b: FinGraphObject) -> FinGraphCoProductCoCone:
     disjoint_union_node_coprod = finset_coproduct(a.nodes, b.nodes)
     disjoint_union_edge_coprod = finset_coproduct(a.edges, b.edges)
@@ -206,6 +415,7 @@ def fingraph_coproduct(a: FinGraphObject, b: FinGraphObject) -> FinGraphCoProduc
         FinSetMorphism(disjoint_union_edges, disjoint_union_nodes, disjoint_union_edge_target),
     )
 
+    @trusted
     def fingraph_coproduct_univ(p: FinGraphMorphism, q: FinGraphMorphism) -> FinGraphMorphism:
         assert p.cod == q.cod
         assert p.dom == a and q.dom == b
@@ -224,6 +434,8 @@ def fingraph_coproduct(a: FinGraphObject, b: FinGraphObject) -> FinGraphCoProduc
     )
 
 
+@instrumented
+@trusted
 def fingraph_product(a: FinGraphObject, b: FinGraphObject) -> FinGraphProductCone:
     cartesian_product_node_prod = finset_product(a.nodes, b.nodes)
     cartesian_product_edge_prod = finset_product(a.edges, b.edges)
@@ -244,6 +456,7 @@ def fingraph_product(a: FinGraphObject, b: FinGraphObject) -> FinGraphProductCon
         FinSetMorphism(cartesian_product_edges, cartesian_product_nodes, cartesian_product_edge_target),
     )
 
+    @trusted
     def fingraph_product_univ(p: FinGraphMorphism, q: FinGraphMorphism) -> FinGraphMorphism:
         assert p.dom == q.dom
         assert p.cod == a and q.cod == b
@@ -262,6 +475,8 @@ def fingraph_product(a: FinGraphObject, b: FinGraphObject) -> FinGraphProductCon
     )
 
 
+@instrumented
+@trusted
 def fingraph_coequalizer(f: FinGraphMorphism, g: FinGraphMorphism) -> FinGraphCoEqualizerCoCone:
     assert f.dom == g.dom and f.cod == g.cod
 
@@ -274,6 +489,7 @@ def fingraph_coequalizer(f: FinGraphMorphism, g: FinGraphMorphism) -> FinGraphCo
     coeq = FinGraphObject(edge_src.cod, edge_src.dom, edge_src, edge_tgt)
     coeq_proj = FinGraphMorphism(f.cod, coeq, node_coeq.proj, edge_coeq.proj)
 
+    @trusted
     def fingraph_coequalizer_univ(q: FinGraphMorphism) -> FinGraphMorphism:
         assert q.dom == f.cod
         return FinGraphMorphism(coeq, q.cod, node_coeq.univ(q.node_map), edge_coeq.univ(q.edge_map))
@@ -281,6 +497,8 @@ def fingraph_coequalizer(f: FinGraphMorphism, g: FinGraphMorphism) -> FinGraphCo
     return FinGraphCoEqualizerCoCone(coeq, coeq_proj, fingraph_coequalizer_univ)
 
 
+@instrumented
+@trusted
 def fingraph_equalizer(f: FinGraphMorphism, g: FinGraphMorphism) -> FinGraphEqualizerCone:
     assert f.dom == g.dom
 
@@ -295,6 +513,7 @@ def fingraph_equalizer(f: FinGraphMorphism, g: FinGraphMorphism) -> FinGraphEqua
     )
     eq_proj = FinGraphMorphism(eq, f.dom, node_eq.proj, edge_eq.proj)
 
+    @trusted
     def fingraph_equalizer_univ(p: FinGraphMorphism) -> FinGraphMorphism:
         assert p.cod == f.dom
         return FinGraphMorphism(p.dom, eq, node_eq.univ(p.node_map), edge_eq.univ(p.edge_map))
@@ -312,39 +531,170 @@ FinGraphPushout = Pushout[FinGraphMorphism, FinGraphObject]
 FinGraphPullback = Pullback[FinGraphMorphism, FinGraphObject]
 
 
-def fingraph_pushout(f: FinGraphMorphism, g: FinGraphMorphism) -> FinGraphPushoutCoCone:
+@instrumented
+@trusted
+def fingraph_relabel(a: FinGraphObject) -> FinGraphMorphism:
+    """Isomorphism from a onto a copy with flat node and edge labels 0..n-1 and 0..m-1."""
+    node_renaming = finset_relabel(a.nodes)
+    edge_renaming = finset_relabel(a.edges)
+    node_table, edge_table = node_renaming.table, edge_renaming.table
+    nodes, edges = node_renaming.cod, edge_renaming.cod
+
+    relabelled = FinGraphObject(
+        nodes,
+        edges,
+        FinSetTableMorphism(edges, nodes, {edge_table[e]: node_table[s] for e, s in a._source_map.items()}),
+        FinSetTableMorphism(edges, nodes, {edge_table[e]: node_table[t] for e, t in a._target_map.items()}),
+    )
+    return FinGraphMorphism(a, relabelled, node_renaming, edge_renaming)
+
+
+@overload
+def fingraph_pushout(
+    f: FinGraphMorphism, g: FinGraphMorphism, relabel: Literal[False] = False
+) -> FinGraphPushoutCoCone:
+    ...
+
+
+@overload
+def fingraph_pushout(
+    f: FinGraphMorphism, g: FinGraphMorphism, relabel: Literal[True]
+) -> Tuple[FinGraphPushoutCoCone, FinGraphMorphism]:
+    ...
+
+
+@instrumented
+@trusted
+def fingraph_pushout(
+    f: FinGraphMorphism, g: FinGraphMorphism, relabel: bool = False
+) -> Union[FinGraphPushoutCoCone, Tuple[FinGraphPushoutCoCone, FinGraphMorphism]]:
+    """Pushout of the nodes and of the edges (see finset_pushout), with edge endpoints copied across from f.cod and
+    g.cod. With relabel, the apex is relabelled with fingraph_relabel to keep its labels flat, and the renaming from
+    the pushout's own labels to the flat ones is returned with the pushout."""
     assert f.dom == g.dom
-    cp = fingraph_coproduct(f.cod, g.cod)
-    ce = fingraph_coequalizer(fingraph_composition(cp.proj_a, f), fingraph_composition(cp.proj_b, g))
+    node_pushout = finset_pushout(f.node_map, g.node_map)
+    edge_pushout = finset_pushout(f.edge_map, g.edge_map)
+
+    source_map: Dict[_FST, _FST] = {}
+    target_map: Dict[_FST, _FST] = {}
+    for a, node_proj, edge_proj in (
+        (f.cod, node_pushout.proj_b, edge_pushout.proj_b),
+        (g.cod, node_pushout.proj_c, edge_pushout.proj_c),
+    ):
+        for e, s in a._source_map.items():
+            source_map[edge_proj(e)] = node_proj(s)
+        for e, t in a._target_map.items():
+            target_map[edge_proj(e)] = node_proj(t)
+    apex = FinGraphObject(
+        node_pushout.apex,
+        edge_pushout.apex,
+        FinSetTableMorphism(edge_pushout.apex, node_pushout.apex, source_map),
+        FinSetTableMorphism(edge_pushout.apex, node_pushout.apex, target_map),
+    )
 
+    @trusted
     def fingraph_pushout_univ(u: FinGraphMorphism, v: FinGraphMorphism) -> FinGraphMorphism:
         assert u.cod == v.cod
         assert u.dom == f.cod and v.dom == g.cod
-        return ce.univ(cp.univ(u, v))
+        return FinGraphMorphism(
+            apex,
+            u.cod,
+            node_pushout.univ(u.node_map, v.node_map),
+            edge_pushout.univ(u.edge_map, v.edge_map),
+        )
+
+    # Projections are only built on first use, double_pushout for one needs just the apex.
+    @trusted
+    def fingraph_pushout_proj_b() -> FinGraphMorphism:
+        return FinGraphMorphism(f.cod, apex, node_pushout.proj_b, edge_pushout.proj_b)
+
+    @trusted
+    def fingraph_pushout_proj_c() -> FinGraphMorphism:
+        return FinGraphMorphism(g.cod, apex, node_pushout.proj_c, edge_pushout.proj_c)
+
+    if not relabel:
+        return FinGraphPushoutCoCone(
+            apex, deferred(fingraph_pushout_proj_b), deferred(fingraph_pushout_proj_c), fingraph_pushout_univ
+        )
+
+    renaming = fingraph_relabel(apex)
+    relabelled = renaming.cod
+    node_renaming, edge_renaming = renaming.node_map, renaming.edge_map
+    node_univ, edge_univ = node_pushout.univ, edge_pushout.univ
+
+    # Built from the node and edge pushouts only, so the unlabelled apex is not kept alive by them.
+    @trusted
+    def fingraph_relabelled_pushout_proj(
+        a: FinGraphObject, node_proj: FinSetMorphism, edge_proj: FinSetMorphism
+    ) -> FinGraphMorphism:
+        return FinGraphMorphism(
+            a, relabelled, finset_composition(node_renaming, node_proj), finset_composition(edge_renaming, edge_proj)
+        )
+
+    @trusted
+    def fingraph_relabelled_pushout_univ(u: FinGraphMorphism, v: FinGraphMorphism) -> FinGraphMorphism:
+        assert u.cod == v.cod
+        assert u.dom == f.cod and v.dom == g.cod
+        return FinGraphMorphism(
+            relabelled,
+            u.cod,
+            finset_composition(node_univ(u.node_map, v.node_map), finset_inverse(node_renaming)),
+            finset_composition(edge_univ(u.edge_map, v.edge_map), finset_inverse(edge_renaming)),
+        )
 
-    return FinGraphPushoutCoCone(
-        ce.apex,
-        fingraph_composition(ce.proj, cp.proj_a),
-        fingraph_composition(ce.proj, cp.proj_b),
-        fingraph_pushout_univ,
+    relabelled_pushout = FinGraphPushoutCoCone(
+        relabelled,
+        deferred(lambda: fingraph_relabelled_pushout_proj(f.cod, node_pushout.proj_b, edge_pushout.proj_b)),
+        deferred(lambda: fingraph_relabelled_pushout_proj(g.cod, node_pushout.proj_c, edge_pushout.proj_c)),
+        fingraph_relabelled_pushout_univ,
     )
+    return relabelled_pushout, renaming
 
 
+@instrumented
+@trusted
 def fingraph_pullback(f: FinGraphMorphism, g: FinGraphMorphism) -> FinGraphPullbackCone:
+    """Pullback of the nodes and of the edges, each by a hash join (see finset_pullback)."""
     assert f.cod == g.cod
-    p = fingraph_product(f.dom, g.dom)
-    e = fingraph_equalizer(fingraph_composition(f, p.proj_a), fingraph_composition(g, p.proj_b))
+    node_pullback = finset_pullback(f.node_map, g.node_map)
+    edge_pullback = finset_pullback(f.edge_map, g.edge_map)
+    a, b = f.dom, g.dom
+
+    def pullback_edge_source(x: _FST) -> _FST:
+        return (a.source(x[0]), b.source(x[1]))  # type: ignore
+
+    def pullback_edge_target(x: _FST) -> _FST:
+        return (a.target(x[0]), b.target(x[1]))  # type: ignore
+
+    pullback = FinGraphObject(
+        node_pullback.apex,
+        edge_pullback.apex,
+        FinSetMorphism(edge_pullback.apex, node_pullback.apex, pullback_edge_source),
+        FinSetMorphism(edge_pullback.apex, node_pullback.apex, pullback_edge_target),
+    )
 
+    @trusted
     def fingraph_pullback_univ(u: FinGraphMorphism, v: FinGraphMorphism) -> FinGraphMorphism:
         assert u.dom == v.dom
         assert u.cod == f.dom and v.cod == g.dom
-        return e.univ(p.univ(u, v))
+        return FinGraphMorphism(
+            u.dom,
+            pullback,
+            node_pullback.univ(u.node_map, v.node_map),
+            edge_pullback.univ(u.edge_map, v.edge_map),
+        )
 
+    # Projections are only built on first use, as for fingraph_pushout.
     return FinGraphPullbackCone(
-        e.apex, fingraph_composition(p.proj_a, e.proj), fingraph_composition(p.proj_b, e.proj), fingraph_pullback_univ
+        pullback,
+        deferred(trusted(lambda: FinGraphMorphism(pullback, a, node_pullback.proj_b, edge_pullback.proj_b))),
+        deferred(trusted(lambda: FinGraphMorphism(pullback, b, node_pullback.proj_c, edge_pullback.proj_c))),
+        fingraph_pullback_univ,
     )
 
 
+@instrumented
+@trusted
 def fingraph_pushout_complement(
     f_or_g: FinGraphMorphism, proj_b_or_c: FinGraphMorphism, pushout_apex: FinGraphObject
 ) -> Tuple[FinGraphObject, FinGraphMorphism, FinGraphMorphism]:
@@ -364,10 +714,10 @@ def fingraph_pushout_complement(
         finset_composition(pushout_apex.target, edge_proj_c_or_b),
     )
 
-    # Dangling condition.
-    deleted_nodes = pushout_apex.nodes - node_complement
-    for edge in pushout_apex.edges:
-        if pushout_apex.source(edge) in deleted_nodes or pushout_apex.target(edge) in deleted_nodes:
+    # Dangling condition, deleted nodes are all matched so only their incident edges need checking.
+    deleted_nodes = frozenset(map(proj_b_or_c.node_map, f_or_g.cod.nodes)) - node_complement
+    for node in deleted_nodes:
+        for edge in pushout_apex.incident_edges(node):
             assert edge not in edge_complement
     # Identification condition satisfied by assumed injectivity.
 
@@ -379,3 +729,127 @@ def fingraph_pushout_complement(
 
 def fingraph_inclusion(a: FinGraphObject, b: FinGraphObject) -> FinGraphMorphism:
     return FinGraphMorphism(a, b, finset_inclusion(a.nodes, b.nodes), finset_inclusion(a.edges, b.edges))
+
+
+def _edit_edge_index(
+    index: Dict[_FST, Tuple[_FST, ...]],
+    undo: Dict[_FST, Tuple[_FST, ...]],
+    endpoint_map: Dict[_FST, _FST],
+    deleted_nodes: AbstractSet[_FST],
+    deleted_edges: AbstractSet[_FST],
+    added_nodes: Iterable[_FST],
+    added_endpoint_map: Dict[_FST, _FST],
+) -> None:
+    for n in {endpoint_map[e] for e in deleted_edges} - deleted_nodes:
+        _patch(index, undo, n, tuple(e for e in index[n] if e not in deleted_edges))
+    for n in deleted_nodes:
+        _patch(index, undo, n, _ABSENT)
+    for n in added_nodes:
+        _patch(index, undo, n, ())
+    for e, n in added_endpoint_map.items():
+        _patch(index, undo, n, index[n] + (e,))
+
+
+def _edit_edges_between_index(
+    index: Dict[Tuple[_FST, _FST], Tuple[_FST, ...]],
+    undo: Dict[Tuple[_FST, _FST], Tuple[_FST, ...]],
+    source_map: Dict[_FST, _FST],
+    target_map: Dict[_FST, _FST],
+    deleted_edges: AbstractSet[_FST],
+    added_edges: Mapping[_FST, Tuple[_FST, _FST]],
+) -> None:
+    for endpoints in {(source_map[e], target_map[e]) for e in deleted_edges}:
+        remaining = tuple(e for e in index[endpoints] if e not in deleted_edges)
+        _patch(index, undo, endpoints, remaining or _ABSENT)
+    for e, endpoints in added_edges.items():
+        _patch(index, undo, endpoints, index.get(endpoints, ()) + (e,))
+
+
+@instrumented
+@trusted
+def fingraph_edit(
+    graph: FinGraphObject,
+    deleted_nodes: AbstractSet[_FST],
+    deleted_edges: AbstractSet[_FST],
+    added_nodes: AbstractSet[_FST],
+    added_edges: Mapping[_FST, Tuple[_FST, _FST]],
+) -> FinGraphObject:
+    """Graph with the given nodes and edges removed from and then added to graph.
+
+    Added edges map to their (source, target). Deleting and re-adding an edge moves it to new endpoints. The first
+    edit of a graph copies its tables, and any indexes already built for it. The result is a version of the graph
+    edited (see FinGraphObject) that takes the tables over and patches them, so editing it again costs time in
+    proportion to the edit rather than to the graph.
+    """
+    cached = vars(graph)
+    tables: Dict[str, Dict[Any, Any]]
+    if "_link" in cached:
+        _reroot(graph)
+        tables = {name: cached[name] for name in _TABLES if name in cached}
+    else:
+        tables = {"_node_table": dict.fromkeys(graph.nodes)}
+        tables.update((name, dict(cached[name])) for name in _TABLES[1:] if name in cached)
+    node_table, source_map, target_map = tables["_node_table"], tables["_source_map"], tables["_target_map"]
+    assert all(n in node_table for n in deleted_nodes) and all(e in source_map for e in deleted_edges)
+    # Added elements are new, or replace deleted ones, rather than overwrite the ones kept.
+    assert all(n in deleted_nodes or n not in node_table for n in added_nodes)
+    assert all(e in deleted_edges or e not in source_map for e in added_edges)
+
+    fingerprint = cached.get("_fingerprint")
+    if fingerprint is not None:
+        fingerprint -= sum(map(_node_hash, deleted_nodes))
+        fingerprint -= sum(_edge_hash(e, source_map[e], target_map[e]) for e in deleted_edges)
+        fingerprint += sum(map(_node_hash, added_nodes))
+        fingerprint += sum(_edge_hash(e, s, t) for e, (s, t) in added_edges.items())
+
+    # The changes to each table, reverting the edit. Indexes are patched first, from the endpoints before the edit.
+    undo: Dict[str, Dict[Any, Any]] = {name: {} for name in tables}
+    if "_out_edges_index" in tables:
+        _edit_edge_index(
+            tables["_out_edges_index"],
+            undo["_out_edges_index"],
+            source_map,
+            deleted_nodes,
+            deleted_edges,
+            added_nodes,
+            {e: s for e, (s, _) in added_edges.items()},
+        )
+    if "_in_edges_index" in tables:
+        _edit_edge_index(
+            tables["_in_edges_index"],
+            undo["_in_edges_index"],
+            target_map,
+            deleted_nodes,
+            deleted_edges,
+            added_nodes,
+            {e: t for e, (_, t) in added_edges.items()},
+        )
+    if "_edges_between_index" in tables:
+        _edit_edges_between_index(
+            tables["_edges_between_index"],
+            undo["_edges_between_index"],
+            source_map,
+            target_map,
+            deleted_edges,
+            added_edges,
+        )
+    for e in deleted_edges:
+        _patch(source_map, undo["_source_map"], e, _ABSENT)
+        _patch(target_map, undo["_target_map"], e, _ABSENT)
+    for e, (s, t) in added_edges.items():
+        _patch(source_map, undo["_source_map"], e, s)
+        _patch(target_map, undo["_target_map"], e, t)
+    for n in deleted_nodes:
+        _patch(node_table, undo["_node_table"], n, _ABSENT)
+    for n in added_nodes:
+        _patch(node_table, undo["_node_table"], n, None)
+
+    edited = object.__new__(FinGraphObject)
+    vars(edited).update(tables, _link=None)
+    if fingerprint is not None:
+        vars(edited)["_fingerprint"] = fingerprint & _HASH_MASK
+    if "_link" in cached:
+        for name in tables:
+            del cached[name]
+        cached["_link"] = (edited, undo)
+    return edited
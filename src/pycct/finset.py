@@ -1,8 +1,8 @@
-from collections import defaultdict
-from dataclasses import dataclass
-from itertools import product
-from typing import Callable, Dict, Hashable, Iterable, List, Tuple
+from dataclasses import dataclass, field
+from itertools import chain, product
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Mapping, Optional, Tuple
 
+from .arrays import union_find
 from .base import (
     Category,
     CoCompleteCategory,
@@ -19,7 +19,10 @@ from .base import (
     Pushout,
     PushoutCoCone,
     TerminalObject,
+    deferrable,
 )
+from .instrumentation import counts_evaluations, instrumented, times_validation
+from .validation import ValidationMode, get_validation_mode, trusted, validation_enabled, validation_sample
 
 
 _FST = Hashable
@@ -30,22 +33,100 @@ def nil_fn(a: _FST) -> _FST:
 
 
 class FinSetObject(frozenset[_FST], Object):
-    pass
+    __slots__ = ()
 
+    def __eq__(self, other: object) -> bool:
+        return self is other or frozenset.__eq__(self, other)
 
-@dataclass(frozen=True, repr=False)
+    __hash__ = frozenset.__hash__
+
+
+@counts_evaluations
+@times_validation
+@deferrable("cod")
+@dataclass(frozen=True, repr=False, slots=True)
 class FinSetMorphism(Morphism):
     dom: FinSetObject
     cod: FinSetObject
     value: Callable[[_FST], _FST]
 
     def __post_init__(self) -> None:
-        assert frozenset(map(self, self.dom)).issubset(self.cod)
+        # The codomain may be deferred, so is only looked at when validating.
+        if not validation_enabled():
+            return
+        assert frozenset(map(self, validation_sample(self.dom))).issubset(self.cod)
 
     def __call__(self, x: _FST) -> _FST:
         return self.value(x)
 
 
+@counts_evaluations
+@times_validation
+@dataclass(frozen=True, repr=False, slots=True)
+class FinSetTableMorphism(FinSetMorphism):
+    """FinSetMorphism backed by an explicit table over its (finite) domain."""
+
+    value: Callable[[_FST], _FST] = field(init=False, compare=False)
+    table: Mapping[_FST, _FST] = field(hash=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "value", self.table.__getitem__)
+        FinSetMorphism.__post_init__(self)
+
+    def __call__(self, x: _FST) -> _FST:
+        return self.table[x]
+
+
+@counts_evaluations
+@times_validation
+@dataclass(frozen=True, repr=False, slots=True)
+class FinSetMemoMorphism(FinSetMorphism):
+    """FinSetMorphism whose values over its (finite) domain are all computed in one pass on first use, then looked
+    up. Morphisms composed from it share its table rather than calling value again."""
+
+    _table: Optional[Dict[_FST, _FST]] = field(init=False, compare=False, hash=False)
+    _validate_table: bool = field(init=False, compare=False, hash=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_table", None)
+        # Full validation checks the table once it is filled, so that construction stays lazy.
+        object.__setattr__(self, "_validate_table", get_validation_mode() is ValidationMode.FULL)
+        if not self._validate_table:
+            assert frozenset(map(self.value, validation_sample(self.dom))).issubset(self.cod)
+
+    @property
+    def table(self) -> Dict[_FST, _FST]:
+        table = self._table
+        if table is None:
+            value = self.value
+            table = {x: value(x) for x in self.dom}
+            if self._validate_table:
+                assert frozenset(table.values()).issubset(self.cod)
+            object.__setattr__(self, "_table", table)
+        return table
+
+    def __call__(self, x: _FST) -> _FST:
+        return self.table[x]
+
+
+@trusted
+def finset_memoize(f: FinSetMorphism) -> FinSetMorphism:
+    if isinstance(f, (FinSetTableMorphism, FinSetMemoMorphism)):
+        return f
+    return FinSetMemoMorphism(f.dom, f.cod, f.value)
+
+
+@trusted
+def finset_tabulate(f: FinSetMorphism) -> FinSetTableMorphism:
+    if isinstance(f, FinSetTableMorphism):
+        return f
+    if isinstance(f, FinSetMemoMorphism):
+        return FinSetTableMorphism(f.dom, f.cod, f.table)
+
+    f_value = f.value
+    return FinSetTableMorphism(f.dom, f.cod, {x: f_value(x) for x in f.dom})
+
+
 def is_injective(f: FinSetMorphism) -> bool:
     return len(f.dom) == len(set(map(f, f.dom)))
 
@@ -58,6 +139,7 @@ def finset_target(m: FinSetMorphism) -> FinSetObject:
     return m.cod
 
 
+@trusted
 def finset_identity(a: FinSetObject) -> FinSetMorphism:
     def finset_id_(x: _FST) -> _FST:
         return x
@@ -65,13 +147,31 @@ def finset_identity(a: FinSetObject) -> FinSetMorphism:
     return FinSetMorphism(a, a, finset_id_)
 
 
+@trusted
 def finset_composition(f: FinSetMorphism, g: FinSetMorphism) -> FinSetMorphism:
     if f.dom != g.cod:
         raise ValueError(f"Composition of {f} * {g} failed with: {f.dom=} != {g.cod=}.")
 
+    # Tables are composed eagerly, so evaluating the result is a single lookup rather than a closure chain. A memoised
+    # morphism is called rather than its value, so that it goes through its table.
+    if isinstance(g, FinSetTableMorphism):
+        f_value: Callable[[_FST], _FST] = f.value
+        if isinstance(f, FinSetMemoMorphism):
+            f_value = f
+        return FinSetTableMorphism(g.dom, f.cod, {x: f_value(y) for x, y in g.table.items()})
+    if isinstance(f, FinSetTableMorphism):
+        f_table = f.table
+        g_value: Callable[[_FST], _FST] = g.value
+        if isinstance(g, FinSetMemoMorphism):
+            g_value = g
+        return FinSetTableMorphism(g.dom, f.cod, {x: f_table[g_value(x)] for x in g.dom})
+
     def finset_comp_(x: _FST) -> _FST:
         return f(g(x))
 
+    # Compositions with a memoised morphism are memoised too, evaluated through its table when first used.
+    if isinstance(f, FinSetMemoMorphism) or isinstance(g, FinSetMemoMorphism):
+        return FinSetMemoMorphism(g.dom, f.cod, finset_comp_)
     return FinSetMorphism(g.dom, f.cod, finset_comp_)
 
 
@@ -92,6 +192,7 @@ finset_terminal_obj_value = None
 finset_initial_obj_ = FinSetObject(())
 
 
+@trusted
 def finset_initial_obj_univ(a: FinSetObject) -> FinSetMorphism:
     return FinSetMorphism(finset_initial_obj_, a, nil_fn)
 
@@ -106,6 +207,7 @@ def finset_terminal_obj_univ_proj(a: _FST) -> _FST:
     return finset_terminal_obj_value
 
 
+@trusted
 def finset_terminal_obj_univ(a: FinSetObject) -> FinSetMorphism:
     return FinSetMorphism(a, finset_terminal_obj_, finset_terminal_obj_univ_proj)
 
@@ -113,6 +215,8 @@ def finset_terminal_obj_univ(a: FinSetObject) -> FinSetMorphism:
 finset_terminal_obj = FinSetTerminalObject(finset_terminal_obj_, finset_terminal_obj_univ)
 
 
+@instrumented
+@trusted
 def finset_coproduct(a: FinSetObject, b: FinSetObject) -> FinSetCoProductCoCone:
     def label_0(x: _FST) -> _FST:
         return x, 0
@@ -120,10 +224,13 @@ def finset_coproduct(a: FinSetObject, b: FinSetObject) -> FinSetCoProductCoCone:
     def label_1(x: _FST) -> _FST:
         return x, 1
 
-    disjoint_union: FinSetObject = FinSetObject(list(map(label_0, a)) + list(map(label_1, b)))
-    label_a = FinSetMorphism(a, disjoint_union, label_0)
-    label_b = FinSetMorphism(b, disjoint_union, label_1)
+    label_a_table = {x: label_0(x) for x in a}
+    label_b_table = {x: label_1(x) for x in b}
+    disjoint_union: FinSetObject = FinSetObject(list(label_a_table.values()) + list(label_b_table.values()))
+    label_a = FinSetTableMorphism(a, disjoint_union, label_a_table)
+    label_b = FinSetTableMorphism(b, disjoint_union, label_b_table)
 
+    @trusted
     def finset_coproduct_univ(p: FinSetMorphism, q: FinSetMorphism) -> FinSetMorphism:
         assert p.cod == q.cod
         assert p.dom == a and q.dom == b
@@ -134,15 +241,13 @@ def finset_coproduct(a: FinSetObject, b: FinSetObject) -> FinSetCoProductCoCone:
         for x in b:
             univ_dict[label_b(x)] = q(x)
 
-        def univ_map(x: _FST) -> _FST:
-            assert x in disjoint_union
-            return univ_dict[x]
-
-        return FinSetMorphism(disjoint_union, p.cod, univ_map)
+        return FinSetTableMorphism(disjoint_union, p.cod, univ_dict)
 
     return FinSetCoProductCoCone(disjoint_union, label_a, label_b, finset_coproduct_univ)
 
 
+@instrumented
+@trusted
 def finset_product(a: FinSetObject, b: FinSetObject) -> FinSetProductCone:
     cartesian_product: FinSetObject = FinSetObject(product(a, b))
 
@@ -155,89 +260,75 @@ def finset_product(a: FinSetObject, b: FinSetObject) -> FinSetProductCone:
     proj_a = FinSetMorphism(cartesian_product, a, proj_a_)
     proj_b = FinSetMorphism(cartesian_product, b, proj_b_)
 
+    @trusted
     def finset_product_univ(p: FinSetMorphism, q: FinSetMorphism) -> FinSetMorphism:
         assert p.dom == q.dom
         assert p.cod == a and q.cod == b
 
-        def univ_map(x: _FST) -> _FST:
-            return (p(x), q(x))
-
-        return FinSetMorphism(p.dom, cartesian_product, univ_map)
+        return FinSetTableMorphism(p.dom, cartesian_product, {x: (p(x), q(x)) for x in p.dom})
 
     return FinSetProductCone(cartesian_product, proj_a, proj_b, finset_product_univ)
 
 
-def partition(elements: Iterable[_FST], equivalences: List[Tuple[_FST, _FST]]) -> Dict[_FST, _FST]:
-    # Simplified version of https://networkx.org/documentation/stable/_modules/networkx/utils/union_find.html.
-    parents = {}
-    weights = {}
-    for x in elements:
-        parents[x] = x
-        weights[x] = 1
-
-    def find(x: _FST) -> _FST:
-        path = []
-        root = parents[x]
-        while root != x:
-            path.append(x)
-            x = root
-            root = parents[x]
+def partition(elements: Iterable[_FST], equivalences: Iterable[Tuple[_FST, _FST]]) -> Tuple[Dict[_FST, int], int]:
+    """Map from each element to the id of its equivalence class, and the number of classes.
 
-        for ancestor in path:
-            parents[ancestor] = root
-        return root
+    Class ids are 0, 1, ... in the order of the first member of each class among elements.
+    """
+    ids = {x: i for i, x in enumerate(elements)}
+    classes, num_classes = union_find(len(ids), ((ids[x], ids[y]) for x, y in equivalences))
+    return dict(zip(ids, classes)), num_classes
 
-    for x, y in equivalences:
-        rx, ry = find(x), find(y)
-        if rx == ry:
-            continue
 
-        wx, wy = weights[rx], weights[ry]
-        if wy > wx:
-            (y, ry, wy), (x, rx, wx) = (x, rx, wx), (y, ry, wy)
-
-        parents[ry] = rx
-        weights[rx] += wy
-
-    for x in parents:
-        find(x)
-
-    parent_to_equivalence_class = defaultdict(list)
-    for x, parent in parents.items():
-        parent_to_equivalence_class[parent].append(x)
-
-    element_to_equivalence_class: Dict[_FST, _FST] = {}
-    for x, parent in parents.items():
-        element_to_equivalence_class[x] = frozenset(parent_to_equivalence_class[parent])
-
-    return element_to_equivalence_class
+def finset_fibers(f: FinSetMorphism) -> Dict[_FST, Tuple[_FST, ...]]:
+    """Preimage under f of each element of f.cod, e.g. the members of each class of a coequalizer."""
+    fibers: Dict[_FST, List[_FST]] = {y: [] for y in f.cod}
+    for x in f.dom:
+        fibers[f(x)].append(x)
+    return {y: tuple(xs) for y, xs in fibers.items()}
 
 
+@instrumented
+@trusted
 def finset_coequalizer(f: FinSetMorphism, g: FinSetMorphism) -> FinSetCoEqualizerCoCone:
+    """Coequalizer of f and g, labelled by the ids of the classes of f.cod that f and g glue, see partition. The
+    members of the classes are found with finset_fibers on the projection."""
     assert f.dom == g.dom and f.cod == g.cod
 
-    quotient_map_dict = partition(f.cod, [(f(a), g(a)) for a in f.dom])
-
-    def quotient_map(a: _FST) -> _FST:
-        return quotient_map_dict[a]
-
-    partitions_obj = FinSetObject(quotient_map_dict.values())
+    quotient_map_dict, num_classes = partition(f.cod, ((f(a), g(a)) for a in f.dom))
+    partitions_obj = FinSetObject(range(num_classes))
 
+    @trusted
     def finset_coequalizer_univ(q: FinSetMorphism) -> FinSetMorphism:
         assert q.dom == f.cod
         assert all(finset_composition(q, f)(x) == finset_composition(q, g)(x) for x in f.dom)
 
-        def univ_map(x: _FST) -> _FST:
-            assert x in partitions_obj
-            return q(next(iter(x)))  # type: ignore
-
-        return FinSetMorphism(partitions_obj, q.cod, univ_map)
+        # The first member of each class in turn.
+        representatives: List[_FST] = []
+        for x, c in quotient_map_dict.items():
+            if c == len(representatives):
+                representatives.append(x)
+        return FinSetTableMorphism(partitions_obj, q.cod, dict(enumerate(map(q, representatives))))
 
     return FinSetCoEqualizerCoCone(
-        partitions_obj, FinSetMorphism(f.cod, partitions_obj, quotient_map), finset_coequalizer_univ
+        partitions_obj, FinSetTableMorphism(f.cod, partitions_obj, quotient_map_dict), finset_coequalizer_univ
     )
 
 
+@trusted
+def finset_relabel(a: FinSetObject) -> FinSetTableMorphism:
+    """Bijection from a onto the flat labels 0..len(a)-1."""
+    table = {x: i for i, x in enumerate(a)}
+    return FinSetTableMorphism(a, FinSetObject(table.values()), table)
+
+
+@trusted
+def finset_inverse(f: FinSetMorphism) -> FinSetTableMorphism:
+    table = {f(x): x for x in f.dom}
+    assert len(table) == len(f.dom) == len(f.cod)
+    return FinSetTableMorphism(f.cod, f.dom, table)
+
+
 def finset_inclusion(a: FinSetObject, b: FinSetObject) -> FinSetMorphism:
     def finset_id_(x: _FST) -> _FST:
         return x
@@ -245,20 +336,20 @@ def finset_inclusion(a: FinSetObject, b: FinSetObject) -> FinSetMorphism:
     return FinSetMorphism(a, b, finset_id_)
 
 
+@instrumented
+@trusted
 def finset_equalizer(f: FinSetMorphism, g: FinSetMorphism) -> FinSetEqualizerCone:
     a = f.dom
     subset = FinSetObject(x for x in a if f(x) == g(x))
 
+    @trusted
     def finset_equalizer_univ(p: FinSetMorphism) -> FinSetMorphism:
         assert p.cod == a, (p.cod, a)
         assert all(finset_composition(f, p)(x) == finset_composition(g, p)(x) for x in p.dom)
 
-        def univ_map(x: _FST) -> _FST:
-            return p(x)
+        return FinSetTableMorphism(p.dom, subset, {x: p(x) for x in p.dom})
 
-        return FinSetMorphism(p.dom, subset, univ_map)
-
-    return FinSetEqualizerCone(subset, finset_inclusion(subset, a), finset_equalizer_univ)
+    return FinSetEqualizerCone(subset, FinSetTableMorphism(subset, a, {x: x for x in subset}), finset_equalizer_univ)
 
 
 FinSetCoComplete = CoCompleteCategory[FinSetObject, FinSetMorphism]
@@ -271,41 +362,109 @@ FinSetPushout = Pushout[FinSetMorphism, FinSetObject]
 FinSetPullback = Pullback[FinSetMorphism, FinSetObject]
 
 
+@instrumented
+@trusted
 def finset_pushout(f: FinSetMorphism, g: FinSetMorphism) -> FinSetPushoutCoCone:
-    assert f.dom == g.dom
-    cp = finset_coproduct(f.cod, g.cod)
-    ce = finset_coequalizer(finset_composition(cp.proj_a, f), finset_composition(cp.proj_b, g))
+    """Pushout of f and g, each apex element being the frozenset of tagged elements of f.cod and g.cod it glues.
 
+    Only the elements of f.cod and g.cod in the image of f or g are glued, the rest are copied across as singleton
+    classes. When f is injective, as for the precondition map of a rule, the classes are the fibers of g.
+    """
+    assert f.dom == g.dom
+    glued: Dict[Tuple[_FST, int], FrozenSet[Tuple[_FST, int]]] = {}
+    if is_injective(f):
+        fibers: Dict[_FST, List[Tuple[_FST, int]]] = {}
+        for x in f.dom:
+            y = g(x)
+            fibers.setdefault(y, [(y, 1)]).append((f(x), 0))
+        for members in fibers.values():
+            glued.update(dict.fromkeys(members, frozenset(members)))
+    else:
+        equivalences = [((f(x), 0), (g(x), 1)) for x in f.dom]
+        tagged = list(dict.fromkeys(chain.from_iterable(equivalences)))
+        class_ids, num_classes = partition(tagged, equivalences)
+        class_members: List[List[Tuple[_FST, int]]] = [[] for _ in range(num_classes)]
+        for x in tagged:
+            class_members[class_ids[x]].append(x)
+        classes = [frozenset(members) for members in class_members]
+        glued = {x: classes[class_ids[x]] for x in tagged}
+
+    def label(x: Tuple[_FST, int]) -> FrozenSet[Tuple[_FST, int]]:
+        return glued[x] if x in glued else frozenset((x,))
+
+    proj_b_table = {x: label((x, 0)) for x in f.cod}
+    proj_c_table = {x: label((x, 1)) for x in g.cod}
+    apex = FinSetObject(chain(proj_b_table.values(), proj_c_table.values()))
+
+    @trusted
     def finset_pushout_univ(u: FinSetMorphism, v: FinSetMorphism) -> FinSetMorphism:
         assert u.cod == v.cod
         assert u.dom == f.cod and v.dom == g.cod
         assert all(finset_composition(u, f)(x) == finset_composition(v, g)(x) for x in f.dom)
-        return ce.univ(cp.univ(u, v))
+        univ_dict: Dict[_FST, _FST] = {proj_b_table[x]: u(x) for x in f.cod}
+        univ_dict.update((proj_c_table[x], v(x)) for x in g.cod)
+        return FinSetTableMorphism(apex, u.cod, univ_dict)
 
     return FinSetPushoutCoCone(
-        ce.apex,
-        finset_composition(ce.proj, cp.proj_a),
-        finset_composition(ce.proj, cp.proj_b),
+        apex,
+        FinSetTableMorphism(f.cod, apex, proj_b_table),
+        FinSetTableMorphism(g.cod, apex, proj_c_table),
         finset_pushout_univ,
     )
 
 
+def finset_pullback_pairs(f: FinSetMorphism, g: FinSetMorphism) -> Iterator[Tuple[_FST, _FST]]:
+    """Lazily enumerate the pairs (a, b) with f(a) == g(b), i.e. the pullback apex, without materialising it.
+
+    The smaller domain is indexed by its image, and the larger one streamed past the index.
+    """
+    assert f.cod == g.cod
+    if len(f.dom) <= len(g.dom):
+        f_fibers: Dict[_FST, List[_FST]] = {}
+        for x in f.dom:
+            f_fibers.setdefault(f(x), []).append(x)
+        for y in g.dom:
+            for x in f_fibers.get(g(y), ()):
+                yield x, y
+    else:
+        g_fibers: Dict[_FST, List[_FST]] = {}
+        for y in g.dom:
+            g_fibers.setdefault(g(y), []).append(y)
+        for x in f.dom:
+            for y in g_fibers.get(f(x), ()):
+                yield x, y
+
+
+@instrumented
+@trusted
 def finset_pullback(f: FinSetMorphism, g: FinSetMorphism) -> FinSetPullbackCone:
+    """Pullback as the pairs (a, b) with f(a) == g(b), found by a hash join on the common codomain.
+
+    Unlike the equalizer of the product projections, this never builds the product of f.dom and g.dom.
+    """
     assert f.cod == g.cod
-    p = finset_product(f.dom, g.dom)
-    e = finset_equalizer(finset_composition(f, p.proj_a), finset_composition(g, p.proj_b))
+    apex = FinSetObject(finset_pullback_pairs(f, g))
+
+    def proj_a_(x: _FST) -> _FST:
+        return x[0]  # type: ignore
+
+    def proj_b_(x: _FST) -> _FST:
+        return x[1]  # type: ignore
 
+    @trusted
     def finset_pullback_univ(u: FinSetMorphism, v: FinSetMorphism) -> FinSetMorphism:
         assert u.dom == v.dom
         assert u.cod == f.dom and v.cod == g.dom
         assert all(finset_composition(f, u)(x) == finset_composition(g, v)(x) for x in u.dom)
-        return e.univ(p.univ(u, v))
+        return FinSetTableMorphism(u.dom, apex, {x: (u(x), v(x)) for x in u.dom})
 
     return FinSetPullbackCone(
-        e.apex, finset_composition(p.proj_a, e.proj), finset_composition(p.proj_b, e.proj), finset_pullback_univ
+        apex, FinSetMorphism(apex, f.dom, proj_a_), FinSetMorphism(apex, g.dom, proj_b_), finset_pullback_univ
     )
 
 
+@instrumented
+@trusted
 def finset_pushout_complement(
     f_or_g: FinSetMorphism, proj_b_or_c: FinSetMorphism, pushout_apex: FinSetObject
 ) -> Tuple[FinSetObject, FinSetMorphism, FinSetMorphism]:
@@ -318,7 +477,7 @@ def finset_pushout_complement(
     mapped_f_or_g_dom = map(proj_b_or_c_f_or_g, f_or_g.dom)
     complement = FinSetObject(apex_less_b_or_c.union(mapped_f_or_g_dom))
 
-    proj_c_or_b = FinSetMorphism(complement, pushout_apex, lambda a: a)
-    g_or_f = FinSetMorphism(f_or_g.dom, complement, lambda a: proj_b_or_c_f_or_g(a))
+    proj_c_or_b = FinSetTableMorphism(complement, pushout_apex, {a: a for a in complement})
+    g_or_f = FinSetTableMorphism(f_or_g.dom, complement, finset_tabulate(proj_b_or_c_f_or_g).table)
 
     return complement, g_or_f, proj_c_or_b
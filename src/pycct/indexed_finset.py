@@ -0,0 +1,419 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Iterator, List, Tuple, Union, overload
+
+from .arrays import index_array, union_find
+from .base import (
+    Category,
+    CoCompleteCategory,
+    CoEqualizerCoCone,
+    CompleteCategory,
+    CoProductCoCone,
+    EqualizerCone,
+    InitialObject,
+    Morphism,
+    Object,
+    ProductCone,
+    Pullback,
+    PullbackCone,
+    Pushout,
+    PushoutCoCone,
+    TerminalObject,
+    deferred,
+)
+from .finset import _FST, FinSetMorphism, FinSetObject, FinSetTableMorphism
+from .instrumentation import counts_evaluations, instrumented, times_validation
+from .validation import trusted, validation_enabled
+
+
+class _Labels(Sequence[_FST]):
+    """Label side table computed on demand from the labels of the constituent objects."""
+
+    @overload
+    def __getitem__(self, i: int) -> _FST:
+        ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[_FST]:
+        ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[_FST, List[_FST]]:
+        if isinstance(i, slice):
+            return [self.label(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.label(i)
+
+    def label(self, i: int) -> _FST:
+        raise NotImplementedError()
+
+
+class _CoProductLabels(_Labels):
+    def __init__(self, a: "Sequence[_FST]", b: "Sequence[_FST]") -> None:
+        self.a, self.b = a, b
+
+    def __len__(self) -> int:
+        return len(self.a) + len(self.b)
+
+    def __eq__(self, other: object) -> bool:
+        return self is other or isinstance(other, _CoProductLabels) and (self.a, self.b) == (other.a, other.b)
+
+    def label(self, i: int) -> _FST:
+        return (self.a[i], 0) if i < len(self.a) else (self.b[i - len(self.a)], 1)
+
+
+class _ProductLabels(_Labels):
+    def __init__(self, a: "Sequence[_FST]", b: "Sequence[_FST]") -> None:
+        self.a, self.b = a, b
+
+    def __len__(self) -> int:
+        return len(self.a) * len(self.b)
+
+    def __eq__(self, other: object) -> bool:
+        return self is other or isinstance(other, _ProductLabels) and (self.a, self.b) == (other.a, other.b)
+
+    def label(self, i: int) -> _FST:
+        i_a, i_b = divmod(i, len(self.b))
+        return self.a[i_a], self.b[i_b]
+
+
+class _SubsetLabels(_Labels):
+    def __init__(self, a: "Sequence[_FST]", subset: "array[int]") -> None:
+        self.a, self.subset = a, subset
+
+    def __len__(self) -> int:
+        return len(self.subset)
+
+    def __eq__(self, other: object) -> bool:
+        return self is other or isinstance(other, _SubsetLabels) and (self.a, self.subset) == (other.a, other.subset)
+
+    def label(self, i: int) -> _FST:
+        return self.a[self.subset[i]]
+
+
+class _QuotientLabels(_Labels):
+    def __init__(self, a: "Sequence[_FST]", classes: "array[int]", num_classes: int) -> None:
+        self.a, self.classes, self.num_classes = a, classes, num_classes
+
+    def __len__(self) -> int:
+        return self.num_classes
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            self is other or isinstance(other, _QuotientLabels) and (self.a, self.classes) == (other.a, other.classes)
+        )
+
+    @cached_property
+    def _members_index(self) -> Tuple["array[int]", "array[int]"]:
+        """Elements ordered by class, and where each class starts among them."""
+        starts = index_array(bytes(8 * (self.num_classes + 1)))
+        for c in self.classes:
+            starts[c + 1] += 1
+        for c in range(self.num_classes):
+            starts[c + 1] += starts[c]
+
+        ordered = index_array(bytes(8 * len(self.classes)))
+        positions = starts[:-1]
+        for i, c in enumerate(self.classes):
+            ordered[positions[c]] = i
+            positions[c] += 1
+        return ordered, starts
+
+    def members(self, i: int) -> "array[int]":
+        ordered, starts = self._members_index
+        return ordered[starts[i] : starts[i + 1]]
+
+    def label(self, i: int) -> _FST:
+        return frozenset(map(self.a.__getitem__, self.members(i)))
+
+
+@dataclass(frozen=True, repr=False)
+class IndexedFinSetObject(Object):
+    """Finite set of the dense integers 0..size-1, with labels[i] naming element i."""
+
+    size: int
+    labels: Sequence[_FST] = field(hash=False)
+
+    def __post_init__(self) -> None:
+        assert len(self.labels) == self.size
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, IndexedFinSetObject):
+            return NotImplemented
+        # Objects are shared by the morphisms built on them, so most comparisons end here rather than on the labels.
+        if self is other or (self.size == other.size and self.labels is other.labels):
+            return True
+        return self.size == other.size and self.labels == other.labels
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.size))
+
+    def __contains__(self, x: object) -> bool:
+        return isinstance(x, int) and 0 <= x < self.size
+
+    @cached_property
+    def index(self) -> Dict[_FST, int]:
+        return {label: i for i, label in enumerate(self.labels)}
+
+
+@counts_evaluations
+@times_validation
+@dataclass(frozen=True, repr=False, slots=True)
+class IndexedFinSetMorphism(Morphism):
+    dom: IndexedFinSetObject
+    cod: IndexedFinSetObject
+    value: "array[int]" = field(hash=False)
+
+    def __post_init__(self) -> None:
+        assert len(self.value) == self.dom.size
+        if validation_enabled():
+            assert not self.value or (min(self.value) >= 0 and max(self.value) < self.cod.size)
+
+    def __call__(self, x: int) -> int:
+        return self.value[x]
+
+
+def indexed_finset(a: FinSetObject) -> IndexedFinSetObject:
+    labels = tuple(a)
+    return IndexedFinSetObject(len(labels), labels)
+
+
+@trusted
+def indexed_finset_morphism(
+    f: FinSetMorphism, dom: IndexedFinSetObject, cod: IndexedFinSetObject
+) -> IndexedFinSetMorphism:
+    cod_index = cod.index
+    return IndexedFinSetMorphism(dom, cod, index_array(cod_index[f(x)] for x in dom.labels))
+
+
+def indexed_finset_to_finset(a: IndexedFinSetObject) -> FinSetObject:
+    return FinSetObject(a.labels)
+
+
+@trusted
+def indexed_finset_morphism_to_finset(f: IndexedFinSetMorphism) -> FinSetTableMorphism:
+    dom_labels, cod_labels = f.dom.labels, f.cod.labels
+    return FinSetTableMorphism(
+        indexed_finset_to_finset(f.dom),
+        indexed_finset_to_finset(f.cod),
+        {dom_labels[i]: cod_labels[j] for i, j in enumerate(f.value)},
+    )
+
+
+def indexed_finset_source(m: IndexedFinSetMorphism) -> IndexedFinSetObject:
+    return m.dom
+
+
+def indexed_finset_target(m: IndexedFinSetMorphism) -> IndexedFinSetObject:
+    return m.cod
+
+
+@trusted
+def indexed_finset_identity(a: IndexedFinSetObject) -> IndexedFinSetMorphism:
+    return IndexedFinSetMorphism(a, a, index_array(range(a.size)))
+
+
+@trusted
+def indexed_finset_composition(f: IndexedFinSetMorphism, g: IndexedFinSetMorphism) -> IndexedFinSetMorphism:
+    if f.dom != g.cod:
+        raise ValueError(f"Composition of {f} * {g} failed with: {f.dom=} != {g.cod=}.")
+
+    return IndexedFinSetMorphism(g.dom, f.cod, index_array(map(f.value.__getitem__, g.value)))
+
+
+IndexedFinSetCategory = Category[IndexedFinSetObject, IndexedFinSetMorphism]
+IndexedFinSetInitialObject = InitialObject[IndexedFinSetObject, IndexedFinSetMorphism]
+IndexedFinSetTerminalObject = TerminalObject[IndexedFinSetObject, IndexedFinSetMorphism]
+IndexedFinSetCoProductCoCone = CoProductCoCone[IndexedFinSetObject, IndexedFinSetMorphism]
+IndexedFinSetProductCone = ProductCone[IndexedFinSetObject, IndexedFinSetMorphism]
+IndexedFinSetCoEqualizerCoCone = CoEqualizerCoCone[IndexedFinSetObject, IndexedFinSetMorphism]
+IndexedFinSetEqualizerCone = EqualizerCone[IndexedFinSetObject, IndexedFinSetMorphism]
+IndexedFinSetPushoutCoCone = PushoutCoCone[IndexedFinSetObject, IndexedFinSetMorphism]
+IndexedFinSetPullbackCone = PullbackCone[IndexedFinSetObject, IndexedFinSetMorphism]
+
+indexed_finset_category = IndexedFinSetCategory(
+    indexed_finset_source, indexed_finset_target, indexed_finset_identity, indexed_finset_composition
+)
+
+indexed_finset_initial_obj_ = IndexedFinSetObject(0, ())
+
+
+@trusted
+def indexed_finset_initial_obj_univ(a: IndexedFinSetObject) -> IndexedFinSetMorphism:
+    return IndexedFinSetMorphism(indexed_finset_initial_obj_, a, index_array())
+
+
+indexed_finset_initial_obj = IndexedFinSetInitialObject(indexed_finset_initial_obj_, indexed_finset_initial_obj_univ)
+
+
+indexed_finset_terminal_obj_ = IndexedFinSetObject(1, (None,))
+
+
+@trusted
+def indexed_finset_terminal_obj_univ(a: IndexedFinSetObject) -> IndexedFinSetMorphism:
+    return IndexedFinSetMorphism(a, indexed_finset_terminal_obj_, index_array(bytes(8 * a.size)))
+
+
+indexed_finset_terminal_obj = IndexedFinSetTerminalObject(
+    indexed_finset_terminal_obj_, indexed_finset_terminal_obj_univ
+)
+
+
+@instrumented
+@trusted
+def indexed_finset_coproduct(a: IndexedFinSetObject, b: IndexedFinSetObject) -> IndexedFinSetCoProductCoCone:
+    disjoint_union = IndexedFinSetObject(a.size + b.size, _CoProductLabels(a.labels, b.labels))
+    label_a = IndexedFinSetMorphism(a, disjoint_union, index_array(range(a.size)))
+    label_b = IndexedFinSetMorphism(b, disjoint_union, index_array(range(a.size, a.size + b.size)))
+
+    @trusted
+    def indexed_finset_coproduct_univ(p: IndexedFinSetMorphism, q: IndexedFinSetMorphism) -> IndexedFinSetMorphism:
+        assert p.cod == q.cod
+        assert p.dom == a and q.dom == b
+        return IndexedFinSetMorphism(disjoint_union, p.cod, p.value + q.value)
+
+    return IndexedFinSetCoProductCoCone(disjoint_union, label_a, label_b, indexed_finset_coproduct_univ)
+
+
+@instrumented
+@trusted
+def indexed_finset_product(a: IndexedFinSetObject, b: IndexedFinSetObject) -> IndexedFinSetProductCone:
+    cartesian_product = IndexedFinSetObject(a.size * b.size, _ProductLabels(a.labels, b.labels))
+    proj_a = IndexedFinSetMorphism(cartesian_product, a, index_array(i for i in range(a.size) for _ in range(b.size)))
+    proj_b = IndexedFinSetMorphism(cartesian_product, b, index_array(range(b.size)) * a.size)
+
+    @trusted
+    def indexed_finset_product_univ(p: IndexedFinSetMorphism, q: IndexedFinSetMorphism) -> IndexedFinSetMorphism:
+        assert p.dom == q.dom
+        assert p.cod == a and q.cod == b
+        return IndexedFinSetMorphism(
+            p.dom, cartesian_product, index_array(i * b.size + j for i, j in zip(p.value, q.value))
+        )
+
+    return IndexedFinSetProductCone(cartesian_product, proj_a, proj_b, indexed_finset_product_univ)
+
+
+@instrumented
+@trusted
+def indexed_finset_coequalizer(f: IndexedFinSetMorphism, g: IndexedFinSetMorphism) -> IndexedFinSetCoEqualizerCoCone:
+    assert f.dom == g.dom and f.cod == g.cod
+
+    classes, num_classes = union_find(f.cod.size, zip(f.value, g.value))
+    partitions_obj = IndexedFinSetObject(num_classes, _QuotientLabels(f.cod.labels, classes, num_classes))
+
+    representatives = index_array(bytes(8 * num_classes))
+    for x in reversed(range(f.cod.size)):
+        representatives[classes[x]] = x
+
+    @trusted
+    def indexed_finset_coequalizer_univ(q: IndexedFinSetMorphism) -> IndexedFinSetMorphism:
+        assert q.dom == f.cod
+        assert all(q.value[x] == q.value[y] for x, y in zip(f.value, g.value))
+        return IndexedFinSetMorphism(partitions_obj, q.cod, index_array(map(q.value.__getitem__, representatives)))
+
+    return IndexedFinSetCoEqualizerCoCone(
+        partitions_obj, IndexedFinSetMorphism(f.cod, partitions_obj, classes), indexed_finset_coequalizer_univ
+    )
+
+
+@instrumented
+@trusted
+def indexed_finset_equalizer(f: IndexedFinSetMorphism, g: IndexedFinSetMorphism) -> IndexedFinSetEqualizerCone:
+    a = f.dom
+    subset = index_array(i for i, (x, y) in enumerate(zip(f.value, g.value)) if x == y)
+    subset_obj = IndexedFinSetObject(len(subset), _SubsetLabels(a.labels, subset))
+
+    positions = index_array(b"\xff" * (8 * a.size))
+    for i, x in enumerate(subset):
+        positions[x] = i
+
+    @trusted
+    def indexed_finset_equalizer_univ(p: IndexedFinSetMorphism) -> IndexedFinSetMorphism:
+        assert p.cod == a
+        assert all(f.value[x] == g.value[x] for x in p.value)
+        return IndexedFinSetMorphism(p.dom, subset_obj, index_array(map(positions.__getitem__, p.value)))
+
+    return IndexedFinSetEqualizerCone(
+        subset_obj, IndexedFinSetMorphism(subset_obj, a, subset), indexed_finset_equalizer_univ
+    )
+
+
+IndexedFinSetCoComplete = CoCompleteCategory[IndexedFinSetObject, IndexedFinSetMorphism]
+IndexedFinSetComplete = CompleteCategory[IndexedFinSetObject, IndexedFinSetMorphism]
+
+indexed_finset_cocomplete = IndexedFinSetCoComplete(
+    indexed_finset_category, indexed_finset_coproduct, indexed_finset_coequalizer
+)
+indexed_finset_complete = IndexedFinSetComplete(
+    indexed_finset_category, indexed_finset_product, indexed_finset_equalizer
+)
+
+IndexedFinSetPushout = Pushout[IndexedFinSetMorphism, IndexedFinSetObject]
+IndexedFinSetPullback = Pullback[IndexedFinSetMorphism, IndexedFinSetObject]
+
+
+@instrumented
+@trusted
+def indexed_finset_pushout(f: IndexedFinSetMorphism, g: IndexedFinSetMorphism) -> IndexedFinSetPushoutCoCone:
+    assert f.dom == g.dom
+    cp = indexed_finset_coproduct(f.cod, g.cod)
+    ce = indexed_finset_coequalizer(indexed_finset_composition(cp.proj_a, f), indexed_finset_composition(cp.proj_b, g))
+
+    # The coproduct injections are the first f.cod.size and the remaining elements, so the projections are slices
+    # of the quotient map, built on first use. Neither they nor the universal map keep the coproduct alive.
+    classes, offset, apex = ce.proj.value, f.cod.size, ce.apex
+
+    @trusted
+    def indexed_finset_pushout_univ(u: IndexedFinSetMorphism, v: IndexedFinSetMorphism) -> IndexedFinSetMorphism:
+        assert u.cod == v.cod
+        assert u.dom == f.cod and v.dom == g.cod
+        value = index_array(bytes(8 * apex.size))
+        for x, y in zip(classes, u.value + v.value):
+            value[x] = y
+        return IndexedFinSetMorphism(apex, u.cod, value)
+
+    return IndexedFinSetPushoutCoCone(
+        apex,
+        deferred(trusted(lambda: IndexedFinSetMorphism(f.cod, apex, classes[:offset]))),
+        deferred(trusted(lambda: IndexedFinSetMorphism(g.cod, apex, classes[offset:]))),
+        indexed_finset_pushout_univ,
+    )
+
+
+@instrumented
+@trusted
+def indexed_finset_pullback(f: IndexedFinSetMorphism, g: IndexedFinSetMorphism) -> IndexedFinSetPullbackCone:
+    assert f.cod == g.cod
+    # Hash join: bucket g.dom by image, then stream f.dom past the buckets, so the product is never built. Pairs (i, j)
+    # of the apex are stored as i * g.dom.size + j, in increasing order since both i and each bucket ascend. The
+    # projections, built on first use, divide them out, and the universal map finds them by bisection.
+    size = g.dom.size
+    buckets: Dict[int, List[int]] = {}
+    for j, y in enumerate(g.value):
+        buckets.setdefault(y, []).append(j)
+    pairs = index_array(i * size + j for i, x in enumerate(f.value) for j in buckets.get(x, ()))
+    apex = IndexedFinSetObject(len(pairs), _SubsetLabels(_ProductLabels(f.dom.labels, g.dom.labels), pairs))
+
+    @trusted
+    def indexed_finset_pullback_univ(u: IndexedFinSetMorphism, v: IndexedFinSetMorphism) -> IndexedFinSetMorphism:
+        assert u.dom == v.dom
+        assert u.cod == f.dom and v.cod == g.dom
+        assert all(f.value[i] == g.value[j] for i, j in zip(u.value, v.value))
+        return IndexedFinSetMorphism(
+            u.dom, apex, index_array(bisect_left(pairs, i * size + j) for i, j in zip(u.value, v.value))
+        )
+
+    return IndexedFinSetPullbackCone(
+        apex,
+        deferred(trusted(lambda: IndexedFinSetMorphism(apex, f.dom, index_array(k // size for k in pairs)))),
+        deferred(trusted(lambda: IndexedFinSetMorphism(apex, g.dom, index_array(k % size for k in pairs)))),
+        indexed_finset_pullback_univ,
+    )
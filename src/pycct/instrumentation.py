@@ -0,0 +1,214 @@
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, cast
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+_C = TypeVar("_C", bound=type)
+
+
+@dataclass(frozen=True)
+class ConstructionRecord:
+    """One call of an instrumented construction. Times, evaluations and validation include nested constructions."""
+
+    name: str
+    # Seconds since the start of recording.
+    start: float
+    seconds: float
+    # Calls of morphisms, i.e. of their __call__, during the construction. Constructions that read a morphism's value
+    # or table directly, as most do internally, evaluate it without being counted, so this is a lower bound.
+    evaluations: int
+    # Seconds spent validating morphisms built during the construction.
+    validation_seconds: float
+    input_sizes: List[Any]
+    output_size: Any
+    # Number of instrumented constructions this one was called from.
+    depth: int
+
+
+@dataclass
+class Instrumentation:
+    """Records of the instrumented constructions called while recording, see instrument."""
+
+    records: List[ConstructionRecord] = field(default_factory=list)
+    evaluations: int = 0
+    validation_seconds: float = 0.0
+    depth: int = 0
+    validating: bool = False
+    started: float = field(default_factory=time.perf_counter)
+
+    def summary(self) -> str:
+        """Table of calls, total time, evaluations and validation time per construction, slowest first."""
+        totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0, 0.0])
+        for record in self.records:
+            total = totals[record.name]
+            total[0] += 1
+            total[1] += record.seconds
+            total[2] += record.evaluations
+            total[3] += record.validation_seconds
+
+        lines = [f"{'construction':40} {'calls':>8} {'seconds':>12} {'evaluations':>12} {'validation':>12}"]
+        for name, (calls, seconds, evaluations, validation_seconds) in sorted(
+            totals.items(), key=lambda item: -item[1][1]
+        ):
+            lines.append(f"{name:40} {calls:>8} {seconds:>12.6f} {evaluations:>12} {validation_seconds:>12.6f}")
+        return "\n".join(lines)
+
+    def trace_events(self) -> List[Dict[str, Any]]:
+        """Records as complete events of the Chrome trace event format, viewable in chrome://tracing or Perfetto."""
+        return [
+            {
+                "name": record.name,
+                "ph": "X",
+                "ts": record.start * 1e6,
+                "dur": record.seconds * 1e6,
+                "pid": 0,
+                "tid": 0,
+                "args": {
+                    "evaluations": record.evaluations,
+                    "validation_seconds": record.validation_seconds,
+                    "input_sizes": record.input_sizes,
+                    "output_size": record.output_size,
+                },
+            }
+            for record in self.records
+        ]
+
+    def write_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events()}, f)
+
+
+# Constructions are only wrapped for recording when this is set on import, so that they cost nothing otherwise.
+INSTRUMENTATION_ENABLED = os.environ.get("PYCCT_INSTRUMENTATION", "") not in ("", "0")
+
+_instrumentation: Optional[Instrumentation] = None
+
+_evaluated_classes: List[type] = []
+_validated_classes: List[type] = []
+
+
+def size(x: Any) -> Any:
+    """Size of an object, morphism (its domain) or cone (its apex), as (nodes, edges) for graphs."""
+    if hasattr(x, "apex"):
+        return size(x.apex)
+    if hasattr(x, "nodes") and hasattr(x, "edges"):
+        return [len(x.nodes), len(x.edges)]
+    if hasattr(x, "dom") and hasattr(x, "cod"):
+        return size(x.dom)
+    if isinstance(x, tuple):
+        return [size(y) for y in x]
+    if hasattr(x, "__len__"):
+        return len(x)
+    return None
+
+
+def instrumented(fn: _F) -> _F:
+    """Record the calls of a construction while instrumentation is on, see INSTRUMENTATION_ENABLED."""
+    if not INSTRUMENTATION_ENABLED:
+        return fn
+    name = fn.__qualname__
+
+    @wraps(fn)
+    def instrumented_(*args: Any, **kwargs: Any) -> Any:
+        instrumentation = _instrumentation
+        if instrumentation is None:
+            return fn(*args, **kwargs)
+
+        evaluations, validation_seconds = instrumentation.evaluations, instrumentation.validation_seconds
+        instrumentation.depth += 1
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            instrumentation.depth -= 1
+        instrumentation.records.append(
+            ConstructionRecord(
+                name,
+                start - instrumentation.started,
+                seconds,
+                instrumentation.evaluations - evaluations,
+                instrumentation.validation_seconds - validation_seconds,
+                [size(arg) for arg in args],
+                size(result),
+                instrumentation.depth,
+            )
+        )
+        return result
+
+    return cast(_F, instrumented_)
+
+
+def counts_evaluations(cls: _C) -> _C:
+    """Count the calls of the morphism class while instrumentation is on."""
+    _evaluated_classes.append(cls)
+    return cls
+
+
+def times_validation(cls: _C) -> _C:
+    """Time the __post_init__ validation of the morphism class while instrumentation is on."""
+    _validated_classes.append(cls)
+    return cls
+
+
+def _counting_call(call: Callable[..., Any]) -> Callable[..., Any]:
+    @wraps(call)
+    def counting_call_(self: Any, x: Any) -> Any:
+        cast(Instrumentation, _instrumentation).evaluations += 1
+        return call(self, x)
+
+    return counting_call_
+
+
+def _timed_post_init(post_init: Callable[..., Any]) -> Callable[..., Any]:
+    @wraps(post_init)
+    def timed_post_init_(self: Any) -> None:
+        instrumentation = cast(Instrumentation, _instrumentation)
+        # Only the outermost validation is timed, subclasses call their parent's.
+        if instrumentation.validating:
+            post_init(self)
+            return
+        instrumentation.validating = True
+        start = time.perf_counter()
+        try:
+            post_init(self)
+        finally:
+            instrumentation.validation_seconds += time.perf_counter() - start
+            instrumentation.validating = False
+
+    return timed_post_init_
+
+
+@contextmanager
+def instrument() -> Iterator[Instrumentation]:
+    """Record the instrumented constructions called within the block.
+
+    Morphism calls and validation are only counted and timed within the block, so there is no cost outside it. The
+    constructions are only recorded if the PYCCT_INSTRUMENTATION environment variable was set when pycct was imported.
+    """
+    global _instrumentation
+    assert _instrumentation is None, "instrumentation is already on"
+    if not INSTRUMENTATION_ENABLED:
+        raise RuntimeError("Set PYCCT_INSTRUMENTATION=1 before importing pycct to record constructions.")
+
+    patched: List[Tuple[type, str, Callable[[Callable[..., Any]], Callable[..., Any]]]] = [
+        (cls, "__call__", _counting_call) for cls in _evaluated_classes if "__call__" in vars(cls)
+    ]
+    patched += [(cls, "__post_init__", _timed_post_init) for cls in _validated_classes if "__post_init__" in vars(cls)]
+    originals = [(cls, attribute, vars(cls)[attribute]) for cls, attribute, _ in patched]
+
+    _instrumentation = Instrumentation()
+    for cls, attribute, wrapper in patched:
+        setattr(cls, attribute, wrapper(vars(cls)[attribute]))
+    try:
+        yield _instrumentation
+    finally:
+        for cls, attribute, original in originals:
+            setattr(cls, attribute, original)
+        _instrumentation = None
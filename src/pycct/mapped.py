@@ -0,0 +1,170 @@
+import mmap
+import struct
+from typing import AbstractSet, Any, Iterator, Sequence, Tuple, Union, cast
+
+from .arrays import csr_index
+from .base import Object
+from .encoding import FinGraphEncoding, fingraph_decode, fingraph_encode
+from .fingraph import FinGraphObject
+from .finset import _FST, FinSetMorphism, FinSetObject
+from .indexed_finset import _Labels
+from .serialization import _GRAPH, _HEADER_OFFSET, _chunks, _decode_label, _read_arrays
+from .validation import trusted
+
+
+def fingraph_save(a: Union[FinGraphObject, FinGraphEncoding], path: str) -> None:
+    """Write a to path in the binary format of serialize, followed by its out- and in-edge indexes, to be opened as a
+    MappedFinGraph. The offsets of the labels are written too, so that they can be decoded one at a time."""
+    encoding = fingraph_encode(a) if isinstance(a, FinGraphObject) else a
+    num_nodes = len(encoding.node_labels)
+    indexes = csr_index(encoding.source, num_nodes) + csr_index(encoding.target, num_nodes)
+    with open(path, "wb") as f:
+        for chunk in _chunks(encoding, indexes, index_labels=True):
+            f.write(chunk)
+
+
+class _RangeSet(AbstractSet[int], Object):
+    """The integers 0..size-1, with membership and size answered by a range rather than a frozenset of them."""
+
+    __slots__ = ("range",)
+
+    def __init__(self, size: int) -> None:
+        self.range = range(size)
+
+    def __contains__(self, x: object) -> bool:
+        # A range looks for other types by iterating over itself.
+        return isinstance(x, int) and x in self.range
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.range)
+
+    def __len__(self) -> int:
+        return len(self.range)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _RangeSet):
+            return self.range == other.range
+        return AbstractSet.__eq__(self, other)
+
+    def __hash__(self) -> int:
+        return self._hash()
+
+
+class _MappedLabels(_Labels):
+    """Labels in the header of a mapped file, decoded on each access from their offsets in it."""
+
+    def __init__(self, view: memoryview, offsets: Sequence[int]) -> None:
+        self._view = view
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def label(self, i: int) -> _FST:
+        label: _FST = _decode_label(self._view, self._offsets[i])[0]
+        return label
+
+    def __iter__(self) -> Iterator[_FST]:
+        view = self._view
+        for offset in self._offsets[:-1]:
+            yield _decode_label(view, offset)[0]
+
+
+def _mapped_labels(view: memoryview, offset: int, offsets: Sequence[int]) -> Tuple[Sequence[_FST], int]:
+    """Labels at offset in the header, given the offsets written by fingraph_save, and the offset following them."""
+    if not offsets:
+        # Written as a range.
+        return cast(Tuple[range, int], _decode_label(view, offset))
+    return _MappedLabels(view, offsets), offsets[-1]
+
+
+@trusted
+def _endpoint_morphism(edges: _RangeSet, nodes: _RangeSet, endpoints: Sequence[int]) -> FinSetMorphism:
+    def endpoint(e: _FST) -> _FST:
+        return endpoints[cast(int, e)]
+
+    # Only membership, size and iteration are asked of the domain and codomain.
+    return FinSetMorphism(cast(FinSetObject, edges), cast(FinSetObject, nodes), endpoint)
+
+
+class MappedFinGraph(Object):
+    """Graph written by fingraph_save, memory-mapped rather than read, so only the pages touched are loaded.
+
+    Its nodes and edges are the integers 0..n-1 and 0..m-1 numbering node_labels and edge_labels, and it answers the
+    queries of a FinGraphObject used by find_matches and satisfies_gluing_condition. Edges incident to a node are
+    found through the indexes in the file, and returned in increasing order. Nothing is read in proportion to the
+    size of the graph on opening: nodes and edges are ranges rather than frozensets, and labels are decoded from the
+    file as they are accessed.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap).cast("B")
+        arrays = _read_arrays(self._view)
+        (kind,) = struct.unpack_from("<q", self._view, _HEADER_OFFSET)
+        assert kind == _GRAPH and len(arrays) == 8, "not written by fingraph_save"
+        source, target, *indexes, node_offsets, edge_offsets = arrays
+        self._out_offsets, self._out_edges, self._in_offsets, self._in_edges = indexes
+        self._label_offsets = node_offsets, edge_offsets
+
+        self.node_labels, offset = _mapped_labels(self._view, _HEADER_OFFSET + 24, node_offsets)
+        self.edge_labels, _ = _mapped_labels(self._view, offset, edge_offsets)
+        self.encoding = FinGraphEncoding(self.node_labels, self.edge_labels, source, target)
+        self.nodes = _RangeSet(len(self.node_labels))
+        self.edges = _RangeSet(len(self.edge_labels))
+        self._source_map = source
+        self._target_map = target
+        self.source = _endpoint_morphism(self.edges, self.nodes, self._source_map)
+        self.target = _endpoint_morphism(self.edges, self.nodes, self._target_map)
+
+    def out_edges(self, node: int) -> Tuple[int, ...]:
+        return tuple(self._out_edges[self._out_offsets[node] : self._out_offsets[node + 1]])
+
+    def in_edges(self, node: int) -> Tuple[int, ...]:
+        return tuple(self._in_edges[self._in_offsets[node] : self._in_offsets[node + 1]])
+
+    def incident_edges(self, node: int) -> Tuple[int, ...]:
+        # Self-loops are both out- and in-edges, list them once.
+        source_map = self._source_map
+        return self.out_edges(node) + tuple(e for e in self.in_edges(node) if source_map[e] != node)
+
+    def edges_between(self, source: int, target: int) -> Tuple[int, ...]:
+        target_map = self._target_map
+        return tuple(e for e in self.out_edges(source) if target_map[e] == target)
+
+    def out_degree(self, node: int) -> int:
+        return self._out_offsets[node + 1] - self._out_offsets[node]
+
+    def in_degree(self, node: int) -> int:
+        return self._in_offsets[node + 1] - self._in_offsets[node]
+
+    def degree(self, node: int) -> int:
+        return self.out_degree(node) + self.in_degree(node)
+
+    def to_fingraph(self) -> FinGraphObject:
+        """The graph read into memory, labelled by node_labels and edge_labels."""
+        return fingraph_decode(self.encoding)
+
+    def close(self) -> None:
+        """Unmap the file. The graph, and morphisms into it, are unusable afterwards."""
+        for view in (
+            self._source_map,
+            self._target_map,
+            self._out_offsets,
+            self._out_edges,
+            self._in_offsets,
+            self._in_edges,
+            *self._label_offsets,
+            self._view,
+        ):
+            if isinstance(view, memoryview):
+                view.release()
+        del self.encoding, self.node_labels, self.edge_labels, self.source, self.target
+        self._mmap.close()
+
+    def __enter__(self) -> "MappedFinGraph":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
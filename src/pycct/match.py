@@ -0,0 +1,292 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import permutations, product
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, cast
+
+from .base import deferred
+from .encoding import FinGraphEncoding, fingraph_encode
+from .fingraph import FinGraphMorphism, FinGraphObject
+from .finset import _FST, FinSetTableMorphism
+from .validation import trusted
+
+
+_ElementMap = Dict[_FST, _FST]
+
+
+@dataclass(frozen=True, repr=False)
+class MatchPlan:
+    """Order in which the nodes of a pattern are matched, and the edges checked at each step."""
+
+    pattern: FinGraphObject
+    # Pattern nodes, each (but the first of a connected component) adjacent to an earlier one.
+    order: Tuple[_FST, ...]
+    # Per step, an earlier pattern node and whether the edge to it is outgoing from it, to draw candidates from.
+    anchors: Tuple[Optional[Tuple[_FST, bool]], ...]
+    # Per step, (source, target, multiplicity) of the pattern edges between the node and earlier nodes.
+    adjacency: Tuple[Tuple[Tuple[_FST, _FST, int], ...], ...]
+    # Pattern edges grouped by (source, target).
+    edge_groups: Tuple[Tuple[_FST, _FST, Tuple[_FST, ...]], ...]
+    out_degree: Dict[_FST, int]
+    in_degree: Dict[_FST, int]
+    loops: Dict[_FST, int]
+
+
+def match_plan(pattern: FinGraphObject, root: Optional[_FST] = None) -> MatchPlan:
+    """Plan the matching of pattern, starting from root if given."""
+    out_degree = {n: pattern.out_degree(n) for n in pattern.nodes}
+    in_degree = {n: pattern.in_degree(n) for n in pattern.nodes}
+
+    edge_groups = pattern._edges_between_index
+
+    # VF2-style ordering: most constrained first, i.e. most edges into the already ordered nodes, then highest degree.
+    order: List[_FST] = []
+    ordered: Set[_FST] = set()
+    connections: Dict[_FST, int] = {n: 0 for n in pattern.nodes}
+    while len(order) < len(connections):
+        if root is not None and not order:
+            node = root
+        else:
+            node = max(
+                (n for n in connections if n not in ordered),
+                key=lambda n: (connections[n], out_degree[n] + in_degree[n]),
+            )
+        order.append(node)
+        ordered.add(node)
+        for e in pattern.out_edges(node):
+            connections[pattern._target_map[e]] += 1
+        for e in pattern.in_edges(node):
+            connections[pattern._source_map[e]] += 1
+
+    anchors: List[Optional[Tuple[_FST, bool]]] = []
+    adjacency: List[Tuple[Tuple[_FST, _FST, int], ...]] = []
+    position = {n: i for i, n in enumerate(order)}
+    for i, node in enumerate(order):
+        anchor = None
+        for e in pattern.in_edges(node):
+            s = pattern._source_map[e]
+            if position[s] < i and (anchor is None or position[s] < position[anchor[0]]):
+                anchor = (s, True)
+        for e in pattern.out_edges(node):
+            t = pattern._target_map[e]
+            if position[t] < i and (anchor is None or position[t] < position[anchor[0]]):
+                anchor = (t, False)
+        anchors.append(anchor)
+        adjacency.append(
+            tuple(
+                (s, t, len(edges))
+                for (s, t), edges in edge_groups.items()
+                if node in (s, t) and position[s] <= i and position[t] <= i
+            )
+        )
+
+    return MatchPlan(
+        pattern,
+        tuple(order),
+        tuple(anchors),
+        tuple(adjacency),
+        tuple((s, t, edges) for (s, t), edges in edge_groups.items()),
+        out_degree,
+        in_degree,
+        {n: len(pattern.edges_between(n, n)) for n in pattern.nodes},
+    )
+
+
+def find_match_maps(
+    plan: MatchPlan, host: FinGraphObject, injective: bool, roots: Optional[Iterable[_FST]] = None
+) -> Iterator[Tuple[_ElementMap, _ElementMap]]:
+    """Lazily enumerate the matches of find_matches as their node and edge maps, which are fresh dicts."""
+    node_map: _ElementMap = {}
+    used: Set[_FST] = set()
+
+    def feasible(step: int, p: _FST, h: _FST) -> bool:
+        out_degree, in_degree = host.out_degree(h), host.in_degree(h)
+        if injective:
+            if h in used or out_degree < plan.out_degree[p] or in_degree < plan.in_degree[p]:
+                return False
+            if len(host.edges_between(h, h)) < plan.loops[p]:
+                return False
+        elif (plan.out_degree[p] and not out_degree) or (plan.in_degree[p] and not in_degree):
+            return False
+
+        for s, t, count in plan.adjacency[step]:
+            host_s = h if s == p else node_map[s]
+            host_t = h if t == p else node_map[t]
+            if len(host.edges_between(host_s, host_t)) < (count if injective else 1):
+                return False
+        return True
+
+    def candidates(step: int) -> Iterable[_FST]:
+        anchor = plan.anchors[step]
+        if step == 0 and roots is not None:
+            return roots
+        if anchor is None:
+            return host.nodes
+        q, outgoing = anchor
+        if outgoing:
+            return dict.fromkeys(host._target_map[e] for e in host.out_edges(node_map[q]))
+        return dict.fromkeys(host._source_map[e] for e in host.in_edges(node_map[q]))
+
+    def edge_maps() -> Iterator[_ElementMap]:
+        options = []
+        for s, t, edges in plan.edge_groups:
+            host_edges = host.edges_between(node_map[s], node_map[t])
+            if injective:
+                options.append([(edges, choice) for choice in permutations(host_edges, len(edges))])
+            else:
+                options.append([(edges, choice) for choice in product(host_edges, repeat=len(edges))])
+        for assignment in product(*options):
+            edge_map: _ElementMap = {}
+            for edges, choice in assignment:
+                edge_map.update(zip(edges, choice))
+            yield edge_map
+
+    def extend(step: int) -> Iterator[Tuple[_ElementMap, _ElementMap]]:
+        if step == len(plan.order):
+            for edge_map in edge_maps():
+                yield dict(node_map), edge_map
+            return
+
+        p = plan.order[step]
+        for h in candidates(step):
+            if not feasible(step, p, h):
+                continue
+            node_map[p] = h
+            used.add(h)
+            yield from extend(step + 1)
+            del node_map[p]
+            used.discard(h)
+
+    return extend(0)
+
+
+@trusted
+def match_morphism(
+    pattern: FinGraphObject, host: FinGraphObject, node_map: _ElementMap, edge_map: _ElementMap
+) -> FinGraphMorphism:
+    """The match of pattern in host with the given node and edge maps, which are not validated."""
+    # The host's nodes and edges are built on first use for a version of a graph, see FinGraphObject.
+    return FinGraphMorphism(
+        pattern,
+        host,
+        FinSetTableMorphism(pattern.nodes, deferred(lambda: host.nodes), node_map),
+        FinSetTableMorphism(pattern.edges, deferred(lambda: host.edges), edge_map),
+    )
+
+
+def find_matches(
+    pattern: FinGraphObject,
+    host: FinGraphObject,
+    injective: bool = True,
+    plan: Optional[MatchPlan] = None,
+    roots: Optional[Iterable[_FST]] = None,
+) -> Iterator[FinGraphMorphism]:
+    """Lazily enumerate the (by default injective) graph morphisms from pattern into host.
+
+    With roots, only those mapping the first node of the plan to one of the roots are enumerated.
+    """
+    if plan is None:
+        plan = match_plan(pattern)
+    assert plan.pattern == pattern
+
+    for node_map, edge_map in find_match_maps(plan, host, injective, roots):
+        yield match_morphism(pattern, host, node_map, edge_map)
+
+
+def _encoded_plan(plan: MatchPlan, pattern: FinGraphEncoding) -> MatchPlan:
+    """plan, for the graph encoded by pattern."""
+    node_index, edge_index = pattern.node_index, pattern.edge_index
+    node = node_index.__getitem__
+    return MatchPlan(
+        pattern.graph(),
+        tuple(map(node, plan.order)),
+        tuple(None if anchor is None else (node(anchor[0]), anchor[1]) for anchor in plan.anchors),
+        tuple(tuple((node(s), node(t), count) for s, t, count in step) for step in plan.adjacency),
+        tuple((node(s), node(t), tuple(edge_index[e] for e in edges)) for s, t, edges in plan.edge_groups),
+        {node(n): degree for n, degree in plan.out_degree.items()},
+        {node(n): degree for n, degree in plan.in_degree.items()},
+        {node(n): loops for n, loops in plan.loops.items()},
+    )
+
+
+# Host, plan and injectivity of the search in a worker process, set once by _init_worker.
+_worker_search: Optional[Tuple[FinGraphObject, MatchPlan, bool]] = None
+
+
+def _init_worker(
+    num_nodes: int, source: Sequence[int], target: Sequence[int], plan: MatchPlan, injective: bool
+) -> None:
+    global _worker_search
+    host = FinGraphEncoding(range(num_nodes), range(len(source)), source, target)
+    _worker_search = (host.graph(), plan, injective)
+
+
+def _match_roots(roots: Sequence[int]) -> List[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """Matches from roots, as the host nodes and edges of the pattern nodes and edges 0, 1, ..."""
+    assert _worker_search is not None
+    host, plan, injective = _worker_search
+    pattern_nodes, pattern_edges = range(len(plan.pattern.nodes)), range(len(plan.pattern.edges))
+    matches: List[Tuple[Tuple[int, ...], Tuple[int, ...]]] = []
+    for node_map, edge_map in find_match_maps(plan, host, injective, roots):
+        # The host is encoded, so its nodes and edges are ints.
+        node_ids = tuple(cast(int, node_map[n]) for n in pattern_nodes)
+        edge_ids = tuple(cast(int, edge_map[e]) for e in pattern_edges)
+        matches.append((node_ids, edge_ids))
+    return matches
+
+
+def find_matches_parallel(
+    pattern: FinGraphObject,
+    host: FinGraphObject,
+    injective: bool = True,
+    plan: Optional[MatchPlan] = None,
+    roots: Optional[Iterable[_FST]] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[FinGraphMorphism]:
+    """Enumerate the matches of find_matches, in the same order, searching from chunks of the roots (by default all
+    host nodes) in a pool of max_workers processes.
+
+    The host and plan are encoded (see fingraph_encode), and only the number of host nodes, the host edge endpoints
+    and the plan are shipped to each worker once. Workers return matches as tuples of integers, mapped back to the
+    host labels here. Chunks are searched ahead of the consumer, their matches held until yielded.
+    """
+    if plan is None:
+        plan = match_plan(pattern)
+    assert plan.pattern == pattern
+    if not plan.order:
+        yield from find_matches(pattern, host, injective, plan, roots)
+        return
+
+    pattern_encoding, host_encoding = fingraph_encode(pattern), fingraph_encode(host)
+    if roots is None:
+        root_ids: List[int] = list(range(len(host_encoding.node_labels)))
+    else:
+        root_ids = list(map(host_encoding.node_index.__getitem__, roots))
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # A few chunks per worker, to balance the uneven search below each root.
+        chunk_size = max(1, -(-len(root_ids) // (4 * max_workers)))
+    chunks = [root_ids[i : i + chunk_size] for i in range(0, len(root_ids), chunk_size)]
+
+    pattern_nodes, pattern_edges = pattern_encoding.node_labels, pattern_encoding.edge_labels
+    host_node, host_edge = host_encoding.node_labels.__getitem__, host_encoding.edge_labels.__getitem__
+    executor = ProcessPoolExecutor(
+        max_workers,
+        initializer=_init_worker,
+        initargs=(
+            len(host_encoding.node_labels),
+            host_encoding.source,
+            host_encoding.target,
+            _encoded_plan(plan, pattern_encoding),
+            injective,
+        ),
+    )
+    try:
+        for matches in executor.map(_match_roots, chunks):
+            for node_ids, edge_ids in matches:
+                node_map = dict(zip(pattern_nodes, map(host_node, node_ids)))
+                edge_map = dict(zip(pattern_edges, map(host_edge, edge_ids)))
+                yield match_morphism(pattern, host, node_map, edge_map)
+    finally:
+        executor.shutdown(cancel_futures=True)
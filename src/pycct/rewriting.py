@@ -0,0 +1,207 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import cached_property
+from itertools import chain, islice
+from random import Random
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from .dpo import DoublePushoutRule, RewriteDelta, double_pushout_edit, match_footprint
+from .fingraph import FinGraphMorphism, FinGraphObject
+from .finset import _FST
+from .instrumentation import instrumented
+from .match import MatchPlan, find_match_maps, find_matches, match_morphism, match_plan
+from .validation import trusted
+
+
+_MatchKey = Tuple[Tuple[_FST, ...], Tuple[_FST, ...]]
+
+
+class MatchStore:
+    """The matches of a pattern in a host, kept up to date through the deltas of the host's rewrites.
+
+    A rewrite invalidates only the stored matches with a deleted node or edge in their image, and any new match has
+    an added node or edge in its image, so only the neighbourhood of the added elements is searched for new matches.
+    The host is first searched when the store is first read, so stores that are never read cost nothing.
+    """
+
+    def __init__(
+        self, pattern: FinGraphObject, host: FinGraphObject, injective: bool = True, plan: Optional[MatchPlan] = None
+    ) -> None:
+        self.pattern = pattern
+        self.host = host
+        self.injective = injective
+        self._node_order = tuple(pattern.nodes)
+        self._edge_order = tuple(pattern.edges)
+        self._rooted_plans: Dict[_FST, MatchPlan] = {}
+        self._matches: Dict[_MatchKey, Tuple[Dict[_FST, _FST], Dict[_FST, _FST]]] = {}
+        # Matches by the host nodes and edges, tagged 0 and 1, in their image.
+        self._by_element: Dict[Tuple[int, _FST], Set[_MatchKey]] = defaultdict(set)
+        # The plan of the first search, None once done.
+        self._plan: Optional[MatchPlan] = plan or match_plan(pattern)
+
+    def _search(self) -> None:
+        if self._plan is not None:
+            for node_map, edge_map in find_match_maps(self._plan, self.host, self.injective):
+                self._add(node_map, edge_map)
+            self._plan = None
+
+    def _image(self, key: _MatchKey) -> Iterator[Tuple[int, _FST]]:
+        nodes, edges = key
+        return chain(((0, n) for n in nodes), ((1, e) for e in edges))
+
+    def _add(self, node_map: Dict[_FST, _FST], edge_map: Dict[_FST, _FST]) -> None:
+        key = tuple(map(node_map.__getitem__, self._node_order)), tuple(map(edge_map.__getitem__, self._edge_order))
+        if key in self._matches:
+            return
+        self._matches[key] = node_map, edge_map
+        for x in self._image(key):
+            self._by_element[x].add(key)
+
+    def _discard(self, key: _MatchKey) -> None:
+        if self._matches.pop(key, None) is None:
+            return
+        for x in self._image(key):
+            keys = self._by_element[x]
+            keys.discard(key)
+            if not keys:
+                del self._by_element[x]
+
+    def __len__(self) -> int:
+        self._search()
+        return len(self._matches)
+
+    def __iter__(self) -> Iterator[FinGraphMorphism]:
+        """Lazily enumerate the stored matches, as morphisms into the current host, oldest first."""
+        self._search()
+        for node_map, edge_map in self._matches.values():
+            yield match_morphism(self.pattern, self.host, node_map, edge_map)
+
+    def update(self, host: FinGraphObject, delta: RewriteDelta) -> None:
+        """Bring the store up to date with host, the result of a rewrite of the current host with the given delta."""
+        if self._plan is not None:
+            self.host = host
+            return
+        deleted = chain(((0, n) for n in delta.deleted_nodes), ((1, e) for e in delta.deleted_edges))
+        for x in deleted:
+            for key in tuple(self._by_element.get(x, ())):
+                self._discard(key)
+
+        self.host = host
+        roots = set(delta.added_nodes)
+        for e in delta.added_edges:
+            roots.update((host._source_map[e], host._target_map[e]))
+        if not roots:
+            return
+        for p in self._node_order:
+            if p not in self._rooted_plans:
+                self._rooted_plans[p] = match_plan(self.pattern, root=p)
+            for node_map, edge_map in find_match_maps(self._rooted_plans[p], host, self.injective, roots):
+                self._add(node_map, edge_map)
+
+
+class RewriteStrategy(Enum):
+    # Apply the first match of the first rule that has one.
+    PRIORITY = "priority"
+    # Apply a match drawn uniformly from the matches of all rules.
+    RANDOM = "random"
+    # Apply a maximal set of parallel independent matches, taken greedily in rule priority order, at once.
+    PARALLEL = "parallel"
+
+
+@dataclass(frozen=True, repr=False)
+class RewritingSystem:
+    """Rules, in priority order, applied to a host graph one step at a time until none applies.
+
+    Steps edit the host incrementally (see double_pushout_incremental), so the host's adjacency indexes are carried
+    over from one step to the next, and the match plans of the rules are built once. When stepping through steps or
+    run, the matches of each rule are kept in a MatchStore and updated incrementally rather than searched for again.
+    """
+
+    rules: Sequence[DoublePushoutRule]
+    strategy: Union[RewriteStrategy, str] = RewriteStrategy.PRIORITY
+    random: Random = field(default_factory=Random)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "rules", tuple(self.rules))
+        object.__setattr__(self, "strategy", RewriteStrategy(self.strategy))
+
+    @cached_property
+    def plans(self) -> Tuple[MatchPlan, ...]:
+        return tuple(rule.compile().plan for rule in self.rules)
+
+    def match_stores(self, host: FinGraphObject) -> List[MatchStore]:
+        """Per rule, a store of the matches of its left hand side in host, searched for when first read."""
+        return [MatchStore(rule.precondition_map.cod, host, plan=plan) for rule, plan in zip(self.rules, self.plans)]
+
+    def matches(
+        self, host: FinGraphObject, stores: Optional[Sequence[MatchStore]] = None
+    ) -> Iterator[Tuple[DoublePushoutRule, FinGraphMorphism]]:
+        """Lazily enumerate the (rule, match) pairs at which a rule can be applied to host, in rule priority order.
+
+        With stores, the matches are taken from them rather than searched for.
+        """
+        for i, (rule, plan) in enumerate(zip(self.rules, self.plans)):
+            compiled = rule.compile()
+            matches: Iterable[FinGraphMorphism]
+            if stores is None:
+                matches = find_matches(rule.precondition_map.cod, host, plan=plan)
+            else:
+                assert stores[i].host is host
+                matches = stores[i]
+            for match in matches:
+                if compiled.satisfies_gluing_condition(match):
+                    yield rule, match
+
+    def select(
+        self, host: FinGraphObject, stores: Optional[Sequence[MatchStore]] = None
+    ) -> List[Tuple[DoublePushoutRule, FinGraphMorphism]]:
+        """The parallel independent (rule, match) pairs the strategy applies in the next step, none at a fixpoint."""
+        if self.strategy is RewriteStrategy.PRIORITY:
+            return list(islice(self.matches(host, stores), 1))
+        if self.strategy is RewriteStrategy.RANDOM:
+            candidates = list(self.matches(host, stores))
+            return [self.random.choice(candidates)] if candidates else []
+
+        selected: List[Tuple[DoublePushoutRule, FinGraphMorphism]] = []
+        claimed: Set[_FST] = set()
+        deleted: Set[_FST] = set()
+        for rule, match in self.matches(host, stores):
+            image, match_deleted = match_footprint(rule, match)
+            if claimed.isdisjoint(match_deleted) and deleted.isdisjoint(image):
+                selected.append((rule, match))
+                claimed.update(image)
+                deleted.update(match_deleted)
+        return selected
+
+    @instrumented
+    @trusted
+    def step(
+        self, host: FinGraphObject, stores: Optional[Sequence[MatchStore]] = None
+    ) -> Optional[Tuple[FinGraphObject, RewriteDelta]]:
+        """Rewrite host once, returning the result and what changed, or None if no rule applies.
+
+        The stores, if given, are updated to the result.
+        """
+        selected = self.select(host, stores)
+        if not selected:
+            return None
+        after, delta = double_pushout_edit(host, selected)
+        for store in stores or ():
+            store.update(after, delta)
+        return after, delta
+
+    def steps(self, host: FinGraphObject) -> Iterator[Tuple[FinGraphObject, RewriteDelta]]:
+        """Lazily rewrite host step by step until no rule applies."""
+        stores = self.match_stores(host)
+        result = self.step(host, stores)
+        while result is not None:
+            yield result
+            host, _ = result
+            result = self.step(host, stores)
+
+    def run(self, host: FinGraphObject, max_steps: Optional[int] = None) -> FinGraphObject:
+        """Rewrite host until no rule applies or max_steps steps have been taken."""
+        for host, _ in islice(self.steps(host), max_steps):
+            pass
+        return host
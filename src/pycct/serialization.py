@@ -0,0 +1,288 @@
+"""Binary format for graphs, graph morphisms and double pushout rules.
+
+A serialized object is its graphs and morphisms encoded over the dense integers (see encoding), laid out as
+
+    magic                    8 bytes, b"PYCCT" and the format version
+    header size, count       little endian int64s, the size of the header and the number of arrays
+    header                   little endian int64s, the kind of object and its numbers of graphs and morphisms, then
+                             the node and edge labels of each graph (see _encode_label), then the (dom, cod)
+                             indices of each morphism
+    arrays                   little endian int64s, per graph its sources and targets, then per morphism its node
+                             and edge maps, then any extra arrays such as the indexes written by fingraph_save,
+                             each aligned to 8 bytes and preceded by its length
+
+Labels are restricted to None, bools, ints, floats, strings, bytes, and tuples, frozensets, ranges and FreshLabels of
+these, so loading data, unlike unpickling it, never runs code.
+"""
+import copyreg
+import struct
+import sys
+from array import array
+from typing import Any, Iterator, List, Sequence, Tuple, Union
+
+from .arrays import INDEX_TYPECODE, index_array
+from .dpo import DoublePushoutRule, FreshLabel, _reserve_fresh_uids
+from .encoding import (
+    FinGraphEncoding,
+    FinGraphMorphismEncoding,
+    fingraph_decode,
+    fingraph_encode,
+    fingraph_morphism_decode,
+    fingraph_morphism_encode,
+)
+from .fingraph import FinGraphMorphism, FinGraphObject
+
+
+MAGIC = b"PYCCT\x00\x00\x02"
+
+_GRAPH, _MORPHISM, _RULE = 0, 1, 2
+
+# Type tags of the label encoding.
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _BYTES, _TUPLE, _FROZENSET, _RANGE, _FRESH = b"NFTifsbtzrl"
+
+_Serializable = Union[FinGraphObject, FinGraphEncoding, FinGraphMorphism, DoublePushoutRule]
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+# The header follows the magic bytes and the header and array counts.
+_HEADER_OFFSET = len(MAGIC) + 16
+
+
+def _padding(size: int) -> bytes:
+    return bytes(-size % 8)
+
+
+def _int64_bytes(values: Sequence[int]) -> Any:
+    if _LITTLE_ENDIAN and isinstance(values, (array, memoryview)) and memoryview(values).format == INDEX_TYPECODE:
+        return memoryview(values).cast("B")
+    values = index_array(values)
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _encode_label(x: Any, out: bytearray) -> None:
+    """Append x to out as its type tag followed by its value: int64 lengths and counts, two's complement ints, IEEE
+    doubles, UTF-8 strings, and the items of tuples and frozensets and the origin and uid of FreshLabels, each encoded
+    in turn."""
+    kind = type(x)
+    if x is None:
+        out.append(_NONE)
+    elif kind is bool:
+        out.append(_TRUE if x else _FALSE)
+    elif kind is int:
+        value = x.to_bytes(x.bit_length() // 8 + 1, "little", signed=True)
+        out.append(_INT)
+        out += struct.pack("<q", len(value))
+        out += value
+    elif kind is float:
+        out.append(_FLOAT)
+        out += struct.pack("<d", x)
+    elif kind is str or kind is bytes:
+        value = x.encode() if kind is str else x
+        out.append(_STR if kind is str else _BYTES)
+        out += struct.pack("<q", len(value))
+        out += value
+    elif kind is tuple or kind is frozenset:
+        out.append(_TUPLE if kind is tuple else _FROZENSET)
+        out += struct.pack("<q", len(x))
+        for y in x:
+            _encode_label(y, out)
+    elif kind is range:
+        out.append(_RANGE)
+        out += struct.pack("<qqq", x.start, x.stop, x.step)
+    elif kind is FreshLabel:
+        out.append(_FRESH)
+        _encode_label(x.origin, out)
+        out += struct.pack("<q", x.uid)
+    else:
+        raise TypeError(f"Cannot serialize a label of type {kind.__name__}.")
+
+
+def _decode_label(data: memoryview, offset: int) -> Tuple[Any, int]:
+    """The label encoded by _encode_label at offset in data, and the offset after it."""
+    tag = data[offset]
+    offset += 1
+    if tag == _NONE:
+        return None, offset
+    if tag == _FALSE or tag == _TRUE:
+        return tag == _TRUE, offset
+    if tag == _FLOAT:
+        return struct.unpack_from("<d", data, offset)[0], offset + 8
+    if tag == _RANGE:
+        return range(*struct.unpack_from("<qqq", data, offset)), offset + 24
+    if tag == _FRESH:
+        origin, offset = _decode_label(data, offset)
+        (uid,) = struct.unpack_from("<q", data, offset)
+        # Labels created from now on must not collide with the loaded ones.
+        _reserve_fresh_uids(uid)
+        return FreshLabel(origin, uid), offset + 8
+
+    (length,) = struct.unpack_from("<q", data, offset)
+    offset += 8
+    if tag == _INT:
+        return int.from_bytes(data[offset : offset + length], "little", signed=True), offset + length
+    if tag == _STR:
+        return str(data[offset : offset + length], "utf-8"), offset + length
+    if tag == _BYTES:
+        return bytes(data[offset : offset + length]), offset + length
+    if tag == _TUPLE or tag == _FROZENSET:
+        items = []
+        for _ in range(length):
+            item, offset = _decode_label(data, offset)
+            items.append(item)
+        return (tuple(items) if tag == _TUPLE else frozenset(items)), offset
+    raise ValueError(f"Unknown label tag {tag!r}.")
+
+
+def _layout(x: _Serializable) -> Tuple[int, List[FinGraphEncoding], List[Tuple[int, int, FinGraphMorphismEncoding]]]:
+    if isinstance(x, FinGraphEncoding):
+        return _GRAPH, [x], []
+    if isinstance(x, FinGraphObject):
+        return _GRAPH, [fingraph_encode(x)], []
+    if isinstance(x, FinGraphMorphism):
+        m = fingraph_morphism_encode(x)
+        return _MORPHISM, [m.dom, m.cod], [(0, 1, m)]
+    if isinstance(x, DoublePushoutRule):
+        condition = fingraph_encode(x.precondition_map.dom)
+        l = fingraph_morphism_encode(x.precondition_map, dom=condition)
+        r = fingraph_morphism_encode(x.postcondition_map, dom=condition)
+        return _RULE, [condition, l.cod, r.cod], [(0, 1, l), (0, 2, r)]
+    raise TypeError(f"Cannot serialize {type(x).__name__}.")
+
+
+def _chunks(x: _Serializable, extra_arrays: Sequence[Sequence[int]] = (), index_labels: bool = False) -> Iterator[Any]:
+    """The binary format of x in order, with extra_arrays after those of its graphs and morphisms.
+
+    With index_labels, two more arrays follow for each graph, the file offsets of its node and edge labels and of the
+    end of each, so that they can be decoded one at a time. They are empty for labels written as a range.
+    """
+    kind, graphs, morphisms = _layout(x)
+    header = bytearray(struct.pack("<qqq", kind, len(graphs), len(morphisms)))
+    label_offsets: List[Sequence[int]] = []
+    for g in graphs:
+        for labels in (g.node_labels, g.edge_labels):
+            # Kept as a range where the encoding made one, see fingraph_encode.
+            if isinstance(labels, range):
+                _encode_label(labels, header)
+                label_offsets.append(())
+                continue
+            header.append(_TUPLE)
+            header += struct.pack("<q", len(labels))
+            offsets = index_array()
+            for label in labels:
+                offsets.append(_HEADER_OFFSET + len(header))
+                _encode_label(label, header)
+            offsets.append(_HEADER_OFFSET + len(header))
+            label_offsets.append(offsets)
+    for dom, cod, _ in morphisms:
+        header += struct.pack("<qq", dom, cod)
+    arrays: List[Sequence[int]] = [a for g in graphs for a in (g.source, g.target)]
+    arrays += [a for _, _, m in morphisms for a in (m.node_map, m.edge_map)]
+    arrays += extra_arrays
+    if index_labels:
+        arrays += label_offsets
+
+    yield MAGIC
+    yield struct.pack("<qq", len(header), len(arrays))
+    yield header
+    yield _padding(len(header))
+    for a in arrays:
+        yield struct.pack("<q", len(a))
+        yield _int64_bytes(a)
+
+
+def serialize(x: _Serializable) -> bytes:
+    """x in the binary format, its morphisms tabulated over their domains."""
+    return b"".join(_chunks(x))
+
+
+def _read_int64s(data: memoryview, offset: int, length: int) -> Sequence[int]:
+    raw = data[offset : offset + 8 * length]
+    if _LITTLE_ENDIAN:
+        return raw.cast(INDEX_TYPECODE)
+    values = index_array(raw.tobytes())
+    values.byteswap()
+    return values
+
+
+def _read_arrays(view: memoryview) -> List[Sequence[int]]:
+    """The integer arrays of the binary format in view, which follow its header, as views into it."""
+    assert view[: len(MAGIC)] == MAGIC, "not serialized by pycct, or by an incompatible version"
+    header_size, num_arrays = struct.unpack_from("<qq", view, len(MAGIC))
+    offset = _HEADER_OFFSET + header_size + len(_padding(header_size))
+    arrays: List[Sequence[int]] = []
+    for _ in range(num_arrays):
+        (length,) = struct.unpack_from("<q", view, offset)
+        arrays.append(_read_int64s(view, offset + 8, length))
+        offset += 8 + 8 * length
+    return arrays
+
+
+def _read(data: Any) -> Tuple[int, List[FinGraphEncoding], List[FinGraphMorphismEncoding], List[Sequence[int]]]:
+    """Kind, graph and morphism encodings, and any extra arrays, of the binary format in data."""
+    view = memoryview(data).cast("B")
+    arrays = _read_arrays(view)
+    (header_size,) = struct.unpack_from("<q", view, len(MAGIC))
+    offset = _HEADER_OFFSET
+    header_end = offset + header_size
+    kind, num_graphs, num_morphisms = struct.unpack_from("<qqq", view, offset)
+    offset += 24
+    graph_labels = []
+    for _ in range(num_graphs):
+        node_labels, offset = _decode_label(view, offset)
+        edge_labels, offset = _decode_label(view, offset)
+        graph_labels.append((node_labels, edge_labels))
+    morphism_ends = [struct.unpack_from("<qq", view, offset + 16 * i) for i in range(num_morphisms)]
+    assert offset + 16 * num_morphisms == header_end, "corrupt header"
+
+    graphs = [
+        FinGraphEncoding(node_labels, edge_labels, arrays[2 * i], arrays[2 * i + 1])
+        for i, (node_labels, edge_labels) in enumerate(graph_labels)
+    ]
+    morphism_arrays = arrays[2 * len(graphs) :]
+    morphisms = [
+        FinGraphMorphismEncoding(graphs[dom], graphs[cod], morphism_arrays[2 * i], morphism_arrays[2 * i + 1])
+        for i, (dom, cod) in enumerate(morphism_ends)
+    ]
+    return kind, graphs, morphisms, morphism_arrays[2 * len(morphisms) :]
+
+
+def deserialize(data: Any, decode: bool = True) -> Any:
+    """The object serialized into data, any bytes-like object such as bytes or an mmap.
+
+    With decode False, the encodings are returned instead (a pair of morphism encodings for a rule). Their integer
+    sequences are memoryviews into data rather than copies, and data must outlive them.
+    """
+    kind, graphs, morphisms, _ = _read(data)
+    if decode:
+        return _decode(kind, graphs, morphisms)
+    if kind == _GRAPH:
+        return graphs[0]
+    if kind == _MORPHISM:
+        return morphisms[0]
+    return morphisms[0], morphisms[1]
+
+
+def _decode(kind: int, graphs: List[FinGraphEncoding], morphisms: List[FinGraphMorphismEncoding]) -> _Serializable:
+    if kind == _GRAPH:
+        return fingraph_decode(graphs[0])
+    decoded = [fingraph_decode(g) for g in graphs]
+    if kind == _MORPHISM:
+        return fingraph_morphism_decode(morphisms[0], decoded[0], decoded[1])
+    l, r = morphisms
+    return DoublePushoutRule(
+        fingraph_morphism_decode(l, decoded[0], decoded[1]), fingraph_morphism_decode(r, decoded[0], decoded[2])
+    )
+
+
+def _reduce(x: _Serializable) -> Tuple[Any, Tuple[bytes]]:
+    return deserialize, (serialize(x),)
+
+
+def register_pickling() -> None:
+    """Pickle graphs, graph morphisms and rules through the binary format, as their FinSet morphisms may be closures
+    that pickle cannot handle. This changes how they pickle everywhere in the process, so is left to applications."""
+    copyreg.pickle(FinGraphObject, _reduce)
+    copyreg.pickle(FinGraphMorphism, _reduce)
+    copyreg.pickle(DoublePushoutRule, _reduce)
@@ -0,0 +1,68 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from functools import wraps
+from typing import Any, Callable, Collection, Iterator, Optional, TypeVar, Union, cast
+
+
+class ValidationMode(Enum):
+    FULL = "full"
+    SAMPLED = "sampled"
+    OFF = "off"
+
+
+SAMPLE_SIZE = 32
+
+# The process-wide mode, and a per-context override so that scoped modes do not leak into other threads or tasks.
+_default_validation_mode = ValidationMode.FULL
+_validation_mode: ContextVar[Optional[ValidationMode]] = ContextVar("validation_mode", default=None)
+
+_T = TypeVar("_T")
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def get_validation_mode() -> ValidationMode:
+    return _validation_mode.get() or _default_validation_mode
+
+
+def set_validation_mode(mode: Union[ValidationMode, str]) -> None:
+    global _default_validation_mode
+    _default_validation_mode = ValidationMode(mode)
+
+
+@contextmanager
+def validation_mode(mode: Union[ValidationMode, str]) -> Iterator[None]:
+    """Validate in the given mode within the current context only, or for a single call when used as a decorator."""
+    token = _validation_mode.set(ValidationMode(mode))
+    try:
+        yield
+    finally:
+        _validation_mode.reset(token)
+
+
+def trusted(fn: _F) -> _F:
+    """Skip validation of the morphisms built by an internal construction, whose inputs are already validated."""
+
+    @wraps(fn)
+    def trusted_(*args: Any, **kwargs: Any) -> Any:
+        token = _validation_mode.set(ValidationMode.OFF)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _validation_mode.reset(token)
+
+    return cast(_F, trusted_)
+
+
+def validation_enabled() -> bool:
+    return get_validation_mode() is not ValidationMode.OFF
+
+
+def validation_sample(elements: Collection[_T]) -> Collection[_T]:
+    mode = get_validation_mode()
+    if mode is ValidationMode.OFF:
+        return ()
+    if mode is ValidationMode.SAMPLED and len(elements) > SAMPLE_SIZE:
+        return random.sample(tuple(elements), SAMPLE_SIZE)
+    return elements
@@ -0,0 +1,34 @@
+from pycct import DoublePushoutRule, FinGraphMorphism, FinGraphObject, FinSetMorphism, FinSetObject
+
+
+def make_graph(nodes, edges):
+    nodes_obj = FinSetObject(nodes)
+    edges_obj = FinSetObject(edges)
+    return FinGraphObject(
+        nodes_obj,
+        edges_obj,
+        FinSetMorphism(edges_obj, nodes_obj, lambda e: edges[e][0]),
+        FinSetMorphism(edges_obj, nodes_obj, lambda e: edges[e][1]),
+    )
+
+
+def make_morphism(dom, cod, node_map, edge_map):
+    return FinGraphMorphism(
+        dom,
+        cod,
+        FinSetMorphism(dom.nodes, cod.nodes, lambda n: node_map[n]),
+        FinSetMorphism(dom.edges, cod.edges, lambda e: edge_map[e]),
+    )
+
+
+def inclusion(dom, cod):
+    return FinGraphMorphism(
+        dom, cod, FinSetMorphism(dom.nodes, cod.nodes, lambda x: x), FinSetMorphism(dom.edges, cod.edges, lambda x: x)
+    )
+
+
+def make_rule(condition_graph, precondition_graph, postcondition_graph):
+    """Rule whose condition graph is included in both its precondition and postcondition graphs."""
+    return DoublePushoutRule(
+        inclusion(condition_graph, precondition_graph), inclusion(condition_graph, postcondition_graph)
+    )
@@ -1,10 +1,19 @@
+import pytest
+from helpers import inclusion, make_graph, make_morphism, make_rule
 from pycct import (
     DoublePushoutRule,
     FinGraphMorphism,
     FinGraphObject,
     FinSetMorphism,
     FinSetObject,
+    FreshLabel,
+    are_parallel_independent,
     double_pushout,
+    double_pushout_incremental,
+    double_pushout_many,
+    double_pushout_matches,
+    find_matches,
+    satisfies_gluing_condition,
 )
 
 
@@ -193,3 +202,164 @@ def test_dpo():
             frozenset({("IK", 0)}),
         ]
     )
+
+
+def test_double_pushout_matches():
+    # Delete a leaf together with the edge pointing to it.
+    condition_graph = make_graph(["X"], {})
+    precondition_graph = make_graph(["X", "Y"], {"XY": ("X", "Y")})
+    rule = make_rule(condition_graph, precondition_graph, condition_graph)
+    before_graph = make_graph(["A", "B", "C", "D"], {"AB": ("A", "B"), "AC": ("A", "C"), "CD": ("C", "D")})
+
+    matches = list(double_pushout_matches(rule, before_graph))
+    assert sorted(match.edge_map("XY") for match in matches) == ["AB", "CD"]
+    assert all(satisfies_gluing_condition(rule, match) for match in matches)
+
+    after = double_pushout(rule, before_graph, matches[0])
+    assert len(after.nodes) == 3
+    assert len(after.edges) == 2
+
+
+def test_double_pushout_incremental():
+    # Delete the edge XY and the node Y, add a node W with an edge X -> W, and merge X with Z.
+    condition_graph = make_graph(["X", "Z"], {})
+    precondition_graph = make_graph(["X", "Y", "Z"], {"XY": ("X", "Y")})
+    postcondition_graph = make_graph(["XZ", "W"], {"XZW": ("XZ", "W")})
+    rule = DoublePushoutRule(
+        make_morphism(condition_graph, precondition_graph, {"X": "X", "Z": "Z"}, {}),
+        make_morphism(condition_graph, postcondition_graph, {"X": "XZ", "Z": "XZ"}, {}),
+    )
+    before_graph = make_graph(
+        ["A", "B", "C", "D"], {"AB": ("A", "B"), "CD": ("C", "D"), "DA": ("D", "A"), "DD": ("D", "D")}
+    )
+    match = make_morphism(precondition_graph, before_graph, {"X": "A", "Y": "B", "Z": "C"}, {"XY": "AB"})
+    before_graph.out_edges("A"), before_graph.in_edges("A"), before_graph.edges_between("A", "A")
+
+    after, delta = double_pushout_incremental(rule, before_graph, match)
+    (kept,) = {"A", "C"} - delta.deleted_nodes
+    (merged,) = {"A", "C"} - {kept}
+    (w,) = delta.added_nodes
+    assert isinstance(w, FreshLabel) and w.origin == "W"
+    assert delta.deleted_nodes == frozenset(["B", merged])
+    assert after.nodes == frozenset([kept, "D", w])
+    assert len(after.edges) == 4
+    endpoints = {(after.source(e), after.target(e)) for e in after.edges}
+    assert endpoints == {(kept, "D"), ("D", kept), ("D", "D"), (kept, w)}
+
+    expected = double_pushout(rule, before_graph, match)
+    assert (len(after.nodes), len(after.edges)) == (len(expected.nodes), len(expected.edges))
+    assert sorted(map(after.degree, after.nodes)) == sorted(map(expected.degree, expected.nodes))
+
+    # Indexes carried over from the host match freshly built ones.
+    rebuilt = FinGraphObject(after.nodes, after.edges, after.source, after.target)
+    assert all(
+        set(after.out_edges(n)) == set(rebuilt.out_edges(n)) and set(after.in_edges(n)) == set(rebuilt.in_edges(n))
+        for n in after.nodes
+    )
+    assert all(
+        set(after.edges_between(s, t)) == set(rebuilt.edges_between(s, t)) for s in after.nodes for t in after.nodes
+    )
+
+
+def test_double_pushout_relabel():
+    # Grow a new leaf from any node.
+    condition_graph = make_graph(["X"], {})
+    postcondition_graph = make_graph(["X", "Y"], {"XY": ("X", "Y")})
+    rule = make_rule(condition_graph, condition_graph, postcondition_graph)
+
+    graph = make_graph(["A"], {})
+    for i in range(5):
+        match = next(double_pushout_matches(rule, graph))
+        relabelled, renaming = double_pushout(rule, graph, match, relabel=True)
+        # The renaming maps the labels the result would otherwise have to the flat ones.
+        assert renaming.dom == double_pushout(rule, graph, match) and renaming.cod == relabelled
+        graph = relabelled
+        assert graph.nodes == frozenset(range(i + 2))
+        assert graph.edges == frozenset(range(i + 1))
+
+
+def test_double_pushout_many():
+    # Delete the edge XY and the node Y, and add an edge X -> X.
+    condition_graph = make_graph(["X"], {})
+    precondition_graph = make_graph(["X", "Y"], {"XY": ("X", "Y")})
+    postcondition_graph = make_graph(["X"], {"XX": ("X", "X")})
+    rule = make_rule(condition_graph, precondition_graph, postcondition_graph)
+    before_graph = make_graph(
+        ["A", "B", "C", "D", "E"], {"AB": ("A", "B"), "AC": ("A", "C"), "DE": ("D", "E"), "EA": ("E", "A")}
+    )
+
+    matches = {match.edge_map("XY"): match for match in double_pushout_matches(rule, before_graph)}
+    assert sorted(matches) == ["AB", "AC"]
+    assert are_parallel_independent(rule, matches.values())
+
+    after = double_pushout_many(rule, before_graph, matches.values())
+    assert after.nodes == frozenset(["A", "D", "E"])
+    assert len(after.edges) == 4
+    assert len(after.edges_between("A", "A")) == 2
+
+    sequential, _ = double_pushout_incremental(rule, before_graph, matches["AB"])
+    (sequential_match,) = double_pushout_matches(rule, sequential)
+    sequential = double_pushout(rule, sequential, sequential_match, incremental=True)
+    assert sequential.nodes == after.nodes
+    assert sorted(map(sequential.degree, sequential.nodes)) == sorted(map(after.degree, after.nodes))
+
+    # Deleting C -> D removes D, which the match of D -> E preserves.
+    chain_graph = make_graph(["C", "D", "E"], {"CD": ("C", "D"), "DE": ("D", "E")})
+    chain_matches = list(find_matches(precondition_graph, chain_graph))
+    assert len(chain_matches) == 2
+    assert not are_parallel_independent(rule, chain_matches)
+    assert are_parallel_independent(rule, chain_matches[:1])
+
+    flat, renaming = double_pushout_many(rule, before_graph, matches.values(), relabel=True)
+    assert flat.nodes == frozenset(range(3))
+    assert renaming.cod == flat and renaming.node_map("A") in flat.nodes
+
+
+def test_compile():
+    # Replace a leaf and the edge pointing to it by a self-loop, merging the two kept nodes.
+    condition_graph = make_graph(["X", "Y"], {})
+    precondition_graph = make_graph(["X", "Y", "Z"], {"XZ": ("X", "Z")})
+    postcondition_graph = make_graph(["W"], {"WW": ("W", "W")})
+    rule = DoublePushoutRule(
+        inclusion(condition_graph, precondition_graph),
+        make_morphism(condition_graph, postcondition_graph, {"X": "W", "Y": "W"}, {}),
+    )
+
+    compiled = rule.compile()
+    assert rule.compile() is compiled
+    assert compiled.plan.pattern == precondition_graph
+    assert compiled.injective
+    assert sorted(compiled.preserved_nodes) == ["X", "Y"] and compiled.deleted_nodes == ("Z",)
+    assert compiled.deleted_edges == ("XZ",) and compiled.deleted_degrees == (("Z", 0, 1),)
+    assert sorted(compiled.node_gluing) == [("W", "X"), ("W", "Y")]
+    assert compiled.created_nodes == () and compiled.created_edges == (("WW", "W", "W"),)
+
+    # Z can be C or B, but not D, whose edge to B would dangle, and Y can be any node but Z, which is deleted.
+    before_graph = make_graph(["A", "B", "C", "D"], {"AC": ("A", "C"), "AD": ("A", "D"), "DB": ("D", "B")})
+    matches = list(find_matches(precondition_graph, before_graph, injective=False))
+    applicable = [m for m in matches if compiled.satisfies_gluing_condition(m)]
+    assert sorted((m.node_map("X"), m.node_map("Y"), m.node_map("Z")) for m in applicable) == [
+        ("A", "A", "C"),
+        ("A", "B", "C"),
+        ("A", "D", "C"),
+        ("D", "A", "B"),
+        ("D", "C", "B"),
+        ("D", "D", "B"),
+    ]
+    assert [m for m in matches if satisfies_gluing_condition(rule, m)] == applicable
+
+    # Deleting C and AC and merging A and B leaves AD, DB and a new self-loop.
+    match = next(m for m in applicable if (m.node_map("X"), m.node_map("Y")) == ("A", "B"))
+    after, delta = double_pushout_incremental(rule, before_graph, match)
+    assert "C" in delta.deleted_nodes and "AC" in delta.deleted_edges
+    assert (len(after.nodes), len(after.edges)) == (2, 3)
+    expected = double_pushout(rule, before_graph, match)
+    assert (len(expected.nodes), len(expected.edges)) == (2, 3)
+
+    # The classic rewrite goes through the compiled rule too, and refuses the matches it finds inapplicable.
+    uncompiled = DoublePushoutRule(rule.precondition_map, rule.postcondition_map)
+    assert double_pushout(uncompiled, before_graph, match) == expected
+    assert "_compiled" in vars(uncompiled)
+    dangling = next(m for m in matches if not compiled.satisfies_gluing_condition(m))
+    with pytest.raises(AssertionError):
+        double_pushout(rule, before_graph, dangling)
@@ -0,0 +1,44 @@
+from array import array
+
+import pytest
+from helpers import make_graph
+from pycct import (
+    fingraph_from_adjacency,
+    fingraph_from_arrays,
+    fingraph_parse_edge_list,
+    fingraph_read_edge_list,
+)
+
+
+def test_from_arrays():
+    expected = make_graph(range(4), {0: (0, 1), 1: (1, 2), 2: (1, 2), 3: (3, 3)})
+    assert fingraph_from_arrays([0, 1, 1, 3], [1, 2, 2, 3]) == expected
+    assert fingraph_from_arrays(array("i", [0, 1, 1, 3]), memoryview(array("q", [1, 2, 2, 3]))) == expected
+    assert fingraph_from_arrays([0], [1], num_nodes=3) == make_graph(range(3), {0: (0, 1)})
+    assert fingraph_from_arrays([], []) == make_graph([], {})
+
+    labelled = fingraph_from_arrays([0, 1], [1, 1], node_labels=["A", "B"], edge_labels=["AB", "BB"])
+    assert labelled == make_graph(["A", "B"], {"AB": ("A", "B"), "BB": ("B", "B")})
+
+    with pytest.raises(AssertionError):
+        fingraph_from_arrays([-1], [0], node_labels=["A"])
+    with pytest.raises(AssertionError):
+        fingraph_from_arrays([0], [0], node_labels=["A", "A"])
+
+
+def test_edge_list(tmp_path):
+    text = "# a comment\nA B\n\nB C 0.5\n  A B\nC C\n"
+    expected = make_graph(["A", "B", "C"], {0: ("A", "B"), 1: ("B", "C"), 2: ("A", "B"), 3: ("C", "C")})
+    assert fingraph_parse_edge_list(text) == expected
+
+    path = tmp_path / "graph.txt"
+    path.write_text("1 2\n2 10\n")
+    assert fingraph_read_edge_list(str(path), int_labels=True) == make_graph([1, 2, 10], {0: (1, 2), 1: (2, 10)})
+
+    with pytest.raises(AssertionError):
+        fingraph_parse_edge_list("A B\nC\n")
+
+
+def test_from_adjacency():
+    graph = fingraph_from_adjacency({"A": ["B", "B"], "B": iter(["C"]), "D": []})
+    assert graph == make_graph(["A", "B", "C", "D"], {0: ("A", "B"), 1: ("A", "B"), 2: ("B", "C")})
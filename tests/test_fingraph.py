@@ -1,4 +1,5 @@
 import pytest
+from helpers import make_graph
 from pycct import (
     FinGraphMorphism,
     FinGraphObject,
@@ -6,13 +7,19 @@ from pycct import (
     FinSetObject,
     fingraph_coequalizer,
     fingraph_coproduct,
+    fingraph_edit,
     fingraph_equalizer,
     fingraph_product,
     fingraph_pullback,
     fingraph_pushout,
     fingraph_pushout_complement,
+    fingraph_relabel,
     finset_composition,
+    finset_fibers,
 )
+from pycct.base import PushoutCoCone, deferred
+from pycct.fingraph import fingraph_identity
+from pycct.finset import nil_fn
 
 
 def test_coproduct():
@@ -109,19 +116,10 @@ def test_coequalizer():
     )
 
     coequalizer = fingraph_coequalizer(f, g)
-    assert coequalizer.apex.nodes == frozenset(
-        [
-            frozenset({"R"}),
-            frozenset({"T"}),
-            frozenset({"S", "Q"}),
-        ]
-    )
-    assert coequalizer.apex.edges == frozenset(
-        [
-            frozenset({"W", "U"}),
-            frozenset({"V"}),
-        ]
-    )
+    node_classes = finset_fibers(coequalizer.proj.node_map).values()
+    assert frozenset(map(frozenset, node_classes)) == frozenset([frozenset("R"), frozenset("T"), frozenset("SQ")])
+    edge_classes = finset_fibers(coequalizer.proj.edge_map).values()
+    assert frozenset(map(frozenset, edge_classes)) == frozenset([frozenset("WU"), frozenset("V")])
 
 
 def test_equalizer():
@@ -567,3 +565,120 @@ def test_fingraph_pushout_complement_no_gluing():
 
     with pytest.raises(AssertionError):
         fingraph_pushout_complement(f, proj_b, d_graph)
+
+
+def test_adjacency_indexes():
+    nodes = FinSetObject(["A", "B", "C"])
+    edges = FinSetObject(["AB", "AC", "CA", "CC"])
+    graph = FinGraphObject(
+        nodes,
+        edges,
+        FinSetMorphism(edges, nodes, lambda e: e[0]),
+        FinSetMorphism(edges, nodes, lambda e: e[1]),
+    )
+
+    assert sorted(graph.out_edges("A")) == ["AB", "AC"]
+    assert sorted(graph.in_edges("A")) == ["CA"]
+    assert graph.out_edges("B") == ()
+    assert sorted(graph.incident_edges("C")) == ["AC", "CA", "CC"]
+    assert graph.edges_between("C", "C") == ("CC",)
+    assert graph.edges_between("B", "A") == ()
+    assert (graph.out_degree("C"), graph.in_degree("C"), graph.degree("C")) == (2, 2, 4)
+
+
+def test_equality():
+    nodes = FinSetObject(["A", "B"])
+    edges = FinSetObject(["AB", "BA"])
+
+    def make_graph(target):
+        return FinGraphObject(
+            nodes, edges, FinSetMorphism(edges, nodes, lambda e: e[0]), FinSetMorphism(edges, nodes, target)
+        )
+
+    graph = make_graph(lambda e: e[1])
+    same = make_graph(lambda e: e[1])
+    loops = make_graph(lambda e: e[0])
+
+    assert graph == graph and "_fingerprint" not in graph.__dict__
+    assert graph == same and hash(graph) == hash(same)
+    assert graph != loops
+    assert len({graph, same, loops}) == 2
+
+
+def test_edit():
+    graph = make_graph(["A", "B", "C"], {"AB": ("A", "B"), "BC": ("B", "C"), "CC": ("C", "C")})
+    graph.out_edges("A"), graph.in_edges("A"), graph.edges_between("A", "A"), hash(graph)
+
+    # Delete C, and move BC to a new node D.
+    first = fingraph_edit(graph, {"C"}, {"BC", "CC"}, {"D"}, {"BC": ("B", "D")})
+    # Delete A, and add a loop at D.
+    second = fingraph_edit(first, {"A"}, {"AB"}, set(), {"DD": ("D", "D")})
+    assert (second.out_edges("D"), second.in_edges("D")) == (("DD",), ("BC", "DD"))
+    assert second == make_graph(["B", "D"], {"BC": ("B", "D"), "DD": ("D", "D")})
+    # The fingerprint is carried through the edits.
+    assert hash(second) == hash(make_graph(["B", "D"], {"BC": ("B", "D"), "DD": ("D", "D")}))
+
+    # Earlier versions are unchanged, and can be edited again.
+    assert first == make_graph(["A", "B", "D"], {"AB": ("A", "B"), "BC": ("B", "D")})
+    assert hash(first) == hash(make_graph(["A", "B", "D"], {"AB": ("A", "B"), "BC": ("B", "D")}))
+    assert first.in_edges("D") == ("BC",) and first.edges_between("A", "B") == ("AB",)
+    branch = fingraph_edit(first, set(), set(), {"E"}, {"DE": ("D", "E")})
+    assert branch.out_edges("D") == ("DE",) and branch.edges_between("D", "E") == ("DE",)
+    assert second.out_edges("D") == ("DD",) and "A" not in second.nodes
+    assert graph.out_edges("C") == ("CC",) and len(graph.edges) == 3
+
+    # Added nodes and edges must not already be in the graph.
+    with pytest.raises(AssertionError):
+        fingraph_edit(second, set(), set(), {"B"}, {})
+    with pytest.raises(AssertionError):
+        fingraph_edit(second, set(), set(), set(), {"DD": ("B", "B")})
+    assert second.out_edges("B") == ("BC",)
+
+
+def test_pushout_relabel():
+    a_nodes = FinSetObject(["A"])
+    no_edges = FinSetObject()
+    a_graph = FinGraphObject(
+        a_nodes, no_edges, FinSetMorphism(no_edges, a_nodes, nil_fn), FinSetMorphism(no_edges, a_nodes, nil_fn)
+    )
+    b_nodes = FinSetObject(["A", "B"])
+    b_edges = FinSetObject(["AB"])
+    b_graph = FinGraphObject(
+        b_nodes,
+        b_edges,
+        FinSetMorphism(b_edges, b_nodes, lambda _: "A"),
+        FinSetMorphism(b_edges, b_nodes, lambda _: "B"),
+    )
+    f = FinGraphMorphism(
+        a_graph, b_graph, FinSetMorphism(a_nodes, b_nodes, lambda x: x), FinSetMorphism(no_edges, b_edges, nil_fn)
+    )
+
+    pushout, renaming = fingraph_pushout(f, f, relabel=True)
+    assert pushout.apex.nodes == frozenset(range(3))
+    assert pushout.apex.edges == frozenset(range(2))
+    assert all(pushout.proj_b.node_map(f.node_map(x)) == pushout.proj_c.node_map(f.node_map(x)) for x in a_nodes)
+    assert pushout.proj_b.edge_map("AB") != pushout.proj_c.edge_map("AB")
+    assert pushout.apex.source(pushout.proj_b.edge_map("AB")) == pushout.proj_b.node_map("A")
+
+    relabelled = fingraph_relabel(fingraph_pushout(f, f).apex)
+    assert relabelled.cod.nodes == pushout.apex.nodes
+    # The renaming maps the labels of the plain pushout to the flat ones.
+    assert renaming.cod == pushout.apex and renaming.dom == fingraph_pushout(f, f).apex
+    assert renaming.node_map(frozenset({("B", 0)})) == pushout.proj_b.node_map("B")
+    univ = pushout.univ(fingraph_identity(b_graph), fingraph_identity(b_graph))
+    assert univ.dom == pushout.apex and univ.cod == b_graph
+    assert all(univ.node_map(pushout.proj_b.node_map(x)) == x for x in b_nodes)
+
+
+def test_deferred_projections():
+    calls = []
+
+    def proj_b():
+        calls.append(None)
+        return "proj_b"
+
+    cone = PushoutCoCone("apex", deferred(proj_b), "proj_c", nil_fn)
+    assert not calls
+    assert cone.proj_b == "proj_b" and cone.proj_b == "proj_b"
+    assert len(calls) == 1
+    assert cone == PushoutCoCone("apex", "proj_b", "proj_c", nil_fn)
@@ -1,14 +1,25 @@
+import pickle
+from dataclasses import FrozenInstanceError
+
+import pytest
 from pycct import (
+    FinSetMemoMorphism,
     FinSetMorphism,
     FinSetObject,
+    FinSetTableMorphism,
     finset_coequalizer,
     finset_composition,
     finset_coproduct,
     finset_equalizer,
+    finset_fibers,
+    finset_memoize,
     finset_product,
     finset_pullback,
+    finset_pullback_pairs,
     finset_pushout,
     finset_pushout_complement,
+    finset_tabulate,
+    validation_mode,
 )
 
 
@@ -66,13 +77,11 @@ def test_coequalizer():
     g = FinSetMorphism(a, b, g_)
 
     coequalizer = finset_coequalizer(f, g)
-    assert coequalizer.apex == frozenset(
-        [
-            frozenset({"C", "D", "F"}),
-            frozenset({"E", "G"}),
-        ]
-    )
+    assert coequalizer.apex == frozenset(range(2))
     assert frozenset(map(coequalizer.proj, b)).issubset(coequalizer.apex)
+    classes = finset_fibers(coequalizer.proj)
+    assert frozenset(map(frozenset, classes.values())) == frozenset([frozenset("CDF"), frozenset("EG")])
+    assert coequalizer.proj("C") == coequalizer.proj("F")
 
     candidate = FinSetObject([frozenset({"C"}), frozenset({"E"})])
     q = FinSetMorphism(b, candidate, lambda x: frozenset({"E"}) if x in ("E", "G") else frozenset({"C"}))
@@ -176,6 +185,26 @@ def test_pushout():
     assert all(finset_composition(univ, pushout.proj_c)(x) == q(x) for x in c)
 
 
+def test_pushout_labels():
+    a = FinSetObject(range(4))
+    b = FinSetObject(range(6))
+    c = FinSetObject("xyz")
+    g = FinSetMorphism(a, c, lambda x: "xxyy"[x])
+    for f in (FinSetMorphism(a, b, lambda x: x + 2), FinSetMorphism(a, b, lambda x: x // 2)):
+        pushout = finset_pushout(f, g)
+        coproduct = finset_coproduct(b, c)
+        coequalizer = finset_coequalizer(
+            finset_composition(coproduct.proj_a, f), finset_composition(coproduct.proj_b, g)
+        )
+        # The pushout glues the same elements as the coequalizer.
+        labels = {(x, 0): pushout.proj_b(x) for x in b}
+        labels.update(((x, 1), pushout.proj_c(x)) for x in c)
+        assert len(pushout.apex) == len(coequalizer.apex)
+        assert all(
+            (labels[x] == labels[y]) == (coequalizer.proj(x) == coequalizer.proj(y)) for x in labels for y in labels
+        )
+
+
 def test_pullback():
     a = FinSetObject(["A", "B", "C", "D"])
     b = FinSetObject(["C", "D", "E", "F", "G"])
@@ -221,6 +250,35 @@ def test_pullback():
     assert all(finset_composition(pullback.proj_c, univ)(x) == q(x) for x in candidate)
 
 
+def test_pullback_hash_join():
+    calls = []
+
+    def mod_(x):
+        calls.append(x)
+        return x % 7
+
+    a = FinSetObject(range(1000))
+    b = FinSetObject(range(0, 7000, 7))
+    c = FinSetObject(range(7))
+    pullback = finset_pullback(FinSetMorphism(a, c, mod_), FinSetMorphism(b, c, lambda x: 0))
+    assert len(pullback.apex) == len(b) * len(range(0, 1000, 7))
+    # Each side is evaluated once per element for the join, on top of validation, never once per pair.
+    assert len(calls) <= 2 * len(a)
+
+
+def test_pullback_pairs():
+    a = FinSetObject(range(10))
+    b = FinSetObject("xyz")
+    c = FinSetObject(range(3))
+    f = FinSetMorphism(a, c, lambda x: x % 3)
+    g = FinSetMorphism(b, c, "xyz".index)
+    pairs = finset_pullback_pairs(f, g)
+    assert next(pairs) in finset_pullback(f, g).apex
+    assert frozenset(finset_pullback_pairs(f, g)) == finset_pullback(f, g).apex
+    assert frozenset((y, x) for x, y in finset_pullback_pairs(g, f)) == finset_pullback(f, g).apex
+    assert sum(1 for x, y in finset_pullback_pairs(f, g) if y == "x") == 4
+
+
 def test_pushout_complement():
     a = FinSetObject(["A", "B", "C"])
     b = FinSetObject(["C", "D", "E", "F", "G"])
@@ -255,3 +313,85 @@ def test_pushout_complement():
     assert all(
         finset_composition(proj_b_complement, f_complement)(x) == finset_composition(pushout.proj_c, g)(x) for x in a
     )
+
+
+def test_table_morphism():
+    a = FinSetObject(["A", "B", "C"])
+    b = FinSetObject(["C", "D", "E"])
+    c = FinSetObject(["F", "G"])
+
+    f = FinSetTableMorphism(a, b, {"A": "C", "B": "C", "C": "E"})
+    g = FinSetMorphism(b, c, lambda x: "F" if x == "C" else "G")
+    assert f("A") == "C"
+    assert f == FinSetTableMorphism(a, b, {"A": "C", "B": "C", "C": "E"})
+    assert f != FinSetTableMorphism(a, b, {"A": "C", "B": "D", "C": "E"})
+
+    gf = finset_composition(g, f)
+    assert isinstance(gf, FinSetTableMorphism)
+    assert gf.table == {"A": "F", "B": "F", "C": "G"}
+
+    tabulated_g = finset_tabulate(g)
+    assert tabulated_g.table == {"C": "F", "D": "G", "E": "G"}
+    assert finset_tabulate(tabulated_g) is tabulated_g
+    assert finset_composition(tabulated_g, f) == gf
+
+
+def test_memo_morphism():
+    calls = []
+
+    def double_(x):
+        calls.append(x)
+        return 2 * x
+
+    a = FinSetObject(range(5))
+    b = FinSetObject(range(10))
+    f = finset_memoize(FinSetMorphism(a, b, double_))
+    assert isinstance(f, FinSetMemoMorphism)
+    assert finset_memoize(f) is f
+    # The first call fills the table, after which every call is a lookup.
+    calls.clear()
+    assert [f(x) for x in a] == [0, 2, 4, 6, 8]
+    assert [f(x) for x in a] == [0, 2, 4, 6, 8]
+    assert sorted(calls) == list(a)
+
+    g = FinSetMorphism(b, b, lambda x: x // 2)
+    gf = finset_composition(g, f)
+    assert isinstance(gf, FinSetMemoMorphism)
+    assert [gf(x) for x in a] == list(a)
+    assert finset_tabulate(f).table is f.table
+    assert len(calls) == len(a)
+
+    calls.clear()
+    with validation_mode("off"):
+        lazy = FinSetMemoMorphism(a, b, double_)
+    assert not calls
+    assert lazy(3) == 6
+    assert sorted(calls) == list(a)
+    # Full validation checks the table once it is filled, rather than evaluating the domain on construction.
+    calls.clear()
+    checked = FinSetMemoMorphism(a, b, double_)
+    assert not calls
+    assert checked(3) == 6
+    assert sorted(calls) == list(a)
+    with pytest.raises(AssertionError):
+        FinSetMemoMorphism(b, b, double_)(0)
+
+    # Composing a table after a memoised morphism goes through its table.
+    calls.clear()
+    h = FinSetTableMorphism(a, a, {x: x for x in a})
+    assert finset_composition(f, h).table == f.table
+    assert not calls
+
+
+def test_slots():
+    a = FinSetObject(range(3))
+    f = FinSetTableMorphism(a, a, {x: x for x in a})
+    memo = finset_memoize(FinSetMorphism(a, a, lambda x: x))
+    pushout = finset_pushout(f, f)
+    for x in (a, f, memo, pushout, pushout.proj_b):
+        assert not hasattr(x, "__dict__")
+    with pytest.raises(FrozenInstanceError):
+        f.dom = a  # type: ignore
+
+    copy = pickle.loads(pickle.dumps(f))
+    assert copy == f and copy.table == f.table and copy(2) == 2
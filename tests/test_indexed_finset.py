@@ -0,0 +1,152 @@
+from pycct import (
+    FinSetMorphism,
+    FinSetObject,
+    IndexedFinSetMorphism,
+    IndexedFinSetObject,
+    finset_coequalizer,
+    finset_fibers,
+    finset_pullback,
+    finset_pushout,
+    indexed_finset,
+    indexed_finset_coequalizer,
+    indexed_finset_composition,
+    indexed_finset_coproduct,
+    indexed_finset_equalizer,
+    indexed_finset_morphism,
+    indexed_finset_morphism_to_finset,
+    indexed_finset_product,
+    indexed_finset_pullback,
+    indexed_finset_pushout,
+    indexed_finset_to_finset,
+)
+from pycct.indexed_finset import index_array
+
+
+def test_round_trip():
+    a = FinSetObject(["A", "B", "C"])
+    b = FinSetObject(["D", "E"])
+    f = FinSetMorphism(a, b, lambda x: "D" if x == "A" else "E")
+
+    a_idx, b_idx = indexed_finset(a), indexed_finset(b)
+    f_idx = indexed_finset_morphism(f, a_idx, b_idx)
+    assert len(a_idx) == 3 and list(a_idx) == [0, 1, 2]
+    assert indexed_finset_to_finset(a_idx) == a
+    assert indexed_finset_morphism_to_finset(f_idx).table == {"A": "D", "B": "E", "C": "E"}
+
+
+def test_coproduct():
+    a = IndexedFinSetObject(3, ("A", "B", "C"))
+    b = IndexedFinSetObject(3, ("C", "S", "T"))
+    coproduct = indexed_finset_coproduct(a, b)
+    assert coproduct.apex.size == 6
+    assert frozenset(coproduct.apex.labels) == frozenset([("A", 0), ("B", 0), ("C", 0), ("C", 1), ("S", 1), ("T", 1)])
+
+    candidate = IndexedFinSetObject(5, ("A", "B", "C", "S", "T"))
+    p = IndexedFinSetMorphism(a, candidate, index_array([0, 1, 2]))
+    q = IndexedFinSetMorphism(b, candidate, index_array([2, 3, 4]))
+    univ = coproduct.univ(p, q)
+    assert indexed_finset_composition(univ, coproduct.proj_a) == p
+    assert indexed_finset_composition(univ, coproduct.proj_b) == q
+
+
+def test_product():
+    a = IndexedFinSetObject(3, ("A", "B", "C"))
+    b = IndexedFinSetObject(2, ("S", "T"))
+    product = indexed_finset_product(a, b)
+    assert frozenset(product.apex.labels) == frozenset(
+        [("A", "S"), ("A", "T"), ("B", "S"), ("B", "T"), ("C", "S"), ("C", "T")]
+    )
+    assert all(
+        product.apex.labels[x] == (a.labels[product.proj_a(x)], b.labels[product.proj_b(x)]) for x in product.apex
+    )
+
+    candidate = IndexedFinSetObject(2, ("X", "Y"))
+    p = IndexedFinSetMorphism(candidate, a, index_array([2, 0]))
+    q = IndexedFinSetMorphism(candidate, b, index_array([1, 1]))
+    univ = product.univ(p, q)
+    assert indexed_finset_composition(product.proj_a, univ) == p
+    assert indexed_finset_composition(product.proj_b, univ) == q
+
+
+def test_coequalizer():
+    a = FinSetObject(["A", "B", "C", "D"])
+    b = FinSetObject(["C", "D", "E", "F", "G"])
+    f_dict = {"A": "C", "B": "C", "C": "D", "D": "E"}
+    g_dict = {"A": "D", "B": "D", "C": "F", "D": "G"}
+    f = FinSetMorphism(a, b, lambda x: f_dict[x])
+    g = FinSetMorphism(a, b, lambda x: g_dict[x])
+
+    a_idx, b_idx = indexed_finset(a), indexed_finset(b)
+    coequalizer = indexed_finset_coequalizer(
+        indexed_finset_morphism(f, a_idx, b_idx), indexed_finset_morphism(g, a_idx, b_idx)
+    )
+    assert coequalizer.apex.size == 2
+    classes = finset_fibers(finset_coequalizer(f, g).proj).values()
+    assert frozenset(coequalizer.apex.labels) == frozenset(map(frozenset, classes))
+    members = [list(coequalizer.apex.labels.members(i)) for i in coequalizer.apex]
+    assert sorted(x for xs in members for x in xs) == list(b_idx)
+    assert all(coequalizer.proj.value[x] == i for i, xs in enumerate(members) for x in xs)
+
+    candidate = IndexedFinSetObject(2, ("X", "Y"))
+    q = IndexedFinSetMorphism(b_idx, candidate, index_array(int(x in ("E", "G")) for x in b_idx.labels))
+    univ = coequalizer.univ(q)
+    assert indexed_finset_composition(univ, coequalizer.proj) == q
+
+
+def test_equalizer():
+    a = IndexedFinSetObject(4, ("A", "B", "C", "D"))
+    b = IndexedFinSetObject(2, ("S", "T"))
+    f = IndexedFinSetMorphism(a, b, index_array([0, 1, 0, 1]))
+    g = IndexedFinSetMorphism(a, b, index_array([0, 0, 0, 1]))
+
+    equalizer = indexed_finset_equalizer(f, g)
+    assert list(equalizer.apex.labels) == ["A", "C", "D"]
+    assert list(equalizer.proj.value) == [0, 2, 3]
+
+    candidate = IndexedFinSetObject(2, ("X", "Y"))
+    p = IndexedFinSetMorphism(candidate, a, index_array([3, 0]))
+    univ = equalizer.univ(p)
+    assert indexed_finset_composition(equalizer.proj, univ) == p
+
+
+def test_pushout():
+    a = FinSetObject(["A", "B", "C", "D"])
+    b = FinSetObject(["C", "D", "E", "F", "G"])
+    c = FinSetObject(["B", "E", "F", "G"])
+    f_dict = {"A": "C", "B": "C", "C": "D", "D": "E"}
+    g_dict = {"A": "B", "B": "E", "C": "B", "D": "F"}
+    f = FinSetMorphism(a, b, lambda x: f_dict[x])
+    g = FinSetMorphism(a, c, lambda x: g_dict[x])
+
+    a_idx, b_idx, c_idx = indexed_finset(a), indexed_finset(b), indexed_finset(c)
+    f_idx, g_idx = indexed_finset_morphism(f, a_idx, b_idx), indexed_finset_morphism(g, a_idx, c_idx)
+    pushout = indexed_finset_pushout(f_idx, g_idx)
+    assert frozenset(pushout.apex.labels) == finset_pushout(f, g).apex
+    assert indexed_finset_composition(pushout.proj_b, f_idx) == indexed_finset_composition(pushout.proj_c, g_idx)
+
+    # The map to the terminal object factors through the pushout.
+    d = IndexedFinSetObject(1, (None,))
+    u = IndexedFinSetMorphism(b_idx, d, index_array([0] * b_idx.size))
+    v = IndexedFinSetMorphism(c_idx, d, index_array([0] * c_idx.size))
+    univ = pushout.univ(u, v)
+    assert indexed_finset_composition(univ, pushout.proj_b) == u
+    assert indexed_finset_composition(univ, pushout.proj_c) == v
+
+
+def test_pullback():
+    a = FinSetObject(["A", "B", "C", "D"])
+    b = FinSetObject(["C", "D", "E", "F", "G"])
+    c = FinSetObject(["B", "E", "F", "G"])
+    f_dict = {"C": "A", "D": "B", "E": "B", "F": "D", "G": "D"}
+    g_dict = {"B": "A", "E": "B", "F": "C", "G": "D"}
+    f = FinSetMorphism(b, a, lambda x: f_dict[x])
+    g = FinSetMorphism(c, a, lambda x: g_dict[x])
+
+    a_idx, b_idx, c_idx = indexed_finset(a), indexed_finset(b), indexed_finset(c)
+    f_idx, g_idx = indexed_finset_morphism(f, b_idx, a_idx), indexed_finset_morphism(g, c_idx, a_idx)
+    pullback = indexed_finset_pullback(f_idx, g_idx)
+    assert frozenset(pullback.apex.labels) == finset_pullback(f, g).apex
+    assert indexed_finset_composition(f_idx, pullback.proj_b) == indexed_finset_composition(g_idx, pullback.proj_c)
+
+    univ = pullback.univ(pullback.proj_b, pullback.proj_c)
+    assert list(univ.value) == list(range(pullback.apex.size))
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from pycct import FinSetMorphism, FinSetObject, FinSetTableMorphism, finset_pullback, finset_pushout, instrument
+from pycct.instrumentation import INSTRUMENTATION_ENABLED
+
+
+def test_instrument():
+    # Constructions are only wrapped if instrumentation is enabled on import, so this runs in a fresh interpreter.
+    env = dict(os.environ, PYCCT_INSTRUMENTATION="1", PYTHONPATH=os.pathsep.join(sys.path))
+    code = "import test_instrumentation; test_instrumentation.check_instrument()"
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(__file__), env=env, check=True)
+
+
+@pytest.mark.skipif(INSTRUMENTATION_ENABLED, reason="instrumentation is enabled")
+def test_instrument_disabled():
+    with pytest.raises(RuntimeError):
+        with instrument():
+            pass
+
+
+def check_instrument():
+    a = FinSetObject(range(3))
+    b = FinSetObject(range(6))
+    f = FinSetMorphism(a, b, lambda x: 2 * x)
+    g = FinSetMorphism(a, b, lambda x: x)
+    call = FinSetMorphism.__call__
+
+    with instrument() as instrumentation:
+        pushout = finset_pushout(f, g)
+        pullback = finset_pullback(f, g)
+        FinSetTableMorphism(a, b, {x: x for x in a})
+
+    assert FinSetMorphism.__call__ is call
+    pushout_record, pullback_record = instrumentation.records
+    assert (pushout_record.name, pullback_record.name) == ("finset_pushout", "finset_pullback")
+    assert pushout_record.input_sizes == [3, 3]
+    assert pushout_record.output_size == len(pushout.apex) == 9
+    assert pullback_record.output_size == len(pullback.apex) == 2
+    assert pushout_record.evaluations >= 2 * len(a)
+    assert pushout_record.depth == 0
+    assert instrumentation.validation_seconds > 0
+
+    summary = instrumentation.summary()
+    assert "finset_pushout" in summary and "finset_pullback" in summary
+    events = json.loads(json.dumps(instrumentation.trace_events()))
+    assert [event["name"] for event in events] == ["finset_pushout", "finset_pullback"]
+
+    # Nothing is recorded outside the block.
+    finset_pushout(f, g)
+    assert len(instrumentation.records) == 2
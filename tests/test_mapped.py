@@ -0,0 +1,75 @@
+import random
+import tracemalloc
+
+from helpers import inclusion, make_graph
+from pycct import (
+    DoublePushoutRule,
+    FinGraphEncoding,
+    MappedFinGraph,
+    double_pushout_matches,
+    find_matches,
+    fingraph_save,
+)
+
+
+def test_mapped_fingraph(tmp_path):
+    rng = random.Random(0)
+    labels = [f"n{i}" for i in range(20)]
+    graph = make_graph(labels, {(i, "e"): (rng.choice(labels), rng.choice(labels)) for i in range(50)})
+    path = str(tmp_path / "graph.pycct")
+    fingraph_save(graph, path)
+
+    with MappedFinGraph(path) as mapped:
+        node, edge = mapped.node_labels.__getitem__, mapped.edge_labels.__getitem__
+        assert len(mapped.nodes) == len(graph.nodes) and len(mapped.edges) == len(graph.edges)
+        assert mapped.to_fingraph() == graph
+        for n in mapped.nodes:
+            assert sorted(map(edge, mapped.out_edges(n))) == sorted(graph.out_edges(node(n)))
+            assert sorted(map(edge, mapped.in_edges(n))) == sorted(graph.in_edges(node(n)))
+            assert sorted(map(edge, mapped.incident_edges(n))) == sorted(graph.incident_edges(node(n)))
+            assert mapped.degree(n) == graph.degree(node(n))
+            for m in mapped.nodes:
+                assert sorted(map(edge, mapped.edges_between(n, m))) == sorted(graph.edges_between(node(n), node(m)))
+        assert all(node(mapped.source(e)) == graph.source(edge(e)) for e in mapped.edges)
+
+        pattern = make_graph(["X", "Y", "Z"], {"XY": ("X", "Y"), "YZ": ("Y", "Z")})
+        expected = {tuple(m.node_map(x) for x in "XYZ") for m in find_matches(pattern, graph)}
+        found = {tuple(node(m.node_map(x)) for x in "XYZ") for m in find_matches(pattern, mapped)}
+        assert found == expected
+
+        condition = make_graph(["X"], {})
+        precondition = make_graph(["X", "Y"], {"XY": ("X", "Y")})
+        rule = DoublePushoutRule(inclusion(condition, precondition), inclusion(condition, condition))
+        expected = {m.edge_map("XY") for m in double_pushout_matches(rule, graph)}
+        assert {edge(m.edge_map("XY")) for m in double_pushout_matches(rule, mapped)} == expected
+
+
+def test_dense_labels(tmp_path):
+    graph = make_graph(range(3), {0: (0, 1), 1: (1, 2)})
+    path = str(tmp_path / "graph.pycct")
+    fingraph_save(graph, path)
+    with MappedFinGraph(path) as mapped:
+        assert mapped.node_labels == range(3) and mapped.edge_labels == range(2)
+        assert mapped.out_edges(1) == (1,) and mapped.in_edges(1) == (0,)
+
+
+def test_large_graph_is_not_read(tmp_path):
+    size = 2 * 10**5
+    labels = [f"n{i}" for i in range(size)]
+    path = str(tmp_path / "graph.pycct")
+    fingraph_save(FinGraphEncoding(labels, range(size), range(size), [*range(1, size), 0]), path)
+
+    tracemalloc.start()
+    try:
+        with MappedFinGraph(path) as mapped:
+            # Neither the nodes and edges nor the labels are materialized on opening.
+            assert tracemalloc.get_traced_memory()[1] < size
+            assert not isinstance(mapped.nodes, frozenset) and not isinstance(mapped.edges, frozenset)
+            assert not isinstance(mapped.node_labels, (tuple, list))
+            assert len(mapped.nodes) == len(mapped.edges) == size
+            assert size - 1 in mapped.nodes and size not in mapped.nodes and "n0" not in mapped.edges
+            assert mapped.node_labels[-1] == labels[-1] and mapped.node_labels[size // 2] == labels[size // 2]
+            assert mapped.edge_labels == range(size)
+            assert mapped.target(size - 1) == 0 and mapped.in_edges(0) == (size - 1,)
+    finally:
+        tracemalloc.stop()
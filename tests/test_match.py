@@ -0,0 +1,86 @@
+import random
+from itertools import product
+
+from helpers import make_graph
+from pycct import find_matches, find_matches_parallel, match_plan
+
+
+def brute_force_matches(pattern, host, injective):
+    matches = set()
+    pattern_nodes, pattern_edges = list(pattern.nodes), list(pattern.edges)
+    for node_images in product(list(host.nodes), repeat=len(pattern_nodes)):
+        if injective and len(set(node_images)) < len(node_images):
+            continue
+        node_map = dict(zip(pattern_nodes, node_images))
+        edge_candidates = [
+            [
+                h
+                for h in host.edges
+                if host.source(h) == node_map[pattern.source(e)] and host.target(h) == node_map[pattern.target(e)]
+            ]
+            for e in pattern_edges
+        ]
+        for edge_images in product(*edge_candidates):
+            if injective and len(set(edge_images)) < len(edge_images):
+                continue
+            matches.add((frozenset(node_map.items()), frozenset(zip(pattern_edges, edge_images))))
+    return matches
+
+
+def found_matches(pattern, host, injective):
+    matches = [
+        (frozenset((n, m.node_map(n)) for n in pattern.nodes), frozenset((e, m.edge_map(e)) for e in pattern.edges))
+        for m in find_matches(pattern, host, injective)
+    ]
+    assert len(matches) == len(set(matches))
+    return set(matches)
+
+
+def test_find_matches():
+    pattern = make_graph(["X", "Y", "Z"], {"XY": ("X", "Y"), "YZ": ("Y", "Z")})
+    host = make_graph(
+        ["A", "B", "C", "D"],
+        {"AB": ("A", "B"), "BC": ("B", "C"), "CA": ("C", "A"), "CD": ("C", "D"), "DD": ("D", "D")},
+    )
+
+    injective_matches = found_matches(pattern, host, True)
+    assert len(injective_matches) == 4
+    assert injective_matches == brute_force_matches(pattern, host, True)
+    assert found_matches(pattern, host, False) == brute_force_matches(pattern, host, False)
+
+
+def test_find_matches_random():
+    rng = random.Random(0)
+    pattern = make_graph(["X", "Y", "Z"], {"XY1": ("X", "Y"), "XY2": ("X", "Y"), "YY": ("Y", "Y"), "ZX": ("Z", "X")})
+    for _ in range(10):
+        nodes = list(range(5))
+        host = make_graph(nodes, {i: (rng.choice(nodes), rng.choice(nodes)) for i in range(9)})
+        plan = match_plan(pattern)
+        assert set(plan.order) == pattern.nodes
+        assert found_matches(pattern, host, True) == brute_force_matches(pattern, host, True)
+        assert found_matches(pattern, host, False) == brute_force_matches(pattern, host, False)
+
+
+def test_find_matches_parallel():
+    rng = random.Random(0)
+    host = make_graph(range(30), {e: (rng.randrange(30), rng.randrange(30)) for e in range(60)})
+    pattern = make_graph(["X", "Y", "Z"], {"XY": ("X", "Y"), "YZ": ("Y", "Z")})
+
+    def items(matches):
+        return [(m.node_map.table, m.edge_map.table) for m in matches]
+
+    for injective in (True, False):
+        expected = items(find_matches(pattern, host, injective))
+        assert items(find_matches_parallel(pattern, host, injective, max_workers=2, chunk_size=4)) == expected
+
+    plan = match_plan(pattern, root="Y")
+    roots = [0, 1, 2]
+    expected = items(find_matches(pattern, host, plan=plan, roots=roots))
+    assert items(find_matches_parallel(pattern, host, plan=plan, roots=roots, max_workers=2)) == expected
+
+    # Only the endpoints are shipped to the workers, and their matches are mapped back to the labels here.
+    labelled = make_graph(
+        [f"n{n}" for n in host.nodes], {f"e{e}": (f"n{host.source(e)}", f"n{host.target(e)}") for e in host.edges}
+    )
+    expected = items(find_matches(pattern, labelled))
+    assert items(find_matches_parallel(pattern, labelled, max_workers=2)) == expected
@@ -0,0 +1,116 @@
+from random import Random
+
+from helpers import make_graph, make_rule
+from pycct import (
+    DoublePushoutRule,
+    FinGraphMorphism,
+    FinSetMorphism,
+    FinSetObject,
+    MatchStore,
+    RewriteStrategy,
+    RewritingSystem,
+    find_matches,
+)
+
+
+# Delete a leaf together with the edge pointing to it.
+delete_leaf = make_rule(make_graph(["X"], {}), make_graph(["X", "Y"], {"XY": ("X", "Y")}), make_graph(["X"], {}))
+# Turn an edge into a loop at its source, deleting its target.
+contract_edge = make_rule(
+    make_graph(["X"], {}), make_graph(["X", "Y"], {"XY": ("X", "Y")}), make_graph(["X"], {"XX": ("X", "X")})
+)
+tree = make_graph(
+    ["A", "B", "C", "D", "E", "F", "G"],
+    {"AB": ("A", "B"), "AC": ("A", "C"), "BD": ("B", "D"), "BE": ("B", "E"), "CF": ("C", "F"), "CG": ("C", "G")},
+)
+
+
+def test_fixpoint():
+    for strategy in RewriteStrategy:
+        system = RewritingSystem([delete_leaf], strategy, Random(0))
+        result = system.run(tree)
+        assert result.nodes == frozenset(["A"])
+        assert not result.edges
+        assert system.step(result) is None
+
+
+def test_strategies():
+    assert len(list(RewritingSystem([delete_leaf], "priority").steps(tree))) == 6
+    assert len(list(RewritingSystem([delete_leaf], "random", Random(0)).steps(tree))) == 6
+
+    # All four leaves go in the first step, then both of the nodes that have become leaves.
+    steps = list(RewritingSystem([delete_leaf], "parallel").steps(tree))
+    assert len(steps) == 2
+    assert len(steps[0][1].deleted_nodes) == 4
+
+    # The first rule shadows the second, as long as it applies.
+    result = RewritingSystem([delete_leaf, contract_edge]).run(tree)
+    assert result.nodes == frozenset(["A"]) and not result.edges
+    result = RewritingSystem([contract_edge, delete_leaf]).run(tree)
+    assert result.nodes == frozenset(["A", "B", "C"]) and len(result.edges) == 6
+
+    # Matches of different rules are rewritten together, as long as they are independent.
+    (result, delta), *rest = RewritingSystem([contract_edge, delete_leaf], "parallel").steps(tree)
+    assert len(delta.deleted_nodes) == 4 and len(delta.added_edges) == 4
+    assert sum(len(result.edges_between(n, n)) for n in result.nodes) == 4
+
+
+def test_step_budget():
+    system = RewritingSystem([delete_leaf])
+    assert system.run(tree, 0) is tree
+    result = system.run(tree, 2)
+    assert len(result.nodes) == 5
+    assert len(system.plans) == 1
+
+
+def test_match_store():
+    def match_keys(matches):
+        return {
+            (frozenset((n, m.node_map(n)) for n in m.dom.nodes), frozenset((e, m.edge_map(e)) for e in m.dom.edges))
+            for m in matches
+        }
+
+    # Merge the endpoints of an edge into its source, keeping the edge as a loop.
+    merge_edge = DoublePushoutRule(
+        FinGraphMorphism(
+            make_graph(["X", "Y"], {"XY": ("X", "Y")}),
+            make_graph(["X", "Y"], {"XY": ("X", "Y")}),
+            FinSetMorphism(FinSetObject(["X", "Y"]), FinSetObject(["X", "Y"]), lambda n: n),
+            FinSetMorphism(FinSetObject(["XY"]), FinSetObject(["XY"]), lambda e: e),
+        ),
+        FinGraphMorphism(
+            make_graph(["X", "Y"], {"XY": ("X", "Y")}),
+            make_graph(["X"], {"XX": ("X", "X")}),
+            FinSetMorphism(FinSetObject(["X", "Y"]), FinSetObject(["X"]), lambda n: "X"),
+            FinSetMorphism(FinSetObject(["XY"]), FinSetObject(["XX"]), lambda e: "XX"),
+        ),
+    )
+    path = make_graph(["X", "Y", "Z"], {"XY": ("X", "Y"), "YZ": ("Y", "Z")})
+
+    random = Random(0)
+    nodes = list(range(12))
+    edges = {f"e{i}": (random.choice(nodes), random.choice(nodes)) for i in range(20)}
+    host = make_graph(nodes, edges)
+
+    system = RewritingSystem([delete_leaf, merge_edge], "random", Random(1))
+    stores = system.match_stores(host)
+    path_store = MatchStore(path, host)
+    for _ in range(8):
+        result = system.step(host, stores)
+        assert result is not None
+        host, delta = result
+        path_store.update(host, delta)
+        for rule, store in zip(system.rules, stores):
+            assert store.host is host
+            assert match_keys(store) == match_keys(find_matches(rule.precondition_map.cod, host))
+        assert match_keys(path_store) == match_keys(find_matches(path, host))
+        assert len(path_store) == len(match_keys(path_store))
+
+    # Under the priority strategy, the store of the second rule is not read while the first applies, and is first
+    # searched on the host it has been brought up to.
+    system = RewritingSystem([delete_leaf, merge_edge])
+    stores = system.match_stores(tree)
+    host = tree
+    for _ in range(3):
+        host, _ = system.step(host, stores)
+    assert match_keys(stores[1]) == match_keys(find_matches(merge_edge.precondition_map.cod, host))
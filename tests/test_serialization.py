@@ -0,0 +1,89 @@
+import pickle
+
+import pytest
+from helpers import inclusion, make_graph
+from pycct import (
+    DoublePushoutRule,
+    FinGraphEncoding,
+    FreshLabel,
+    RewritingSystem,
+    deserialize,
+    double_pushout,
+    double_pushout_matches,
+    register_pickling,
+    serialize,
+)
+
+
+register_pickling()
+
+
+def assert_same_morphism(m, n):
+    assert m.dom == n.dom and m.cod == n.cod
+    assert all(m.node_map(x) == n.node_map(x) for x in m.dom.nodes)
+    assert all(m.edge_map(x) == n.edge_map(x) for x in m.dom.edges)
+
+
+def test_graph():
+    graph = make_graph([frozenset({"A", "B"}), ("C", 0), 3], {"a": (3, ("C", 0)), ("b", 1): (3, 3)})
+    assert deserialize(serialize(graph)) == graph
+    assert pickle.loads(pickle.dumps(graph)) == graph
+
+    labels = [None, True, False, -(2**70), 0, 255, -1.5, "é", b"\x00", ((), frozenset({1, "1"})), range(2, 9, 3)]
+    labelled = make_graph(labels, {})
+    assert deserialize(serialize(labelled)) == labelled
+    with pytest.raises(TypeError):
+        serialize(make_graph([object()], {}))
+    assert pickle.loads(pickle.dumps(graph)) == graph
+
+    empty = make_graph([], {})
+    assert deserialize(serialize(empty)) == empty
+
+
+def test_rewritten_graph():
+    # Grow a leaf from every node, labelling the created nodes and edges with FreshLabels.
+    condition = make_graph(["X"], {})
+    rule = DoublePushoutRule(
+        inclusion(condition, condition), inclusion(condition, make_graph(["X", "Y"], {"XY": ("X", "Y")}))
+    )
+    rewritten = RewritingSystem([rule]).run(make_graph(["A"], {}), max_steps=3)
+    assert any(isinstance(n, FreshLabel) for n in rewritten.nodes)
+    loaded = deserialize(serialize(rewritten))
+    assert loaded == rewritten
+    assert pickle.loads(pickle.dumps(rewritten)) == rewritten
+
+    # Rewrites of the loaded graph create labels distinct from the loaded ones.
+    assert len(RewritingSystem([rule]).run(loaded, max_steps=3).nodes) == len(loaded.nodes) + 3
+
+
+def test_zero_copy():
+    graph = make_graph(range(4), {e: (e, (e + 1) % 4) for e in range(4)})
+    data = serialize(graph)
+    encoding = deserialize(data, decode=False)
+    assert isinstance(encoding, FinGraphEncoding)
+    assert isinstance(encoding.source, memoryview) and encoding.source.obj is data
+    assert [encoding.node_labels[s] for s in encoding.source] == [graph.source(e) for e in encoding.edge_labels]
+    assert deserialize(data) == graph
+
+    with pytest.raises(AssertionError):
+        deserialize(b"not a graph" + data)
+
+
+def test_morphism_and_rule():
+    condition = make_graph(["X"], {})
+    precondition = make_graph(["X", "Y"], {"XY": ("X", "Y")})
+    postcondition = make_graph(["X", "Z"], {"XZ": ("X", "Z")})
+    rule = DoublePushoutRule(inclusion(condition, precondition), inclusion(condition, postcondition))
+
+    m = deserialize(serialize(rule.precondition_map))
+    assert_same_morphism(m, rule.precondition_map)
+    assert_same_morphism(pickle.loads(pickle.dumps(m)), m)
+
+    loaded = pickle.loads(pickle.dumps(rule))
+    assert_same_morphism(loaded.precondition_map, rule.precondition_map)
+    assert_same_morphism(loaded.postcondition_map, rule.postcondition_map)
+    assert loaded.precondition_map.dom is loaded.postcondition_map.dom
+
+    host = make_graph(["A", "B", "C"], {"AB": ("A", "B"), "CA": ("C", "A")})
+    match = next(double_pushout_matches(rule, host))
+    assert double_pushout(loaded, host, match) == double_pushout(rule, host, match)
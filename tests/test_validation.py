@@ -0,0 +1,86 @@
+from threading import Thread
+
+import pytest
+from pycct import (
+    FinGraphMorphism,
+    FinGraphObject,
+    FinSetMorphism,
+    FinSetObject,
+    ValidationMode,
+    finset_composition,
+    get_validation_mode,
+    set_validation_mode,
+    validation_mode,
+)
+
+
+def test_validation_mode():
+    a = FinSetObject(["A", "B"])
+    b = FinSetObject(["C"])
+
+    with pytest.raises(AssertionError):
+        FinSetMorphism(a, b, lambda x: x)
+
+    with validation_mode("off"):
+        assert get_validation_mode() is ValidationMode.OFF
+        FinSetMorphism(a, b, lambda x: x)
+    assert get_validation_mode() is ValidationMode.FULL
+
+    set_validation_mode(ValidationMode.SAMPLED)
+    try:
+        with pytest.raises(AssertionError):
+            FinSetMorphism(a, b, lambda x: x)
+        FinSetMorphism(FinSetObject(range(1000)), b, lambda _: "C")
+    finally:
+        set_validation_mode(ValidationMode.FULL)
+
+
+def test_fingraph_validation_mode():
+    nodes = FinSetObject(["A", "B"])
+    edges = FinSetObject(["E"])
+    graph = FinGraphObject(
+        nodes, edges, FinSetMorphism(edges, nodes, lambda _: "A"), FinSetMorphism(edges, nodes, lambda _: "B")
+    )
+    swap_nodes = FinSetMorphism(nodes, nodes, lambda n: "B" if n == "A" else "A")
+    identity_edges = FinSetMorphism(edges, edges, lambda e: e)
+
+    with pytest.raises(AssertionError):
+        FinGraphMorphism(graph, graph, swap_nodes, identity_edges)
+
+    with validation_mode(ValidationMode.OFF):
+        FinGraphMorphism(graph, graph, swap_nodes, identity_edges)
+
+
+def test_trusted_constructions():
+    calls = []
+
+    def f_(x):
+        calls.append(x)
+        return x
+
+    a = FinSetObject(["A", "B"])
+    f = FinSetMorphism(a, a, f_)
+    assert len(calls) == 2
+
+    # Composites of validated morphisms are not re-validated.
+    finset_composition(f, f)
+    assert len(calls) == 2
+
+
+def test_validation_mode_scope():
+    a = FinSetObject(["A", "B"])
+    b = FinSetObject(["C"])
+
+    # A scoped mode applies to the current thread only.
+    modes = []
+    with validation_mode("off"):
+        thread = Thread(target=lambda: modes.append(get_validation_mode()))
+        thread.start()
+        thread.join()
+    assert modes == [ValidationMode.FULL]
+
+    # Or to a single call.
+    unchecked = validation_mode("off")(FinSetMorphism)
+    unchecked(a, b, lambda x: x)
+    with pytest.raises(AssertionError):
+        FinSetMorphism(a, b, lambda x: x)